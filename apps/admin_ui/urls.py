@@ -13,6 +13,8 @@ urlpatterns = [
     path('today/', views.today, name='today'),
     path('collections/<uuid:collection_id>/', views.collection_detail, name='collection-detail'),
     path('manual-import/', views.manual_import, name='manual-import'),
+    path('manual-import/<uuid:import_id>/', views.manual_import_progress, name='manual-import-progress'),
+    path('campaigns/<uuid:campaign_id>/', views.campaign_progress, name='campaign-progress'),
     path('whatsapp/compose/', views.whatsapp_compose, name='whatsapp-compose'),
     path('payments/', views.all_payments, name='all-payments'),
     path('payments/<uuid:payment_id>/', views.payment_detail, name='payment-detail'),
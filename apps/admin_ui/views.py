@@ -2,19 +2,25 @@
 Admin UI views for Sentreso.
 """
 
+from django.http import JsonResponse
 from django.shortcuts import render, redirect
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 from django.utils import timezone
-from django.conf import settings
+from django.conf import settings as django_settings
 from decimal import Decimal
-from datetime import datetime
-import csv
-import io
 from apps.masters.models import Master
-from apps.collections.models import Collection
-from apps.collections.services import ManualPaymentRow, PaymentIngestionService
-from apps.whatsapp.models import WhatsAppMessage, WhatsAppTemplate
+from apps.collections.models import Collection, ManualImport
+from apps.collections.parsing import PAYMENT_FIELDS
+from apps.collections.providers import detect_provider
+from apps.collections.services import (
+    ManualImportError,
+    ManualImportService,
+    ManualPaymentRow,
+    PaymentIngestionService,
+)
+from apps.whatsapp.campaigns import CampaignError, CampaignService
+from apps.whatsapp.models import Campaign, WhatsAppMessage, WhatsAppTemplate
 from apps.whatsapp.services import WhatsAppService
 from apps.reconciliation.models import PaymentMatch
 from apps.agents.models import Agent
@@ -211,12 +217,12 @@ def settings(request):
             'master': master,
             'api_key': api_key,
             'whatsapp_configured': all([
-                getattr(settings, 'WHATSAPP_API_URL', None),
-                getattr(settings, 'WHATSAPP_API_TOKEN', None),
-                getattr(settings, 'WHATSAPP_PHONE_NUMBER_ID', None),
+                getattr(django_settings, 'WHATSAPP_API_URL', None),
+                getattr(django_settings, 'WHATSAPP_API_TOKEN', None),
+                getattr(django_settings, 'WHATSAPP_PHONE_NUMBER_ID', None),
             ]),
-            'whatsapp_sender_id': getattr(settings, 'WHATSAPP_PHONE_NUMBER_ID', None),
-            'pinpay_template': getattr(settings, 'PINPAY_TEMPLATE_NAME', None),
+            'whatsapp_sender_id': getattr(django_settings, 'WHATSAPP_PHONE_NUMBER_ID', None),
+            'pinpay_template': getattr(django_settings, 'PINPAY_TEMPLATE_NAME', None),
         }
         return render(request, 'admin/settings.html', context)
     except Master.DoesNotExist:
@@ -236,7 +242,7 @@ def logout(request):
 @require_http_methods(["GET", "POST"])
 def manual_import(request):
     """
-    Manual CSV import for demo (Wave export simulation).
+    Manual CSV/Excel import for demo (Wave export simulation).
     """
     if 'api_key' not in request.session:
         return redirect('admin_ui:login')
@@ -267,43 +273,26 @@ def manual_import(request):
         if action == "preview":
             upload = request.FILES.get("csv_file")
             if not upload:
-                context["errors"].append("CSV file is required.")
+                context["errors"].append("A CSV or Excel file is required.")
             else:
                 try:
-                    decoded = upload.read().decode("utf-8-sig")
-                    reader = csv.DictReader(io.StringIO(decoded))
-                    headers = reader.fieldnames or []
-                    rows = [row for row in reader]
-                except Exception as exc:
-                    context["errors"].append(f"Failed to parse CSV: {exc}")
-                    headers = []
-                    rows = []
-
-                if len(rows) > 500:
-                    context["errors"].append(
-                        "CSV too large for UI preview. Use the CLI import for large files."
-                    )
-
-                request.session["manual_import_headers"] = headers
-                request.session["manual_import_rows"] = rows
-
-                context["headers"] = headers
-                context["preview_rows"] = rows[:10]
-                context["mapping"] = _suggest_mapping(headers)
+                    manual_import = ManualImportService().stage(master, upload)
+                except ManualImportError as exc:
+                    context["errors"].append(str(exc))
+                else:
+                    request.session["manual_import_id"] = str(manual_import.id)
+                    _add_preview(context, manual_import)
 
         elif action == "import":
-            headers = request.session.get("manual_import_headers", [])
-            rows = request.session.get("manual_import_rows", [])
-            if not rows or not headers:
-                context["errors"].append("No preview data found. Please upload CSV first.")
+            manual_import = _get_staged_import(request, master)
+            if not manual_import:
+                context["errors"].append("No preview data found. Please upload a file first.")
             else:
                 if request.POST.get("confirm_send") != "yes":
                     context["errors"].append(
-                        "Please confirm you understand messages will be sent immediately."
+                        "Please confirm you understand messages will be sent to these numbers."
                     )
-                    context["headers"] = headers
-                    context["preview_rows"] = rows[:10]
-                    context["mapping"] = _suggest_mapping(headers)
+                    _add_preview(context, manual_import)
                     return render(request, "admin/manual_import.html", context)
 
                 mapping = {
@@ -319,41 +308,33 @@ def manual_import(request):
                     context["errors"].append(
                         "Missing column mapping: " + ", ".join(missing)
                     )
-                    context["headers"] = headers
-                    context["preview_rows"] = rows[:10]
+                    _add_preview(context, manual_import)
                     context["mapping"] = mapping
                 else:
-                    parsed_rows = []
-                    for row in rows:
-                        parsed_rows.append(
-                            ManualPaymentRow(
-                                customer_name=row.get(mapping["customer_name"], "").strip(),
-                                phone_number=row.get(mapping["phone_number"], "").strip(),
-                                amount=_parse_amount(row.get(mapping["amount"], "")),
-                                payment_date=_parse_date(row.get(mapping["payment_date"], "")),
-                                reference=row.get(mapping["reference"], "").strip(),
-                            )
-                        )
-
-                    service = PaymentIngestionService(master)
-                    results = service.ingest_many(
-                        rows=parsed_rows,
+                    manual_import = ManualImportService().start(
+                        manual_import,
+                        mapping=mapping,
                         message=request.POST.get("message") or None,
                         template_name=request.POST.get("template_name") or None,
                         template_language=request.POST.get("template_language") or "fr",
                     )
-                    context["imported"] = True
-                    context["summary"] = _build_summary(results)
-                    request.session["manual_import_collection_ids"] = [
-                        r.get("collection_id") for r in results if r.get("collection_id")
-                    ]
-                    request.session.pop("manual_import_headers", None)
-                    request.session.pop("manual_import_rows", None)
+                    return redirect("admin_ui:manual-import-progress", import_id=manual_import.id)
         elif action == "generate":
             scenario = request.POST.get("scenario", "taxi")
             count = int(request.POST.get("count") or 10)
             rows = list(_generate_demo_rows(scenario, count, request.POST.get("phone")))
-            service = PaymentIngestionService(master)
+            # Recorded as a completed import so "Send to last import" targets its collections
+            manual_import = ManualImport.objects.create(
+                master=master,
+                file_name=f"Demo: {scenario}",
+                status="completed",
+                has_staged_file=False,
+                total_rows=len(rows),
+                processed_rows=len(rows),
+                started_at=timezone.now(),
+                completed_at=timezone.now(),
+            )
+            service = PaymentIngestionService(master, manual_import)
             results = service.ingest_many(
                 rows=rows,
                 message=request.POST.get("message") or None,
@@ -362,28 +343,28 @@ def manual_import(request):
             )
             context["imported"] = True
             context["summary"] = _build_summary(results)
-            request.session["manual_import_collection_ids"] = [
-                r.get("collection_id") for r in results if r.get("collection_id")
-            ]
+            request.session["manual_import_id"] = str(manual_import.id)
         elif action == "campaign_last_import":
-            collection_ids = request.session.get("manual_import_collection_ids", [])
-            context["campaign_summary"] = _run_campaign(
-                master=master,
-                collection_ids=collection_ids,
-                label="last import",
-            )
+            last_import = _get_last_import(request, master)
+            campaign, error = None, "No collections found for last import."
+            if last_import:
+                campaign, error = _start_campaign(
+                    master=master,
+                    label="last import",
+                    manual_import=last_import,
+                )
+            if campaign:
+                return redirect("admin_ui:campaign-progress", campaign_id=campaign.id)
+            context["campaign_summary"] = {"error": error}
         elif action == "campaign_today":
-            today = timezone.localdate()
-            collections = Collection.objects.filter(
-                master=master,
-                status="paid",
-                paid_at__date=today,
-            )
-            context["campaign_summary"] = _run_campaign(
+            campaign, error = _start_campaign(
                 master=master,
-                collection_ids=[str(c.id) for c in collections],
                 label="today's payers",
+                paid_on=timezone.localdate(),
             )
+            if campaign:
+                return redirect("admin_ui:campaign-progress", campaign_id=campaign.id)
+            context["campaign_summary"] = {"error": error}
 
     # Live audit panel
     context["recent_collections"] = (
@@ -396,15 +377,108 @@ def manual_import(request):
         WhatsAppMessage.objects.filter(master=master, status="failed")
         .order_by("-created_at")[:5]
     )
+    context["recent_campaigns"] = Campaign.objects.filter(master=master).order_by("-created_at")[:5]
     context["master"] = master
-    context["sender_id"] = getattr(settings, "WHATSAPP_PHONE_NUMBER_ID", None)
-    context["pinpay_template"] = getattr(settings, "PINPAY_TEMPLATE_NAME", None) or "pinpay"
-    context["pinpay_language"] = getattr(settings, "PINPAY_TEMPLATE_LANGUAGE", "fr")
-    context["last_import_count"] = len(request.session.get("manual_import_collection_ids", []))
+    context["sender_id"] = getattr(django_settings, "WHATSAPP_PHONE_NUMBER_ID", None)
+    context["pinpay_template"] = getattr(django_settings, "PINPAY_TEMPLATE_NAME", None) or "pinpay"
+    context["pinpay_language"] = getattr(django_settings, "PINPAY_TEMPLATE_LANGUAGE", "fr")
+    last_import = _get_last_import(request, master)
+    context["last_import_count"] = last_import.collections.count() if last_import else 0
 
     return render(request, "admin/manual_import.html", context)
 
 
+@require_http_methods(["GET"])
+def manual_import_progress(request, import_id):
+    """
+    Progress of a background manual import.
+
+    The page polls itself with ?format=json until the import has finished.
+    """
+    if 'api_key' not in request.session:
+        return redirect('admin_ui:login')
+
+    api_key = request.session['api_key']
+    try:
+        master = Master.objects.get_by_api_key(api_key)
+        manual_import = ManualImport.objects.get(id=import_id, master=master)
+    except (Master.DoesNotExist, ManualImport.DoesNotExist):
+        request.session.flush()
+        return redirect('admin_ui:login')
+
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "status": manual_import.status,
+            "total_rows": manual_import.total_rows,
+            "processed_rows": manual_import.processed_rows,
+            "duplicate_rows": manual_import.duplicate_rows,
+            "queued_messages": manual_import.queued_messages,
+            "progress_percent": manual_import.progress_percent,
+            "error_message": manual_import.error_message,
+        })
+
+    payments = manual_import.processed_rows - manual_import.duplicate_rows
+    context = {
+        "manual_import": manual_import,
+        "summary": {
+            "payments": payments,
+            "duplicates": manual_import.duplicate_rows,
+            "agents": manual_import.agents,
+            "queued": manual_import.queued_messages,
+            "skipped": payments - manual_import.queued_messages,
+        },
+    }
+    return render(request, "admin/manual_import_progress.html", context)
+
+
+@require_http_methods(["GET", "POST"])
+def campaign_progress(request, campaign_id):
+    """
+    Progress of a WhatsApp campaign, with pause, resume and cancel.
+
+    The page polls itself with ?format=json while the campaign runs.
+    """
+    if 'api_key' not in request.session:
+        return redirect('admin_ui:login')
+
+    api_key = request.session['api_key']
+    try:
+        master = Master.objects.get_by_api_key(api_key)
+        campaign = Campaign.objects.get(id=campaign_id, master=master)
+    except (Master.DoesNotExist, Campaign.DoesNotExist):
+        request.session.flush()
+        return redirect('admin_ui:login')
+
+    error = None
+    if request.method == "POST":
+        action = request.POST.get("action")
+        service = CampaignService()
+        try:
+            if action == "pause":
+                service.pause(campaign)
+            elif action == "resume":
+                service.resume(campaign)
+            elif action == "cancel":
+                service.cancel(campaign)
+        except CampaignError as exc:
+            error = str(exc)
+        else:
+            return redirect("admin_ui:campaign-progress", campaign_id=campaign.id)
+
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "status": campaign.status,
+            "total_messages": campaign.total_messages,
+            "sent_messages": campaign.sent_messages,
+            "failed_messages": campaign.failed_messages,
+            "remaining_messages": campaign.remaining_messages,
+            "progress_percent": campaign.progress_percent,
+            "error_message": campaign.error_message,
+        })
+
+    return render(request, "admin/campaign_progress.html", {"campaign": campaign, "error": error})
+
+
 @require_http_methods(["GET"])
 def collection_detail(request, collection_id):
     if 'api_key' not in request.session:
@@ -571,38 +645,57 @@ def _suggest_mapping(headers):
     }
 
 
-def _parse_amount(value):
-    raw = (value or "").strip().replace(" ", "")
-    if raw.count(",") == 1 and raw.count(".") == 0:
-        raw = raw.replace(",", ".")
-    return Decimal(raw or "0")
+def _add_preview(context, manual_import):
+    context["manual_import"] = manual_import
+    context["headers"] = manual_import.headers
+    context["preview_rows"] = ManualImportService().preview(manual_import)
+    context["imported_before"] = ManualImportService().imported_before(manual_import)
+
+    provider = detect_provider(manual_import.headers)
+    if provider and provider.unsupported:
+        context["errors"].append(provider.unsupported)
+    if provider and not provider.unsupported:
+        context["provider"] = provider
+        context["mapping"] = {
+            field: provider.resolve(manual_import.headers, field) or ""
+            for field in PAYMENT_FIELDS
+        }
+    else:
+        context["mapping"] = _suggest_mapping(manual_import.headers)
 
+    if all(context["mapping"].get(field) for field in PAYMENT_FIELDS):
+        error = ManualImportService().check(manual_import, context["mapping"])
+        if error:
+            context["errors"].append(error)
 
-def _parse_date(value):
-    raw = (value or "").strip()
-    if not raw:
-        return timezone.now()
-    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
-        try:
-            return datetime.strptime(raw, fmt)
-        except ValueError:
-            continue
-    try:
-        return datetime.fromisoformat(raw)
-    except ValueError:
-        return timezone.now()
+
+def _get_staged_import(request, master):
+    import_id = request.session.get("manual_import_id")
+    if not import_id:
+        return None
+    return ManualImport.objects.filter(id=import_id, master=master, status="staged").first()
+
+
+def _get_last_import(request, master):
+    import_id = request.session.get("manual_import_id")
+    if not import_id:
+        return None
+    return ManualImport.objects.filter(id=import_id, master=master, status="completed").first()
 
 
 def _build_summary(results):
     if not results:
         return None
     agent_ids = {r.get("agent_id") for r in results if r.get("agent_id")}
+    queued = 0
     sent = 0
     failed = 0
     skipped = 0
     for r in results:
         status = r.get("whatsapp_status")
-        if status == "sent":
+        if status == "pending":
+            queued += 1
+        elif status == "sent":
             sent += 1
         elif status == "failed":
             failed += 1
@@ -611,6 +704,7 @@ def _build_summary(results):
     return {
         "payments": len(results),
         "agents": len(agent_ids),
+        "queued": queued,
         "sent": sent,
         "failed": failed,
         "skipped": skipped,
@@ -618,8 +712,8 @@ def _build_summary(results):
 
 
 def _get_pinpay_template(master):
-    template_name = getattr(settings, "PINPAY_TEMPLATE_NAME", None)
-    template_language = getattr(settings, "PINPAY_TEMPLATE_LANGUAGE", "fr")
+    template_name = getattr(django_settings, "PINPAY_TEMPLATE_NAME", None)
+    template_language = getattr(django_settings, "PINPAY_TEMPLATE_LANGUAGE", "fr")
     if not template_name:
         return None
     template, _ = WhatsAppTemplate.objects.get_or_create(
@@ -636,62 +730,17 @@ def _get_pinpay_template(master):
     return template
 
 
-def _run_campaign(master, collection_ids, label):
-    if not collection_ids:
-        return {"error": f"No collections found for {label}."}
-
+def _start_campaign(master, label, manual_import=None, paid_on=None):
     template = _get_pinpay_template(master)
     if not template:
-        return {"error": "PINPAY_TEMPLATE_NAME is not configured."}
-
-    collections = Collection.objects.filter(master=master, id__in=collection_ids)
-    if not collections:
-        return {"error": f"No collections found for {label}."}
+        return None, "PINPAY_TEMPLATE_NAME is not configured."
 
-    service = WhatsAppService()
-    sent = 0
-    failed = 0
-    for collection in collections:
-        agent = collection.agent
-        amount = str(collection.amount)
-        currency = "XOF"
-        reference = collection.transaction_reference or "-"
-        timestamp = (
-            collection.paid_at.strftime("%Y-%m-%d %H:%M:%S")
-            if collection.paid_at
-            else collection.created_at.strftime("%Y-%m-%d %H:%M:%S")
-        )
-
-        message = WhatsAppMessage.objects.create(
-            master=master,
-            agent=agent,
-            collection=collection,
-            template=template,
-            direction="outbound",
-            status="pending",
-            to_number=agent.whatsapp_number,
-            content=f"Template: {template.whatsapp_template_name}",
-            metadata={
-                "template_params": [amount, currency, reference, timestamp],
-            },
-        )
-
-        success = service.send_message(message)
-        if success:
-            message.status = "sent"
-            message.sent_at = timezone.now()
-            sent += 1
-        else:
-            message.status = "failed"
-            failed += 1
-        message.save()
-
-    return {
-        "label": label,
-        "sent": sent,
-        "failed": failed,
-        "total": sent + failed,
-    }
+    try:
+        return CampaignService().start(
+            master, label, template, manual_import=manual_import, paid_on=paid_on
+        ), None
+    except CampaignError as exc:
+        return None, str(exc)
 
 
 def _generate_demo_rows(scenario: str, count: int, phone_override: str | None):
@@ -0,0 +1,95 @@
+"""
+Recompute the canonical E.164 numbers of agents and WhatsApp messages.
+
+Migrations fill whatsapp_e164 and to_e164 once; run this after changing a
+master's phone_country_code or DEFAULT_PHONE_COUNTRY_CODE. Rows are read
+and updated in batches, and only rows whose number changes are written.
+Agents that turn out to share a number are listed so they can be merged.
+
+Usage:
+    python manage.py backfill_phone_e164
+    python manage.py backfill_phone_e164 --master-email ops@example.com --dry-run
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from apps.agents.models import Agent
+from apps.core.phones import normalize_e164
+from apps.masters.models import Master
+from apps.whatsapp.models import WhatsAppMessage
+
+
+class Command(BaseCommand):
+    help = "Backfill the E.164 phone columns of agents and WhatsApp messages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--master-email", help="Only backfill this master's rows.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows read and updated per query.")
+        parser.add_argument("--dry-run", action="store_true", help="Count the changes without saving them.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        masters = Master.objects.all()
+        if options["master_email"]:
+            masters = [self._get_master(options["master_email"])]
+
+        agents = 0
+        messages = 0
+        for master in masters:
+            country_code = master.default_country_code
+            agents += self._backfill(
+                Agent.objects.filter(master=master), "whatsapp_number", "whatsapp_e164", country_code, options
+            )
+            messages += self._backfill(
+                WhatsAppMessage.objects.filter(master=master), "to_number", "to_e164", country_code, options
+            )
+
+        verb = "Would update" if options["dry_run"] else "Updated"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {agents} agents and {messages} WhatsApp messages."))
+        self._report_duplicates(masters)
+
+    def _backfill(self, queryset, source, target, country_code, options) -> int:
+        """Normalise one column of a queryset, returning the number of rows changed."""
+        model = queryset.model
+        changed = 0
+        batch = []
+        for obj in queryset.only("id", source, target).iterator(chunk_size=options["batch_size"]):
+            canonical = normalize_e164(getattr(obj, source), country_code)
+            if getattr(obj, target) == canonical:
+                continue
+            setattr(obj, target, canonical)
+            batch.append(obj)
+            if len(batch) == options["batch_size"]:
+                changed += self._save(model, batch, target, options["dry_run"])
+                batch = []
+        changed += self._save(model, batch, target, options["dry_run"])
+        return changed
+
+    @staticmethod
+    def _save(model, batch, field, dry_run) -> int:
+        if batch and not dry_run:
+            model.objects.bulk_update(batch, [field])
+        return len(batch)
+
+    def _report_duplicates(self, masters):
+        duplicates = (
+            Agent.objects.filter(master__in=masters)
+            .exclude(whatsapp_e164="")
+            .values("master__email", "whatsapp_e164")
+            .annotate(agents=Count("id"))
+            .filter(agents__gt=1)
+            .order_by("master__email", "whatsapp_e164")
+        )
+        for duplicate in duplicates:
+            self.stdout.write(self.style.WARNING(
+                f"  {duplicate['master__email']}: {duplicate['agents']} agents share {duplicate['whatsapp_e164']}"
+            ))
+
+    def _get_master(self, email: str) -> Master:
+        try:
+            return Master.objects.get(email=email)
+        except Master.DoesNotExist as exc:
+            raise CommandError(f"Master not found: {email}") from exc
@@ -3,7 +3,7 @@ Custom managers for Agent model.
 """
 
 from django.db import models
-from django.core.exceptions import ObjectDoesNotExist
+from apps.core.phones import normalize_e164
 
 
 class AgentManager(models.Manager):
@@ -21,6 +21,8 @@ class AgentManager(models.Manager):
         """
         Get agent by WhatsApp number for a specific master.
 
+        The number is matched in E.164 form, so any format of it finds the agent.
+
         Args:
             whatsapp_number: The WhatsApp number to look up
             master: The master instance
@@ -31,9 +33,17 @@ class AgentManager(models.Manager):
         Raises:
             Agent.DoesNotExist: If no agent found
         """
-        try:
-            return self.get(whatsapp_number=whatsapp_number, master=master, is_active=True)
-        except ObjectDoesNotExist:
+        whatsapp_e164 = normalize_e164(whatsapp_number, master.default_country_code)
+        # Numbers are not unique per master; the oldest agent is used, as in ingestion
+        agent = None
+        if whatsapp_e164:
+            agent = (
+                self.filter(whatsapp_e164=whatsapp_e164, master=master, is_active=True)
+                .order_by('created_at')
+                .first()
+            )
+        if agent is None:
             raise self.model.DoesNotExist(
                 f"No active agent found with WhatsApp number {whatsapp_number} for master {master.id}"
             )
+        return agent
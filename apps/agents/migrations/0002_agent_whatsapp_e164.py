@@ -0,0 +1,42 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:32
+
+from django.db import migrations, models
+
+from apps.core.phones import default_country_code, normalize_e164
+
+
+def fill_whatsapp_e164(apps, schema_editor):
+    """Normalise existing numbers with each master's country code."""
+    Master = apps.get_model('masters', 'Master')
+    Agent = apps.get_model('agents', 'Agent')
+    for master in Master.objects.only('id', 'phone_country_code'):
+        country_code = master.phone_country_code.lstrip('+') or default_country_code()
+        batch = []
+        for agent in Agent.objects.filter(master=master).only('id', 'whatsapp_number').iterator(chunk_size=1000):
+            agent.whatsapp_e164 = normalize_e164(agent.whatsapp_number, country_code)
+            batch.append(agent)
+            if len(batch) == 1000:
+                Agent.objects.bulk_update(batch, ['whatsapp_e164'])
+                batch = []
+        Agent.objects.bulk_update(batch, ['whatsapp_e164'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0001_initial'),
+        ('masters', '0002_master_phone_country_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agent',
+            name='whatsapp_e164',
+            field=models.CharField(blank=True, default='', help_text='WhatsApp number in E.164 form', max_length=16),
+        ),
+        migrations.RunPython(fill_whatsapp_e164, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='agent',
+            index=models.Index(fields=['master', 'whatsapp_e164'], name='agents_agen_master__765ba7_idx'),
+        ),
+    ]
@@ -4,7 +4,10 @@ Agent model - represents mobile money agents/shops who owe payments.
 
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
 from apps.core.models import BaseModel
+from apps.core.phones import normalize_e164
 from apps.masters.models import Master
 from apps.agents.managers import AgentManager
 
@@ -15,10 +18,13 @@ class Agent(BaseModel):
 
     Agents are entities that owe payments to masters.
     Each agent belongs to a master and has a WhatsApp number for communication.
+    whatsapp_e164 holds that number in canonical E.164 form; match agents on
+    it, since whatsapp_number keeps whatever format the client sent.
     """
     master = models.ForeignKey(Master, on_delete=models.CASCADE, related_name='agents')
     name = models.CharField(max_length=255)
     whatsapp_number = models.CharField(max_length=20, db_index=True)
+    whatsapp_e164 = models.CharField(max_length=16, blank=True, default='', help_text='WhatsApp number in E.164 form')
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     risk_score = models.DecimalField(
         max_digits=5,
@@ -37,9 +43,20 @@ class Agent(BaseModel):
         unique_together = [['master', 'whatsapp_number']]
         indexes = [
             models.Index(fields=['master', 'whatsapp_number']),
+            models.Index(fields=['master', 'whatsapp_e164']),
             models.Index(fields=['master', 'is_active']),
             models.Index(fields=['risk_score']),
         ]
 
     def __str__(self):
         return f"{self.name} ({self.whatsapp_number}) - {self.master.name}"
+
+
+@receiver(pre_save, sender=Agent)
+def normalize_whatsapp_number(sender, instance, **kwargs):
+    """
+    Signal to keep the canonical WhatsApp number in step with whatsapp_number.
+
+    bulk_create() and bulk_update() skip signals; callers set whatsapp_e164 themselves.
+    """
+    instance.whatsapp_e164 = normalize_e164(instance.whatsapp_number, instance.master.default_country_code)
@@ -4,6 +4,7 @@ Serializers for Agent model.
 
 from rest_framework import serializers
 from apps.agents.models import Agent
+from apps.core.phones import normalize_e164
 from apps.masters.models import Master
 
 
@@ -15,10 +16,24 @@ class AgentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Agent
         fields = (
-            'id', 'master_id', 'master_name', 'name', 'whatsapp_number',
+            'id', 'master_id', 'master_name', 'name', 'whatsapp_number', 'whatsapp_e164',
             'phone_number', 'risk_score', 'is_active', 'created_at', 'updated_at'
         )
-        read_only_fields = ('id', 'master_id', 'master_name', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'master_id', 'master_name', 'whatsapp_e164', 'created_at', 'updated_at')
         extra_kwargs = {
             'phone_number': {'required': False, 'allow_blank': True},
         }
+
+    def validate_whatsapp_number(self, value):
+        """Validate that no other agent of the master has this number, in any format."""
+        request = self.context['request']
+        master = getattr(request, 'master', request.auth)
+        whatsapp_e164 = normalize_e164(value, master.default_country_code)
+        if not whatsapp_e164:
+            raise serializers.ValidationError("Enter a phone number.")
+        agents = Agent.objects.filter(master=master, whatsapp_e164=whatsapp_e164)
+        if self.instance:
+            agents = agents.exclude(id=self.instance.id)
+        if agents.exists():
+            raise serializers.ValidationError("An agent with this WhatsApp number already exists.")
+        return value
@@ -7,6 +7,7 @@ from rest_framework.response import Response
 from apps.api.permissions import IsAuthenticatedWithAPIKey
 from apps.agents.models import Agent
 from apps.agents.serializers import AgentSerializer
+from apps.core.phones import normalize_e164
 
 
 class AgentViewSet(viewsets.ModelViewSet):
@@ -25,9 +26,19 @@ class AgentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """
         Filter agents to only those belonging to the authenticated master.
+
+        ?whatsapp_number= matches the number in any format.
         """
         master = getattr(self.request, 'master', self.request.auth)
-        return Agent.objects.get_by_master(master)
+        queryset = Agent.objects.get_by_master(master)
+
+        whatsapp_number = self.request.query_params.get('whatsapp_number', None)
+        if whatsapp_number:
+            queryset = queryset.filter(
+                whatsapp_e164=normalize_e164(whatsapp_number, master.default_country_code)
+            )
+
+        return queryset
 
     def perform_create(self, serializer):
         """
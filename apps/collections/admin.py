@@ -3,7 +3,7 @@ Admin configuration for Collection model.
 """
 
 from django.contrib import admin
-from apps.collections.models import Collection
+from apps.collections.models import Collection, ImportCheckpoint, ManualImport, StatementManifest
 
 
 @admin.register(Collection)
@@ -15,9 +15,25 @@ class CollectionAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
 
 
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('id', 'master', 'source', 'rows_committed', 'completed_at', 'updated_at')
+    list_filter = ('master',)
+    search_fields = ('source',)
+    readonly_fields = ('id', 'created_at', 'updated_at')
 
 
+@admin.register(ManualImport)
+class ManualImportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'master', 'file_name', 'status', 'processed_rows', 'duplicate_rows', 'total_rows', 'created_at')
+    list_filter = ('status', 'master')
+    search_fields = ('file_name',)
+    readonly_fields = ('id', 'created_at', 'updated_at')
 
 
-
-
+@admin.register(StatementManifest)
+class StatementManifestAdmin(admin.ModelAdmin):
+    list_display = ('id', 'master', 'file_name', 'payments', 'duplicate_payments', 'completed_at', 'created_at')
+    list_filter = ('master',)
+    search_fields = ('file_name', 'file_hash')
+    readonly_fields = ('id', 'created_at', 'updated_at')
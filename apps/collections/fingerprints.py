@@ -0,0 +1,199 @@
+"""
+Fingerprints of imported statements and payments.
+
+Operators re-upload overlapping exports (last week's file plus a few new
+days), so each imported file is recorded by its SHA-256 and each row by a
+hash of its reference, amount and date. A repeat file is recognised from
+its hash alone; in an overlapping one, rows already imported are dropped
+by SeenPayments before any agent, collection or message query runs.
+
+SeenPayments keeps the master's fingerprints in an in-memory Bloom
+filter for the run. A fingerprint covers the payment date, so only the
+fingerprints of the dates the statement spans are loaded, as chunks reach
+them; the load follows the size of the statement, not of the master's
+history. Rows the filter has never seen are new for certain; only the
+rows it reports as seen are checked against PaymentFingerprint, in one
+query per chunk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from datetime import date, timedelta
+from typing import Optional
+
+from apps.collections.models import PaymentFingerprint, StatementManifest
+from apps.collections.parsing import ManualPaymentRow
+from apps.masters.models import Master
+
+
+# Bytes read at a time when hashing a file
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class FileHasher:
+    """Incremental SHA-256 of a file, fed chunk by chunk while it is written."""
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+
+    def update(self, data: bytes) -> None:
+        self._hash.update(data)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def file_hash(path: str) -> str:
+    """Return the SHA-256 of a file, read in blocks."""
+    hasher = FileHasher()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(HASH_BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def fingerprint_date(row: ManualPaymentRow) -> Optional[date]:
+    """Return the payment date a row's fingerprint is filed under, None for defaulted dates."""
+    return row.payment_date.date() if row.raw_date is None else None
+
+
+def row_fingerprint(row: ManualPaymentRow) -> str:
+    """
+    Return the fingerprint of a payment row.
+
+    Amounts are normalised (1500 and 1500.00 match). Rows without a
+    reference also include the phone number, so two customers paying the
+    same amount at the same time are not taken for one payment. A date
+    the parser defaulted is hashed as its cell text, not as the default.
+    """
+    amount = format(row.amount.normalize(), "f")
+    payment_date = row.raw_date if row.raw_date is not None else row.payment_date.isoformat()
+    parts = [row.reference or "", amount, payment_date]
+    if not row.reference:
+        parts.append(row.phone_number or "")
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over hex digests.
+
+    The digests are already uniform, so the bit positions come from two
+    64-bit halves of the digest (double hashing) instead of rehashing.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, digest: str) -> None:
+        for position in self._positions(digest):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+    def _positions(self, digest: str):
+        first = int(digest[:16], 16)
+        second = int(digest[16:32], 16) | 1
+        return ((first + index * second) % self.size for index in range(self.hashes))
+
+
+class SeenPayments:
+    """
+    Fingerprints of the payments a master has imported, for one import.
+
+    Fingerprints without a payment date (defaulted dates) are loaded at
+    once; dated ones are loaded for the range of dates the chunks reach,
+    which grows as the import goes.
+
+    Args:
+        master: Master instance
+        expected_rows: Rows the import may add, to size the Bloom filter
+    """
+
+    def __init__(self, master: Master, expected_rows: int = 0):
+        self.master = master
+        undated = PaymentFingerprint.objects.filter(master=master, payment_date__isnull=True)
+        # Overlapping exports put about as many earlier rows in the range as the statement has
+        self.bloom = BloomFilter(undated.count() + 2 * max(expected_rows, 50000))
+        self._load(undated)
+        self._first_date = None
+        self._last_date = None
+
+    def split(self, rows: list[ManualPaymentRow]) -> tuple[list[ManualPaymentRow], list[str]]:
+        """
+        Drop the rows already imported.
+
+        Returns:
+            tuple: The new rows and their fingerprints, in file order
+        """
+        self._load_dates(rows)
+        fingerprints = [row_fingerprint(row) for row in rows]
+        maybe_seen = [fingerprint for fingerprint in fingerprints if fingerprint in self.bloom]
+        seen = set()
+        if maybe_seen:
+            seen = set(
+                PaymentFingerprint.objects.filter(
+                    master=self.master, fingerprint__in=maybe_seen
+                ).values_list("fingerprint", flat=True)
+            )
+
+        new_rows = []
+        new_fingerprints = []
+        for row, fingerprint in zip(rows, fingerprints):
+            if fingerprint in seen:
+                continue
+            # A row repeated within the file is imported once
+            seen.add(fingerprint)
+            new_rows.append(row)
+            new_fingerprints.append(fingerprint)
+        return new_rows, new_fingerprints
+
+    def record(
+        self,
+        rows: list[ManualPaymentRow],
+        fingerprints: list[str],
+        statement: Optional[StatementManifest] = None,
+    ) -> None:
+        """Store the fingerprints of imported rows; call inside the chunk's transaction."""
+        PaymentFingerprint.objects.bulk_create(
+            [
+                PaymentFingerprint(
+                    master=self.master,
+                    statement=statement,
+                    fingerprint=fingerprint,
+                    payment_date=fingerprint_date(row),
+                )
+                for row, fingerprint in zip(rows, fingerprints)
+            ],
+            ignore_conflicts=True,
+        )
+        for fingerprint in fingerprints:
+            self.bloom.add(fingerprint)
+
+    def _load_dates(self, rows: list[ManualPaymentRow]) -> None:
+        """Load the fingerprints of the chunk's dates that are not loaded yet."""
+        dates = [payment_date for payment_date in map(fingerprint_date, rows) if payment_date]
+        if not dates:
+            return
+        first, last = min(dates), max(dates)
+        fingerprints = PaymentFingerprint.objects.filter(master=self.master)
+        if self._first_date is None:
+            self._load(fingerprints.filter(payment_date__range=(first, last)))
+            self._first_date, self._last_date = first, last
+            return
+        if first < self._first_date:
+            self._load(fingerprints.filter(payment_date__range=(first, self._first_date - timedelta(days=1))))
+            self._first_date = first
+        if last > self._last_date:
+            self._load(fingerprints.filter(payment_date__range=(self._last_date + timedelta(days=1), last)))
+            self._last_date = last
+
+    def _load(self, fingerprints) -> None:
+        for fingerprint in fingerprints.values_list("fingerprint", flat=True).iterator(chunk_size=10000):
+            self.bloom.add(fingerprint)
@@ -0,0 +1,151 @@
+"""
+Benchmark statement parsing per provider format.
+
+Generates a synthetic statement for each registered provider, with the
+provider's headers, date format, statuses and some unmapped columns,
+then times StatementParser on it, header detection included. --json
+prints one result per line so runs can be stored and compared.
+
+Usage:
+    python manage.py benchmark_statement_parsing --rows 1000000 --workers 4
+    python manage.py benchmark_statement_parsing --provider wave --format xlsx --json
+"""
+
+import csv
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.collections.parsing import PAYMENT_FIELDS, ManualImportError, StatementParser
+from apps.collections.providers import get_providers
+
+
+class Command(BaseCommand):
+    help = "Benchmark statement parsing throughput for each provider format."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200000, help="Data rows per generated statement.")
+        parser.add_argument("--provider", action="append", help="Provider to benchmark (repeatable; default: all).")
+        parser.add_argument("--format", choices=["csv", "xlsx"], default="csv", help="Statement file format.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "STATEMENT_PARSE_WORKERS", 0),
+            help="Parse processes (0 = one per CPU, 1 = in-process).",
+        )
+        parser.add_argument("--extra-columns", type=int, default=5, help="Unmapped columns added to each row.")
+        parser.add_argument("--repeat", type=int, default=1, help="Parses per provider.")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON lines.")
+
+    def handle(self, *args, **options):
+        if options["rows"] < 1 or options["repeat"] < 1 or options["workers"] < 0:
+            raise CommandError("--rows and --repeat must be at least 1 and --workers cannot be negative.")
+
+        providers = [provider for provider in get_providers() if not provider.unsupported]
+        if options["provider"]:
+            unknown = set(options["provider"]) - {provider.name for provider in providers}
+            if unknown:
+                raise CommandError(f"Unknown provider: {', '.join(sorted(unknown))}")
+            providers = [provider for provider in providers if provider.name in options["provider"]]
+
+        with tempfile.TemporaryDirectory() as directory:
+            for provider in providers:
+                path = os.path.join(directory, f"{provider.name}.{options['format']}")
+                self._generate(provider, path, options)
+                for run in range(options["repeat"]):
+                    result = self._run(provider, path, options)
+                    result["run"] = run + 1
+                    self._report(result, options["json"])
+
+    def _run(self, provider, path, options):
+        parser = StatementParser(workers=options["workers"])
+        started = time.perf_counter()
+        try:
+            payments = sum(1 for _ in parser.parse(path))
+        except ManualImportError as exc:
+            raise CommandError(f"{provider.label}: {exc}") from exc
+        elapsed = time.perf_counter() - started
+
+        return {
+            "provider": provider.name,
+            "format": options["format"],
+            "workers": parser.workers,
+            "rows": options["rows"],
+            "payments": payments,
+            "file_mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(options["rows"] / elapsed, 1) if elapsed else None,
+            "peak_rss_mb": round(self._peak_rss_mb(), 1),
+        }
+
+    def _generate(self, provider, path, options):
+        """Write a statement in the provider's layout; ~5% of rows are not payments."""
+        rng = random.Random(options["seed"])
+        date_format = (provider.date_formats or ("%Y-%m-%d %H:%M:%S",))[0]
+        headers = [provider.columns[field][0] for field in PAYMENT_FIELDS]
+        if provider.status_column:
+            headers.append(provider.status_column[0])
+        headers.extend(aliases[0] for aliases in provider.signature)
+        headers.extend(f"Extra {index + 1}" for index in range(options["extra_columns"]))
+
+        started = datetime(2024, 1, 1)
+        amounts = [500, 1000, 2500, 5000, 12500, 99.75]
+        extras = [f"value {index}" for index in range(options["extra_columns"])]
+
+        def rows():
+            for index in range(options["rows"]):
+                paid = rng.random() > 0.05
+                amount = rng.choice(amounts)
+                row = [
+                    f"Customer {index % 5000}",
+                    f"+22177{index % 5000:07d}",
+                    amount if paid or not provider.incoming_only else -amount,
+                    (started + timedelta(minutes=index)).strftime(date_format),
+                    f"{provider.name.upper()}-{index:09d}",
+                ]
+                if provider.status_column:
+                    row.append(provider.accepted_statuses[0] if paid else "Failed")
+                row.extend("XOF" for _ in provider.signature)
+                row.extend(extras)
+                yield row
+
+        if options["format"] == "xlsx":
+            from openpyxl import Workbook
+
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet()
+            sheet.append(headers)
+            for row in rows():
+                sheet.append(row)
+            workbook.save(path)
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as handle:
+                writer = csv.writer(handle)
+                writer.writerow(headers)
+                writer.writerows(rows())
+
+    def _report(self, result, as_json):
+        if as_json:
+            self.stdout.write(json.dumps(result))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['provider']} ({result['format']}, run {result['run']}, {result['workers']} workers): "
+            f"{result['rows']} rows ({result['file_mb']} MB) -> {result['payments']} payments "
+            f"in {result['seconds']}s = {result['rows_per_second']} rows/s, RSS peak {result['peak_rss_mb']} MB"
+        ))
+
+    @staticmethod
+    def _peak_rss_mb():
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
@@ -1,27 +1,48 @@
 """
-Import manual payments from CSV or generate demo data.
+Import manual payments from a CSV/Excel statement or generate demo data.
 
-This simulates Wave exports and triggers WhatsApp after each payment.
+This simulates Wave exports and queues a WhatsApp message for each payment;
+the low_priority RQ workers send them after the command returns.
+
+CSV files are parsed by --workers processes (XLS/XLSX files are streamed
+in-process) and imported in chunks of --chunk-size rows. Each chunk commits together with an ImportCheckpoint, so
+an interrupted import continues after its last committed row with --resume
+instead of starting over and duplicating payments. The rows before it are
+still parsed, but not imported again.
+
+Imported files and rows are recorded in the statement manifest: a file
+imported before (under any name) is not read again, and rows already
+imported from other statements are skipped before ingestion.
+
+Usage:
+    python manage.py import_manual_payments --master-email ops@example.com --csv wave.csv
+    python manage.py import_manual_payments --master-email ops@example.com --csv wave.csv --resume
+    python manage.py import_manual_payments --master-email ops@example.com --file history.xlsx
 """
 
-import csv
-from datetime import datetime
+import os
 from decimal import Decimal
+from itertools import islice
 from typing import Iterable
 
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
 
 from apps.masters.models import Master
-from apps.collections.services import ManualPaymentRow, PaymentIngestionService
+from apps.collections.fingerprints import SeenPayments, file_hash
+from apps.collections.models import ImportCheckpoint, StatementManifest
+from apps.collections.parsing import ManualImportError, StatementParser
+from apps.collections.services import INGEST_CHUNK_SIZE, ManualPaymentRow, PaymentIngestionService
 
 
 class Command(BaseCommand):
-    help = "Import manual payments from CSV or generate demo data for WhatsApp activation."
+    help = "Import manual payments from a CSV/Excel statement or generate demo data for WhatsApp activation."
 
     def add_arguments(self, parser):
         parser.add_argument("--master-email", required=True, help="Master email to ingest payments for.")
-        parser.add_argument("--csv", dest="csv_path", help="Path to CSV file with manual payments.")
+        parser.add_argument("--csv", "--file", dest="csv_path", help="Path to a CSV, XLS or XLSX file with manual payments.")
         parser.add_argument("--demo", choices=["taxi", "merchant"], help="Generate demo payments.")
         parser.add_argument("--count", type=int, default=10, help="Number of demo payments to generate.")
         parser.add_argument("--phone", help="Force all demo payments to a single phone number.")
@@ -29,67 +50,225 @@ class Command(BaseCommand):
         parser.add_argument("--template-language", default="fr", help="Template language code (e.g. fr, en_US).")
         parser.add_argument("--message", help="Custom WhatsApp message content (non-template).")
         parser.add_argument("--dry-run", action="store_true", help="Parse and validate only, no writes.")
+        parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE, help="Rows committed per transaction.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "STATEMENT_PARSE_WORKERS", 0),
+            help="Processes parsing the CSV (0 = one per CPU, 1 = in-process).",
+        )
+        restart = parser.add_mutually_exclusive_group()
+        restart.add_argument("--resume", action="store_true", help="Continue an interrupted CSV import after its last committed row.")
+        restart.add_argument("--restart", action="store_true", help="Ignore the checkpoint and import the CSV from the first row.")
 
     def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        if options["workers"] < 0:
+            raise CommandError("--workers cannot be negative.")
+
         master = self._get_master(options["master_email"])
         service = PaymentIngestionService(master)
 
-        rows = []
+        checkpoint = None
+        statement = None
         if options.get("csv_path"):
-            rows = list(self._read_csv(options["csv_path"]))
+            if options["dry_run"]:
+                rows = self._read_statement(
+                    options["csv_path"], options["workers"], country_code=master.default_country_code
+                )
+            else:
+                checkpoint = self._get_checkpoint(master, options)
+                statement = self._get_statement(master, options)
+                if options["restart"]:
+                    self._reset_statement(statement)
+                elif statement.completed_at:
+                    self.stdout.write(self.style.WARNING(
+                        f"This file was already imported as {statement.file_name} on "
+                        f"{statement.completed_at:%Y-%m-%d %H:%M}; nothing to do."
+                    ))
+                    return
+                rows = self._read_statement(
+                    options["csv_path"],
+                    options["workers"],
+                    skip=checkpoint.rows_committed,
+                    country_code=master.default_country_code,
+                )
         elif options.get("demo"):
-            rows = list(self._generate_demo_rows(options["demo"], options["count"], options.get("phone")))
+            if options["resume"] or options["restart"]:
+                raise CommandError("--resume and --restart only apply to --csv/--file imports.")
+            rows = self._generate_demo_rows(options["demo"], options["count"], options.get("phone"))
         else:
-            raise CommandError("Provide --csv or --demo.")
-
-        if not rows:
-            self.stdout.write(self.style.WARNING("No rows to ingest."))
-            return
+            raise CommandError("Provide --csv/--file or --demo.")
 
         if options["dry_run"]:
-            self.stdout.write(self.style.SUCCESS(f"Validated {len(rows)} rows (dry run)."))
+            validated = sum(1 for _ in rows)
+            self.stdout.write(self.style.SUCCESS(f"Validated {validated} rows (dry run)."))
             return
 
-        results = service.ingest_many(
-            rows=rows,
-            message=options.get("message"),
-            template_name=options.get("template_name"),
-            template_language=options.get("template_language"),
-        )
+        skipped = checkpoint.rows_committed if checkpoint else 0
+        if skipped:
+            self.stdout.write(f"Resuming after row {skipped}.")
+
+        seen = SeenPayments(master) if statement else None
+        try:
+            imported, duplicates, queued, samples = self._ingest(service, rows, checkpoint, seen, statement, options)
+        except CommandError as exc:
+            if checkpoint and checkpoint.rows_committed:
+                raise CommandError(
+                    f"{exc}. The first {checkpoint.rows_committed} rows are imported; "
+                    "fix the file and run again with --resume."
+                ) from exc
+            raise
+        if checkpoint:
+            checkpoint.completed_at = timezone.now()
+            checkpoint.save(update_fields=["completed_at", "updated_at"])
+        if statement:
+            statement.payments = checkpoint.rows_committed
+            statement.duplicate_payments = duplicates
+            statement.completed_at = timezone.now()
+            statement.save(update_fields=["payments", "duplicate_payments", "completed_at", "updated_at"])
 
-        self.stdout.write(self.style.SUCCESS(f"Ingested {len(results)} payments."))
-        for res in results[:5]:
+        if duplicates:
+            self.stdout.write(f"Skipped {duplicates} payments already imported from earlier statements.")
+        if not imported:
+            self.stdout.write(self.style.WARNING("No rows to ingest."))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"Ingested {imported} payments."))
+        if queued:
+            self.stdout.write(f"Queued {queued} WhatsApp messages on low_priority.")
+        for res in samples:
             self.stdout.write(
                 f"  Collection: {res['collection_id']} | Agent: {res['agent_id']} | "
                 f"WhatsApp: {res['whatsapp_status']}"
             )
 
-        if len(results) > 5:
+        if imported > len(samples):
             self.stdout.write("  ...")
 
+    def _ingest(self, service, rows, checkpoint, seen, statement, options):
+        """
+        Ingest rows chunk by chunk, keeping only counters and a few samples
+        so memory stays flat whatever the file size. With a manifest, rows
+        imported before are dropped and counted as duplicates.
+        """
+        chunk_size = options["chunk_size"]
+        imported = 0
+        duplicates = 0
+        queued = 0
+        samples = []
+        read = checkpoint.rows_committed if checkpoint else 0
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            first, read = read + 1, read + len(chunk)
+            new_rows = chunk
+            if seen:
+                new_rows, fingerprints = seen.split(chunk)
+                duplicates += len(chunk) - len(new_rows)
+
+            # The chunk, its fingerprints and its checkpoint commit together;
+            # WhatsApp sends are queued only once they have.
+            with transaction.atomic():
+                results = []
+                if new_rows:
+                    try:
+                        results = service.ingest_many(
+                            rows=new_rows,
+                            message=options.get("message"),
+                            template_name=options.get("template_name"),
+                            template_language=options.get("template_language"),
+                            chunk_size=chunk_size,
+                        )
+                    except ManualImportError as exc:
+                        raise CommandError(f"Payments {first}-{read}: {exc}") from exc
+                    if seen:
+                        seen.record(new_rows, fingerprints, statement)
+                if checkpoint:
+                    checkpoint.rows_committed += len(chunk)
+                    checkpoint.save(update_fields=["rows_committed", "updated_at"])
+
+            imported += len(results)
+            queued += sum(1 for res in results if res["whatsapp_status"] == "pending")
+            samples.extend(results[:5 - len(samples)])
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {imported} rows committed")
+
+        return imported, duplicates, queued, samples
+
+    def _get_checkpoint(self, master: Master, options) -> ImportCheckpoint:
+        """
+        Return the checkpoint of a CSV import, refusing to re-import a file
+        unless --resume or --restart says what to do with earlier progress.
+        """
+        source = os.path.abspath(options["csv_path"])
+        checkpoint, created = ImportCheckpoint.objects.get_or_create(master=master, source=source)
+        if created:
+            return checkpoint
+
+        if options["restart"]:
+            checkpoint.rows_committed = 0
+            checkpoint.completed_at = None
+            checkpoint.save(update_fields=["rows_committed", "completed_at", "updated_at"])
+        elif checkpoint.completed_at:
+            raise CommandError(
+                f"{source} was already imported on {checkpoint.completed_at:%Y-%m-%d %H:%M}. "
+                "Use --restart to import it again."
+            )
+        elif checkpoint.rows_committed and not options["resume"]:
+            raise CommandError(
+                f"An import of {source} stopped after row {checkpoint.rows_committed}. "
+                "Use --resume to continue it or --restart to start over."
+            )
+        return checkpoint
+
+    def _get_statement(self, master: Master, options) -> StatementManifest:
+        """Return the manifest entry of the file, keyed on its content hash."""
+        path = options["csv_path"]
+        try:
+            content_hash = file_hash(path)
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}") from exc
+        statement, _ = StatementManifest.objects.get_or_create(
+            master=master,
+            file_hash=content_hash,
+            defaults={"file_name": os.path.basename(path)[:255]},
+        )
+        return statement
+
+    def _reset_statement(self, statement: StatementManifest) -> None:
+        """
+        Forget the rows imported from a file, so --restart reads them again.
+
+        Rows the file shares with other statements stay recorded under
+        those and are still skipped.
+        """
+        with transaction.atomic():
+            statement.fingerprints.all().delete()
+            statement.payments = 0
+            statement.duplicate_payments = 0
+            statement.completed_at = None
+            statement.save(update_fields=["payments", "duplicate_payments", "completed_at", "updated_at"])
+
     def _get_master(self, email: str) -> Master:
         try:
             return Master.objects.get(email=email)
         except Master.DoesNotExist as exc:
             raise CommandError(f"Master not found: {email}") from exc
 
-    def _read_csv(self, path: str) -> Iterable[ManualPaymentRow]:
-        with open(path, newline="", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
-            required = {"customer_name", "phone_number", "amount", "payment_date", "reference"}
-            if not required.issubset(reader.fieldnames or set()):
-                raise CommandError(
-                    "CSV must contain: customer_name, phone_number, amount, payment_date, reference"
-                )
-
-            for row in reader:
-                yield ManualPaymentRow(
-                    customer_name=row["customer_name"].strip(),
-                    phone_number=row["phone_number"].strip(),
-                    amount=Decimal(row["amount"]),
-                    payment_date=self._parse_date(row["payment_date"]),
-                    reference=row["reference"].strip(),
-                )
+    def _read_statement(
+        self, path: str, workers: int, skip: int = 0, country_code: str = ""
+    ) -> Iterable[ManualPaymentRow]:
+        try:
+            # Rows before the checkpoint are parsed but not yielded
+            yield from StatementParser(workers=workers, country_code=country_code).parse(path, skip=skip)
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}") from exc
+        except ManualImportError as exc:
+            raise CommandError(str(exc)) from exc
 
     def _generate_demo_rows(self, scenario: str, count: int, phone_override: str | None) -> Iterable[ManualPaymentRow]:
         now = timezone.now()
@@ -112,16 +291,3 @@ class Command(BaseCommand):
                 payment_date=now,
                 reference=reference,
             )
-
-    @staticmethod
-    def _parse_date(value: str) -> datetime:
-        value = value.strip()
-        try:
-            return datetime.fromisoformat(value)
-        except ValueError:
-            try:
-                return datetime.strptime(value, "%Y-%m-%d")
-            except ValueError as exc:
-                raise CommandError(f"Invalid payment_date: {value}") from exc
-
-
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('masters', '0001_initial'),
+        ('collections', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('source', models.CharField(help_text='Absolute path of the imported file', max_length=500)),
+                ('rows_committed', models.PositiveIntegerField(default=0, help_text='Data rows imported so far')),
+                ('completed_at', models.DateTimeField(blank=True, help_text='When the whole file was imported', null=True)),
+                ('master', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_checkpoints', to='masters.master')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'unique_together': {('master', 'source')},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:10
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_references(apps, schema_editor):
+    """
+    Blank references become NULL, and collections sharing a reference with
+    an older collection of the same master get a -dupN suffix so the
+    constraint can be created without deleting anything.
+    """
+    Collection = apps.get_model('collections', 'Collection')
+    Collection.objects.filter(transaction_reference='').update(transaction_reference=None)
+
+    duplicates = (
+        Collection.objects.exclude(transaction_reference=None)
+        .values('master_id', 'transaction_reference')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        collections = Collection.objects.filter(
+            master_id=duplicate['master_id'],
+            transaction_reference=duplicate['transaction_reference'],
+        ).order_by('created_at')
+        for index, collection in enumerate(collections[1:], start=1):
+            collection.transaction_reference = f"{collection.transaction_reference}-dup{index}"
+            collection.save(update_fields=['transaction_reference'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0002_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_references, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='collection',
+            constraint=models.UniqueConstraint(fields=('master', 'transaction_reference'), name='unique_collection_reference_per_master'),
+        ),
+    ]
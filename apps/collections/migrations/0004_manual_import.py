@@ -0,0 +1,43 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('masters', '0001_initial'),
+        ('collections', '0003_unique_collection_reference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ManualImport',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('staged', 'Staged'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='staged', max_length=20)),
+                ('file_name', models.CharField(help_text='Name of the uploaded file', max_length=255)),
+                ('headers', models.JSONField(default=list, help_text='Column names of the file')),
+                ('mapping', models.JSONField(default=dict, help_text='Payment field -> column name')),
+                ('message', models.TextField(blank=True, help_text='Custom WhatsApp message', null=True)),
+                ('template_name', models.CharField(blank=True, help_text='WhatsApp template name or alias', max_length=255, null=True)),
+                ('template_language', models.CharField(default='fr', max_length=10)),
+                ('total_rows', models.PositiveIntegerField(default=0, help_text='Data rows in the file')),
+                ('processed_rows', models.PositiveIntegerField(default=0, help_text='Rows imported so far')),
+                ('agents', models.PositiveIntegerField(default=0, help_text='Distinct customers in the imported rows')),
+                ('queued_messages', models.PositiveIntegerField(default=0, help_text='WhatsApp messages queued')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True, help_text='Error message if the import failed', null=True)),
+                ('master', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='manual_imports', to='masters.master')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['master', 'status'], name='collections_master__c82f0a_idx')],
+            },
+        ),
+    ]
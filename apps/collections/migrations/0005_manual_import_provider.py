@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0004_manual_import'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manualimport',
+            name='provider',
+            field=models.CharField(blank=True, default='', help_text='Statement format detected from the headers', max_length=50),
+        ),
+    ]
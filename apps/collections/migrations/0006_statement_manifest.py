@@ -0,0 +1,58 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('masters', '0001_initial'),
+        ('collections', '0005_manual_import_provider'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manualimport',
+            name='duplicate_rows',
+            field=models.PositiveIntegerField(default=0, help_text='Rows skipped as already imported'),
+        ),
+        migrations.AddField(
+            model_name='manualimport',
+            name='file_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 of the uploaded file', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='StatementManifest',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('file_hash', models.CharField(help_text='SHA-256 of the file', max_length=64)),
+                ('file_name', models.CharField(help_text='Name of the file when first imported', max_length=255)),
+                ('payments', models.PositiveIntegerField(default=0, help_text='Payments read from the file')),
+                ('duplicate_payments', models.PositiveIntegerField(default=0, help_text='Payments already imported from other files')),
+                ('completed_at', models.DateTimeField(blank=True, help_text='When the whole file was imported', null=True)),
+                ('master', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statement_manifests', to='masters.master')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'unique_together': {('master', 'file_hash')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PaymentFingerprint',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('fingerprint', models.CharField(help_text='BLAKE2b-128 of reference, amount and date', max_length=32)),
+                ('master', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_fingerprints', to='masters.master')),
+                ('statement', models.ForeignKey(blank=True, help_text='Statement the row was first imported from', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fingerprints', to='collections.statementmanifest')),
+            ],
+            options={
+                'unique_together': {('master', 'fingerprint')},
+            },
+        ),
+    ]
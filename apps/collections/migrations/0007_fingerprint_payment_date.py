@@ -0,0 +1,22 @@
+# Generated by Django 4.2.16 on 2026-10-17 05:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0006_statement_manifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentfingerprint',
+            name='payment_date',
+            field=models.DateField(blank=True, help_text='Payment date of the row, empty if the statement left it blank', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='paymentfingerprint',
+            index=models.Index(fields=['master', 'payment_date'], name='collections_master__51cecb_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-17 05:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0007_fingerprint_payment_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manualimport',
+            name='has_staged_file',
+            field=models.BooleanField(default=True, help_text='Whether the uploaded file is still on disk'),
+        ),
+        migrations.AlterField(
+            model_name='manualimport',
+            name='total_rows',
+            field=models.PositiveIntegerField(default=0, help_text='Data rows in the file, counted by the import job'),
+        ),
+    ]
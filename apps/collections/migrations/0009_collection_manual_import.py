@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-17 05:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0008_manual_import_has_staged_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='manual_import',
+            field=models.ForeignKey(blank=True, help_text='Admin upload that last imported this collection', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='collections', to='collections.manualimport'),
+        ),
+    ]
@@ -64,6 +64,14 @@ class Collection(BaseModel):
         null=True,
         help_text='Last time a reminder was sent for this collection'
     )
+    manual_import = models.ForeignKey(
+        'ManualImport',
+        on_delete=models.SET_NULL,
+        related_name='collections',
+        blank=True,
+        null=True,
+        help_text='Admin upload that last imported this collection'
+    )
 
     objects = CollectionManager()
 
@@ -75,6 +83,13 @@ class Collection(BaseModel):
             models.Index(fields=['status', 'due_date']),
             models.Index(fields=['transaction_reference']),
         ]
+        constraints = [
+            # NULLs are distinct, so only reference-bearing collections are constrained
+            models.UniqueConstraint(
+                fields=['master', 'transaction_reference'],
+                name='unique_collection_reference_per_master',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.agent.name} - {self.amount} FCFA - {self.get_status_display()}"
@@ -127,3 +142,135 @@ class Collection(BaseModel):
         from django.utils import timezone
         return self.status == 'pending' and self.due_date < timezone.now()
 
+
+class ImportCheckpoint(BaseModel):
+    """
+    ImportCheckpoint model - progress of a streaming manual payment import.
+
+    Updated in the same transaction as each imported chunk, so after a crash
+    rows_committed is exactly the number of rows whose payments exist and
+    the import can resume from there without creating duplicates.
+    """
+    master = models.ForeignKey(Master, on_delete=models.CASCADE, related_name='import_checkpoints')
+    source = models.CharField(max_length=500, help_text='Absolute path of the imported file')
+    rows_committed = models.PositiveIntegerField(default=0, help_text='Data rows imported so far')
+    completed_at = models.DateTimeField(blank=True, null=True, help_text='When the whole file was imported')
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = [['master', 'source']]
+
+    def __str__(self):
+        return f"{self.source} - {self.rows_committed} rows"
+
+
+class ManualImport(BaseModel):
+    """
+    ManualImport model - a payment file uploaded through the admin UI.
+
+    The upload is streamed to a staging file named after the import id;
+    previews read only its first rows and a background job imports it,
+    updating the counters below as each chunk commits.
+    """
+
+    STATUS_CHOICES = [
+        ('staged', 'Staged'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    master = models.ForeignKey(Master, on_delete=models.CASCADE, related_name='manual_imports')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='staged')
+    file_name = models.CharField(max_length=255, help_text='Name of the uploaded file')
+    headers = models.JSONField(default=list, help_text='Column names of the file')
+    provider = models.CharField(max_length=50, blank=True, default='', help_text='Statement format detected from the headers')
+    file_hash = models.CharField(max_length=64, blank=True, default='', help_text='SHA-256 of the uploaded file')
+    has_staged_file = models.BooleanField(default=True, help_text='Whether the uploaded file is still on disk')
+    mapping = models.JSONField(default=dict, help_text='Payment field -> column name')
+    message = models.TextField(blank=True, null=True, help_text='Custom WhatsApp message')
+    template_name = models.CharField(max_length=255, blank=True, null=True, help_text='WhatsApp template name or alias')
+    template_language = models.CharField(max_length=10, default='fr')
+    total_rows = models.PositiveIntegerField(default=0, help_text='Data rows in the file, counted by the import job')
+    processed_rows = models.PositiveIntegerField(default=0, help_text='Rows imported so far')
+    duplicate_rows = models.PositiveIntegerField(default=0, help_text='Rows skipped as already imported')
+    agents = models.PositiveIntegerField(default=0, help_text='Distinct customers in the imported rows')
+    queued_messages = models.PositiveIntegerField(default=0, help_text='WhatsApp messages queued')
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    error_message = models.TextField(blank=True, null=True, help_text='Error message if the import failed')
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['master', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name} - {self.get_status_display()}"
+
+    @property
+    def progress_percent(self):
+        # Statements may hold rows that are not payments, so processed_rows
+        # can stop short of total_rows
+        if self.status == 'completed':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(100, self.processed_rows * 100 // self.total_rows)
+
+
+class StatementManifest(BaseModel):
+    """
+    StatementManifest model - a statement file imported for a master.
+
+    Keyed on the SHA-256 of the file content, so a re-upload of the same
+    export under any name is recognised before a single row is parsed.
+    """
+    master = models.ForeignKey(Master, on_delete=models.CASCADE, related_name='statement_manifests')
+    file_hash = models.CharField(max_length=64, help_text='SHA-256 of the file')
+    file_name = models.CharField(max_length=255, help_text='Name of the file when first imported')
+    payments = models.PositiveIntegerField(default=0, help_text='Payments read from the file')
+    duplicate_payments = models.PositiveIntegerField(default=0, help_text='Payments already imported from other files')
+    completed_at = models.DateTimeField(blank=True, null=True, help_text='When the whole file was imported')
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = [['master', 'file_hash']]
+
+    def __str__(self):
+        return f"{self.file_name} - {self.file_hash[:12]}"
+
+
+class PaymentFingerprint(BaseModel):
+    """
+    PaymentFingerprint model - hash of an imported statement row.
+
+    The fingerprint covers the reference, amount and payment date, so a
+    row seen in an earlier statement is dropped before it reaches the
+    ingestion queries.
+    """
+    master = models.ForeignKey(Master, on_delete=models.CASCADE, related_name='payment_fingerprints')
+    statement = models.ForeignKey(
+        StatementManifest,
+        on_delete=models.CASCADE,
+        related_name='fingerprints',
+        blank=True,
+        null=True,
+        help_text='Statement the row was first imported from',
+    )
+    fingerprint = models.CharField(max_length=32, help_text='BLAKE2b-128 of reference, amount and date')
+    payment_date = models.DateField(
+        blank=True,
+        null=True,
+        help_text='Payment date of the row, empty if the statement left it blank'
+    )
+
+    class Meta:
+        unique_together = [['master', 'fingerprint']]
+        indexes = [
+            models.Index(fields=['master', 'payment_date']),
+        ]
+
+    def __str__(self):
+        return self.fingerprint
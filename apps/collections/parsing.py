@@ -0,0 +1,513 @@
+"""
+Parallel parsing of payment statement files.
+
+A CSV statement is split into byte ranges that start on a line boundary
+and each range is parsed in a worker process. Workers convert column by
+column, so repeated amounts, dates and phone numbers (most of a real
+statement) are parsed once per range, and hand back typed
+ManualPaymentRow batches in file order.
+
+Excel statements (XLS and XLSX, the providers' native exports) are read
+row by row in-process and go through the same column conversion. Column
+positions come from the header row, through the provider registry in
+apps.collections.providers unless a mapping is given.
+
+This module must not import Django models: with the spawn start method
+the worker processes import it without Django being set up.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from apps.collections.providers import StatementProvider, detect_provider, normalize_header
+from apps.core.phones import clean_phone, normalize_e164
+
+
+# Bytes of the file parsed per worker task (roughly 50k Wave rows)
+PARSE_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Excel rows converted per batch
+EXCEL_BATCH_ROWS = 5000
+
+# Leading bytes of the Excel containers; anything else is read as CSV
+XLSX_SIGNATURE = b"PK\x03\x04"
+XLS_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+PAYMENT_FIELDS = ("customer_name", "phone_number", "amount", "payment_date", "reference")
+
+# Tried after the provider's own formats, then ISO 8601
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+
+
+@dataclass
+class ManualPaymentRow:
+    customer_name: str
+    phone_number: str
+    amount: Decimal
+    payment_date: datetime
+    reference: str
+    # Text of a blank or unreadable date cell replaced by the default date
+    raw_date: Optional[str] = None
+
+
+class ManualImportError(Exception):
+    """Raised when a statement cannot be read or one of its rows is invalid."""
+
+
+def statement_format(path: str) -> str:
+    """Return "xlsx", "xls" or "csv" from the leading bytes of a statement."""
+    with open(path, "rb") as handle:
+        head = handle.read(len(XLS_SIGNATURE))
+    if head.startswith(XLSX_SIGNATURE):
+        return "xlsx"
+    if head == XLS_SIGNATURE:
+        return "xls"
+    return "csv"
+
+
+@contextmanager
+def open_statement(path: str):
+    """
+    Open a CSV, XLS or XLSX statement.
+
+    Yields:
+        tuple: The header names, and an iterator over the data records as
+        lists of cell values. Blank records are skipped. Excel cells keep
+        their type (numbers, datetimes); CSV cells are strings.
+
+    Raises:
+        ManualImportError: If the file cannot be read as a statement
+    """
+    readers = {"csv": _read_csv, "xls": _read_xls, "xlsx": _read_xlsx}
+    with readers[statement_format(path)](path) as records:
+        headers = next(records, None)
+        if headers is None:
+            raise ManualImportError("The statement is empty.")
+        yield [_text(header) for header in headers], records
+
+
+@dataclass(frozen=True)
+class StatementLayout:
+    """Where a parser finds the payment fields of a statement; sent to the workers."""
+
+    columns: tuple
+    date_formats: tuple = DATE_FORMATS
+    status_column: Optional[int] = None
+    accepted_statuses: frozenset = frozenset()
+    incoming_only: bool = False
+    default_date: Optional[datetime] = None
+    country_code: str = ""
+
+
+class StatementParser:
+    """
+    Parses a statement into ManualPaymentRow objects.
+
+    Columns are located once from the header row, using the explicit
+    mapping or else the provider detected from the headers, and rows are
+    read by position; other columns are never touched.
+
+    CSV files larger than one chunk are parsed by a process pool; at most
+    two chunks per worker are parsed ahead of the consumer, so memory stays
+    bounded when ingestion is slower than parsing. Rows come back in file
+    order, which keeps row counts usable as resume checkpoints.
+
+    Byte ranges are cut on line breaks, so quoted values must not contain
+    newlines (payment exports never do).
+    """
+
+    def __init__(
+        self,
+        mapping: Optional[dict] = None,
+        workers: Optional[int] = None,
+        chunk_bytes: int = PARSE_CHUNK_BYTES,
+        default_date: Optional[datetime] = None,
+        provider: Optional[StatementProvider] = None,
+        country_code: str = "",
+    ):
+        """
+        Args:
+            mapping: Payment field -> column name; defaults to the provider's columns
+            workers: Worker processes; 0 or None uses every CPU, 1 parses in-process
+            chunk_bytes: Bytes parsed per worker task
+            default_date: Date used for blank or unparseable dates; when not
+                set such rows are rejected
+            provider: Statement format; detected from the headers when not set
+            country_code: Calling code the importing master gives numbers
+                without one; rows whose number cannot be normalised with it
+                are rejected
+        """
+        self.mapping = mapping
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+        self.default_date = default_date
+        self.provider = provider
+        self.country_code = country_code
+
+    def parse(self, path: str, skip: int = 0) -> Iterator[ManualPaymentRow]:
+        """
+        Yield the payment rows of a statement after the first `skip` ones.
+
+        Rows the provider does not count as payments (failed transactions,
+        withdrawals) are left out and do not count towards `skip`.
+
+        Raises:
+            ManualImportError: On a missing column or an invalid row, after
+                the rows before it have been yielded
+        """
+        if statement_format(path) != "csv":
+            yield from self._parse_excel(path, skip)
+            return
+
+        layout, ranges = self._plan(path)
+        jobs = [(path, start, end, layout) for start, end in ranges]
+
+        if self.workers == 1 or len(jobs) == 1:
+            batches = map(_parse_range, jobs)
+            yield from self._rows(batches, skip)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            yield from self._rows(self._map_ahead(executor, jobs), skip)
+
+    def _parse_excel(self, path: str, skip: int) -> Iterator[ManualPaymentRow]:
+        """
+        Yield the rows of an Excel statement, converting EXCEL_BATCH_ROWS at a time.
+
+        XLSX sheets are streamed from the archive, so memory does not grow
+        with the sheet. XLS workbooks are loaded whole by xlrd, which the
+        format bounds to 65,536 rows per sheet.
+        """
+        with open_statement(path) as (headers, records):
+            layout = self.layout(headers)
+            batches = iter(
+                lambda: _convert(list(islice(records, EXCEL_BATCH_ROWS)), layout),
+                ([], 0, None),
+            )
+            yield from self._rows(batches, skip)
+
+    def layout(self, headers: list[str]) -> StatementLayout:
+        """
+        Locate the payment fields in a header row.
+
+        Raises:
+            ManualImportError: If a field has no column, or the detected
+                format cannot be imported
+        """
+        provider = self.provider or detect_provider(headers)
+        if provider and provider.unsupported:
+            raise ManualImportError(provider.unsupported)
+
+        mapping = self.mapping
+        if mapping is None:
+            if provider is None:
+                mapping = {field: field for field in PAYMENT_FIELDS}
+            else:
+                mapping = {field: provider.resolve(headers, field) for field in PAYMENT_FIELDS}
+
+        missing = [field for field in PAYMENT_FIELDS if mapping.get(field) not in headers]
+        if missing:
+            raise ManualImportError("Missing columns: " + ", ".join(missing))
+
+        layout = StatementLayout(
+            columns=tuple(headers.index(mapping[field]) for field in PAYMENT_FIELDS),
+            default_date=self.default_date,
+            country_code=self.country_code,
+        )
+        if provider is None:
+            return layout
+
+        status_header = provider.resolve(headers, "status")
+        return replace(
+            layout,
+            date_formats=provider.date_formats + DATE_FORMATS,
+            status_column=headers.index(status_header) if status_header else None,
+            accepted_statuses=frozenset(normalize_header(status) for status in provider.accepted_statuses),
+            incoming_only=provider.incoming_only,
+        )
+
+    def _plan(self, path: str) -> tuple[StatementLayout, list[tuple[int, int]]]:
+        """Return the statement's layout and the byte ranges to parse."""
+        with open(path, "rb") as handle:
+            header = handle.readline()
+            layout = self.layout(next(csv.reader([header.decode("utf-8-sig")]), []))
+
+            ranges = []
+            start = handle.tell()
+            size = os.fstat(handle.fileno()).st_size
+            while start < size:
+                handle.seek(min(start + self.chunk_bytes, size))
+                handle.readline()
+                end = min(handle.tell(), size)
+                ranges.append((start, end))
+                start = end
+        return layout, ranges
+
+    def _map_ahead(self, executor: ProcessPoolExecutor, jobs: list) -> Iterator[tuple]:
+        pending = deque()
+        jobs = iter(jobs)
+        for job in jobs:
+            pending.append(executor.submit(_parse_range, job))
+            if len(pending) >= self.workers * 2:
+                break
+        while pending:
+            batch = pending.popleft().result()
+            for job in jobs:
+                pending.append(executor.submit(_parse_range, job))
+                break
+            yield batch
+
+    @staticmethod
+    def _rows(batches: Iterable[tuple], skip: int) -> Iterator[ManualPaymentRow]:
+        records_read = 0
+        rows_seen = 0
+        for rows, consumed, error in batches:
+            records_read += consumed
+            if rows_seen + len(rows) <= skip:
+                rows_seen += len(rows)
+            else:
+                offset = max(0, skip - rows_seen)
+                rows_seen += len(rows)
+                for row in rows[offset:]:
+                    yield ManualPaymentRow(*row)
+            if error:
+                raise ManualImportError(f"Row {records_read + 1}: {error}")
+
+
+def _parse_range(job: tuple) -> tuple[list[tuple], int, Optional[str]]:
+    """
+    Parse one byte range of a statement in a worker process.
+
+    Returns:
+        tuple: See _convert()
+    """
+    path, start, end, layout = job
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        data = handle.read(end - start)
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        return [], 0, f"File is not UTF-8 encoded: {exc}"
+
+    records = [record for record in csv.reader(io.StringIO(text, newline="")) if record]
+    return _convert(records, layout)
+
+
+def _convert(records: list[list], layout: StatementLayout) -> tuple[list[tuple], int, Optional[str]]:
+    """
+    Convert records to ManualPaymentRow field tuples.
+
+    Returns:
+        tuple: The payment rows before the first invalid record, the number
+        of records before it (all of them if none is invalid), and its
+        error message or None
+    """
+    total = len(records)
+    positions = list(range(total))
+    if layout.status_column is not None:
+        column = layout.status_column
+        positions = [
+            position for position in positions
+            if len(records[position]) > column
+            and normalize_header(records[position][column]) in layout.accepted_statuses
+        ]
+        records = [records[position] for position in positions]
+
+    try:
+        rows, consumed, error = _build_rows(records, layout), total, None
+    except _InvalidValue as exc:
+        rows, consumed, error = _build_rows(records[:exc.index], layout), positions[exc.index], exc.message
+
+    if layout.incoming_only:
+        rows = [row for row in rows if row[2] > 0]
+    return rows, consumed, error
+
+
+def _build_rows(records: list[list], layout: StatementLayout) -> list[tuple]:
+    columns = layout.columns
+    width = max(columns) + 1
+    for index, record in enumerate(records):
+        if len(record) < width:
+            raise _InvalidValue(index, f"Expected {width} columns, got {len(record)}")
+
+    names, phones, amounts, dates, references = (
+        [record[column] for record in records] for column in columns
+    )
+    parsed_dates = _parse_dates(dates, layout.date_formats, layout.default_date)
+    # _parse_date returns the default date object itself for the cells it replaces
+    raw_dates = (
+        _text(value) if layout.default_date is not None and date is layout.default_date else None
+        for value, date in zip(dates, parsed_dates)
+    )
+    return list(zip(
+        (_text(name) for name in names),
+        _clean_phones(phones, layout.country_code),
+        _parse_amounts(amounts),
+        parsed_dates,
+        (_text(reference) for reference in references),
+        raw_dates,
+    ))
+
+
+class _InvalidValue(Exception):
+    def __init__(self, index: int, message: str):
+        super().__init__(message)
+        self.index = index
+        self.message = message
+
+
+def _parse_amounts(values: list) -> list[Decimal]:
+    """Parse an amount column, converting each distinct value once."""
+    parsed = {}
+    amounts = []
+    for index, value in enumerate(values):
+        amount = parsed.get(value)
+        if amount is None:
+            raw = _text(value).replace(" ", "")
+            if raw.count(",") == 1 and raw.count(".") == 0:
+                raw = raw.replace(",", ".")
+            try:
+                amount = parsed[value] = Decimal(raw)
+            except InvalidOperation:
+                raise _InvalidValue(index, f"Invalid amount: {value}")
+            if not amount.is_finite():
+                raise _InvalidValue(index, f"Invalid amount: {value}")
+        amounts.append(amount)
+    return amounts
+
+
+def _parse_dates(values: list, formats: tuple, default_date: Optional[datetime]) -> list[datetime]:
+    """
+    Parse a date column, converting each distinct value once.
+
+    The format that parsed the previous value is tried first, so a column
+    with one format costs a single strptime per distinct value.
+    """
+    parsed = {}
+    dates = []
+    formats = list(formats)
+    for index, value in enumerate(values):
+        date = parsed.get(value)
+        if date is None:
+            if isinstance(value, datetime):
+                date = value
+            else:
+                date = parsed[value] = _parse_date(_text(value), formats, default_date)
+            if date is None:
+                raise _InvalidValue(index, f"Invalid payment_date: {value}")
+        dates.append(date)
+    return dates
+
+
+def _parse_date(raw: str, formats: list[str], default_date: Optional[datetime]) -> Optional[datetime]:
+    if not raw:
+        return default_date
+    for position, fmt in enumerate(formats):
+        try:
+            date = datetime.strptime(raw, fmt)
+        except ValueError:
+            continue
+        if position:
+            formats.insert(0, formats.pop(position))
+        return date
+    try:
+        return datetime.fromisoformat(raw)
+    except ValueError:
+        return default_date
+
+
+def _clean_phones(values: list, country_code: str = "") -> list[str]:
+    """
+    Strip a phone column's formatting, cleaning each distinct value once.
+
+    Country codes are added at ingestion, but numbers that would not
+    normalise there (blank, no digits, too long for E.164) are rejected
+    here, with their row.
+    """
+    parsed = {}
+    phones = []
+    for index, value in enumerate(values):
+        phone = parsed.get(value)
+        if phone is None:
+            phone = clean_phone(_text(value))
+            if not normalize_e164(phone, country_code):
+                raise _InvalidValue(index, f"Invalid phone_number: {value}")
+            parsed[value] = phone
+        phones.append(phone)
+    return phones
+
+
+def _text(value) -> str:
+    """Return a cell as stripped text; whole numbers (Excel phone numbers) lose their ".0"."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+@contextmanager
+def _read_csv(path: str):
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        yield (record for record in csv.reader(handle) if record)
+
+
+@contextmanager
+def _read_xlsx(path: str):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ManualImportError("Reading .xlsx statements requires openpyxl.") from exc
+
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ManualImportError(f"Failed to open the Excel file: {exc}") from exc
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        yield (list(row) for row in rows if any(cell not in (None, "") for cell in row))
+    finally:
+        workbook.close()
+
+
+@contextmanager
+def _read_xls(path: str):
+    try:
+        import xlrd
+    except ImportError as exc:
+        raise ManualImportError("Reading .xls statements requires xlrd.") from exc
+
+    try:
+        workbook = xlrd.open_workbook(path, on_demand=True)
+    except xlrd.XLRDError as exc:
+        raise ManualImportError(f"Failed to open the Excel file: {exc}") from exc
+    try:
+        sheet = workbook.sheet_by_index(0)
+
+        def records():
+            for index in range(sheet.nrows):
+                record = []
+                for cell in sheet.row(index):
+                    if cell.ctype == xlrd.XL_CELL_DATE:
+                        record.append(xlrd.xldate.xldate_as_datetime(cell.value, workbook.datemode))
+                    else:
+                        record.append(cell.value)
+                if any(value not in (None, "") for value in record):
+                    # Rows stop at their last non-empty cell in XLS files
+                    yield record + [""] * (sheet.ncols - len(record))
+
+        yield records()
+    finally:
+        workbook.release_resources()
@@ -0,0 +1,177 @@
+"""
+Registry of mobile money statement formats.
+
+Each provider describes where the payment fields sit in its exports, by
+header name, plus how to read its dates and which rows are payments. A
+statement is matched to a provider from its header row, so operators no
+longer map columns by hand for known exports.
+
+Header names are compared after normalisation (case, accents and
+spacing are ignored). Register additional formats with register_provider().
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class StatementProvider:
+    """
+    A statement format.
+
+    Attributes:
+        name: Registry key, stored on ManualImport
+        label: Name shown to operators
+        columns: Payment field -> accepted header names
+        signature: Extra headers that must be present to match
+        date_formats: strptime formats tried before the defaults
+        status_column: Accepted header names of a transaction status column
+        accepted_statuses: Status values of settled payments
+        incoming_only: Skip rows whose amount is not positive (withdrawals, fees)
+        unsupported: Reason the format matches but cannot be imported
+    """
+
+    name: str
+    label: str
+    columns: dict
+    signature: tuple = ()
+    date_formats: tuple = ()
+    status_column: tuple = ()
+    accepted_statuses: tuple = ()
+    incoming_only: bool = False
+    unsupported: str = ""
+
+    def matches(self, headers: list[str]) -> bool:
+        available = {normalize_header(header) for header in headers}
+        names = [*self.signature, *([self.status_column] if self.status_column else [])]
+        names.extend(aliases for aliases in self.columns.values())
+        return all(
+            any(normalize_header(alias) in available for alias in _as_tuple(aliases))
+            for aliases in names
+        )
+
+    def resolve(self, headers: list[str], field: str) -> Optional[str]:
+        """Return the header of a payment field (or "status") in this statement."""
+        aliases = self.status_column if field == "status" else self.columns.get(field, ())
+        by_name = {normalize_header(header): header for header in headers}
+        for alias in aliases:
+            header = by_name.get(normalize_header(alias))
+            if header is not None:
+                return header
+        return None
+
+
+_PROVIDERS: dict[str, StatementProvider] = {}
+
+
+def register_provider(provider: StatementProvider) -> StatementProvider:
+    """Add a format to the registry; formats are detected in registration order."""
+    _PROVIDERS[provider.name] = provider
+    return provider
+
+
+def get_provider(name: Optional[str]) -> Optional[StatementProvider]:
+    return _PROVIDERS.get(name) if name else None
+
+
+def get_providers() -> list[StatementProvider]:
+    return list(_PROVIDERS.values())
+
+
+def detect_provider(headers: list[str]) -> Optional[StatementProvider]:
+    """Return the first registered format whose headers are all in the statement."""
+    for provider in _PROVIDERS.values():
+        if provider.matches(headers):
+            return provider
+    return None
+
+
+def normalize_header(header) -> str:
+    text = unicodedata.normalize("NFKD", str(header or ""))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.replace("_", " ").lower().split())
+
+
+def _as_tuple(aliases) -> tuple:
+    return (aliases,) if isinstance(aliases, str) else tuple(aliases)
+
+
+# Our own import template, also produced by the demo generators
+register_provider(StatementProvider(
+    name="sentreso",
+    label="Sentreso template",
+    columns={
+        "customer_name": ("customer_name",),
+        "phone_number": ("phone_number",),
+        "amount": ("amount",),
+        "payment_date": ("payment_date",),
+        "reference": ("reference",),
+    },
+))
+
+register_provider(StatementProvider(
+    name="wave",
+    label="Wave",
+    columns={
+        "customer_name": ("Nom de la contrepartie", "Counterparty name"),
+        "phone_number": ("Numéro de la contrepartie", "Counterparty mobile"),
+        "amount": ("Montant", "Amount"),
+        "payment_date": ("Horodatage", "Timestamp"),
+        "reference": ("Identifiant de transaction", "Transaction ID"),
+    },
+    incoming_only=True,
+))
+
+# Wave's balance history (like history_<from>_to_<to>.xls) lists
+# transactions without the counterparty, so payers cannot be identified.
+register_provider(StatementProvider(
+    name="wave_balance",
+    label="Wave balance history",
+    columns={
+        "amount": ("Montant", "Amount"),
+        "payment_date": ("Horodatage", "Timestamp"),
+        "reference": ("Identifiant de transaction", "Transaction ID"),
+    },
+    signature=(("Solde", "Balance"), ("Frais", "Fee")),
+    incoming_only=True,
+    unsupported=(
+        "Wave balance history has no customer name or phone number. "
+        "Export the Wave transactions report instead."
+    ),
+))
+
+register_provider(StatementProvider(
+    name="orange_money",
+    label="Orange Money",
+    columns={
+        "customer_name": ("Nom client", "Nom du client", "Customer name"),
+        "phone_number": ("Numéro client", "MSISDN", "Customer number"),
+        "amount": ("Montant", "Amount"),
+        "payment_date": ("Date de transaction", "Date transaction", "Transaction date"),
+        "reference": ("Référence", "ID transaction", "Transaction reference"),
+    },
+    date_formats=("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y"),
+    status_column=("Statut", "Status"),
+    accepted_statuses=("Succès", "Réussi", "Success", "Successful"),
+    incoming_only=True,
+))
+
+register_provider(StatementProvider(
+    name="mtn_momo",
+    label="MTN MoMo",
+    columns={
+        "customer_name": ("From Name",),
+        "phone_number": ("From",),
+        "amount": ("Amount",),
+        "payment_date": ("Date",),
+        "reference": ("Id", "Financial Transaction Id"),
+    },
+    signature=(("Currency",),),
+    date_formats=("%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M"),
+    status_column=("Status",),
+    accepted_statuses=("Successful", "Success"),
+    incoming_only=True,
+))
@@ -38,6 +38,18 @@ class CollectionSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Agent not found or does not belong to your account.")
         return value
 
+    def validate_transaction_reference(self, value):
+        """Validate that no other collection of the master uses this reference."""
+        if not value:
+            return None
+        master = self.context['request'].master
+        collections = Collection.objects.filter(master=master, transaction_reference=value)
+        if self.instance:
+            collections = collections.exclude(id=self.instance.id)
+        if collections.exists():
+            raise serializers.ValidationError("A collection with this transaction reference already exists.")
+        return value
+
     def create(self, validated_data):
         """Create a collection and set the master automatically."""
         agent_id = validated_data.pop('agent_id')
@@ -54,6 +66,16 @@ class CollectionMarkPaidSerializer(serializers.Serializer):
     payment_method = serializers.ChoiceField(choices=Collection.PAYMENT_METHOD_CHOICES, required=False)
     notes = serializers.CharField(required=False, allow_blank=True)
 
+    def validate_transaction_reference(self, value):
+        """Validate that no other collection of the master uses this reference."""
+        collection = self.context['collection']
+        if value and Collection.objects.filter(
+            master=collection.master,
+            transaction_reference=value,
+        ).exclude(id=collection.id).exists():
+            raise serializers.ValidationError("A collection with this transaction reference already exists.")
+        return value
+
 
 
 
@@ -2,35 +2,46 @@
 Manual payment ingestion service for demo flows.
 
 This service simulates Wave exports by creating paid Collections and
-immediately triggering WhatsApp messages. It keeps everything auditable
+queueing WhatsApp messages for them. It keeps everything auditable
 in the database while remaining manual and demo-friendly.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime
-from decimal import Decimal
+import csv
+import os
+from itertools import islice
 from typing import Iterable, Optional
 
+from django.db import transaction
 from django.utils import timezone
+from django_rq import get_queue
 
 from apps.agents.models import Agent
-from apps.collections.models import Collection
+from apps.collections.fingerprints import FileHasher, SeenPayments, file_hash
+from apps.collections.models import Collection, ManualImport, StatementManifest
+from apps.collections.parsing import (
+    ManualImportError,
+    ManualPaymentRow,
+    StatementParser,
+    open_statement,
+)
+from apps.collections.providers import detect_provider, get_provider
+from apps.collections.tasks import run_manual_import_task
+from apps.core.phones import normalize_e164
 from apps.masters.models import Master
 from apps.reconciliation.models import PaymentMatch
+from apps.reconciliation.services import ReconciliationService
 from apps.whatsapp.models import WhatsAppMessage, WhatsAppTemplate
 from apps.whatsapp.services import WhatsAppService
 from django.conf import settings
 
 
-@dataclass
-class ManualPaymentRow:
-    customer_name: str
-    phone_number: str
-    amount: Decimal
-    payment_date: datetime
-    reference: str
+# Rows written per transaction by ingest_many
+INGEST_CHUNK_SIZE = 1000
+
+# Notes of the collections and payment matches created by imports
+IMPORT_NOTES = "Manual Wave import (demo)."
 
 
 class PaymentIngestionService:
@@ -40,11 +51,18 @@ class PaymentIngestionService:
     Manual -> automated transition:
     - Manual source (CSV/seed) provides already-paid transactions.
     - We persist them as paid Collections for auditability.
-    - We trigger WhatsApp immediately (template or custom).
+    - We queue WhatsApp (template or custom) once they are committed; the
+      low_priority workers send it, so ingestion never waits on Meta.
+
+    Args:
+        master: Master instance
+        manual_import: Admin upload the rows come from; its collections are
+            linked to it, so a campaign can target them
     """
 
-    def __init__(self, master: Master):
+    def __init__(self, master: Master, manual_import: Optional[ManualImport] = None):
         self.master = master
+        self.manual_import = manual_import
         self.whatsapp_service = WhatsAppService()
 
     def ingest_payment(
@@ -54,24 +72,12 @@ class PaymentIngestionService:
         template_name: Optional[str] = None,
         template_language: str = "fr",
     ) -> dict:
-        agent = self._get_or_create_agent(row.customer_name, row.phone_number)
-        collection = self._create_paid_collection(agent, row)
-        self._create_payment_match(agent, collection, row)
-
-        whatsapp_message = self._trigger_whatsapp(
-            agent=agent,
-            collection=collection,
+        return self.ingest_many(
+            rows=[row],
             message=message,
             template_name=template_name,
             template_language=template_language,
-        )
-
-        return {
-            "collection_id": str(collection.id),
-            "agent_id": str(agent.id),
-            "whatsapp_message_id": str(whatsapp_message.id) if whatsapp_message else None,
-            "whatsapp_status": whatsapp_message.status if whatsapp_message else None,
-        }
+        )[0]
 
     def ingest_many(
         self,
@@ -79,110 +85,304 @@ class PaymentIngestionService:
         message: Optional[str] = None,
         template_name: Optional[str] = None,
         template_language: str = "fr",
+        chunk_size: int = INGEST_CHUNK_SIZE,
     ) -> list[dict]:
+        """
+        Ingest rows in chunks, with a fixed number of queries per chunk.
+
+        Each chunk prefetches its agents by WhatsApp number and, in one
+        transaction, bulk-creates the missing agents, upserts the paid
+        collections and payment matches on (master, transaction_reference)
+        and bulk-creates the pending WhatsApp messages. Messages are queued
+        for sending once the chunk is committed.
+
+        Imports are idempotent: a reference already imported updates its
+        collection and payment match instead of duplicating them, and no
+        message is sent for it again. A reference that belongs to a
+        collection the import did not create (a master's own pending
+        collection, or one settled by reconciliation) is left to
+        reconciliation: the row becomes an unmatched payment, queued for
+        incremental matching once committed, and has no collection.
+        """
+        template_obj, template_used = self._get_template(template_name, template_language)
         results = []
-        for row in rows:
-            results.append(
-                self.ingest_payment(
-                    row=row,
-                    message=message,
-                    template_name=template_name,
-                    template_language=template_language,
-                )
-            )
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            results.extend(self._ingest_chunk(chunk, message, template_obj, template_used))
         return results
 
-    def _get_or_create_agent(self, name: str, phone_number: str) -> Agent:
-        normalized = self._normalize_phone(phone_number)
-        agent, _ = Agent.objects.get_or_create(
-            master=self.master,
-            whatsapp_number=normalized,
-            defaults={
-                "name": name,
-                "phone_number": normalized,
-                "is_active": True,
-            },
+    def _ingest_chunk(
+        self,
+        rows: list[ManualPaymentRow],
+        message: Optional[str],
+        template_obj: Optional[WhatsAppTemplate],
+        template_used: Optional[str],
+    ) -> list[dict]:
+        country_code = self.master.default_country_code
+        phones = [normalize_e164(row.phone_number, country_code) for row in rows]
+        for row, phone in zip(rows, phones):
+            if not phone:
+                raise ManualImportError(f"Invalid phone number: {row.phone_number!r}")
+        send = bool(message or template_obj)
+
+        with transaction.atomic():
+            agents = self._get_or_create_agents(rows, phones)
+            collections, imported_before = self._upsert_paid_collections(rows, phones, agents)
+            unmatched_ids = self._upsert_payment_matches(rows, phones, agents, collections)
+            if unmatched_ids and getattr(settings, "RECONCILIATION_INCREMENTAL", True):
+                transaction.on_commit(lambda: ReconciliationService.queue_incremental_match(unmatched_ids))
+
+            whatsapp_messages = {}
+            if send:
+                for phone, collection in zip(phones, collections):
+                    if collection is None or collection.id in imported_before or collection.id in whatsapp_messages:
+                        continue
+                    whatsapp_messages[collection.id] = self._build_whatsapp_message(
+                        agents[phone], collection, message, template_obj, template_used
+                    )
+                WhatsAppMessage.objects.bulk_create(whatsapp_messages.values())
+                message_ids = [whatsapp_message.id for whatsapp_message in whatsapp_messages.values()]
+                transaction.on_commit(lambda: WhatsAppService.queue_messages(message_ids))
+
+        results = []
+        for phone, collection in zip(phones, collections):
+            whatsapp_message = whatsapp_messages.get(collection.id) if collection else None
+            results.append({
+                "collection_id": str(collection.id) if collection else None,
+                "agent_id": str(agents[phone].id),
+                "whatsapp_message_id": str(whatsapp_message.id) if whatsapp_message else None,
+                "whatsapp_status": whatsapp_message.status if whatsapp_message else None,
+            })
+        return results
+
+    def _get_or_create_agents(self, rows: list[ManualPaymentRow], phones: list[str]) -> dict[str, Agent]:
+        """
+        Return the chunk's agents keyed by E.164 phone, creating missing ones.
+
+        An agent takes the customer name of its last row in the chunk.
+        """
+        names = dict(zip(phones, (row.customer_name for row in rows)))
+        agents = {
+            agent.whatsapp_e164: agent
+            for agent in Agent.objects.filter(master=self.master, whatsapp_e164__in=names)
+        }
+
+        missing = [phone for phone in names if phone not in agents]
+        if missing:
+            # Conflicts come from a concurrent import creating the same agent;
+            # the re-read below picks up whichever row won.
+            Agent.objects.bulk_create(
+                [
+                    Agent(
+                        master=self.master,
+                        name=names[phone],
+                        whatsapp_number=phone,
+                        whatsapp_e164=phone,
+                        phone_number=phone,
+                        is_active=True,
+                    )
+                    for phone in missing
+                ],
+                ignore_conflicts=True,
+            )
+            agents.update(
+                (agent.whatsapp_e164, agent)
+                for agent in Agent.objects.filter(master=self.master, whatsapp_e164__in=missing)
+            )
+
+        renamed = []
+        now = timezone.now()
+        for phone, agent in agents.items():
+            if agent.name != names[phone]:
+                agent.name = names[phone]
+                agent.updated_at = now
+                renamed.append(agent)
+        if renamed:
+            Agent.objects.bulk_update(renamed, ["name", "updated_at"])
+        return agents
+
+    def _upsert_paid_collections(
+        self,
+        rows: list[ManualPaymentRow],
+        phones: list[str],
+        agents: dict[str, Agent],
+    ) -> tuple[list[Optional[Collection]], set]:
+        """
+        Upsert the chunk's paid collections on (master, transaction_reference).
+
+        Only collections created by earlier imports (paid, with the import
+        notes) are updated. Rows whose reference belongs to any other
+        collection get no collection and are left to reconciliation.
+
+        Returns:
+            tuple: The collection of each row, None for rows left to
+            reconciliation (rows repeating a reference share the collection
+            of the last one), and the ids of the collections that already
+            existed before this chunk
+        """
+        by_reference = {}
+        collections = []
+        for row, phone in zip(rows, phones):
+            collection = self._build_paid_collection(agents[phone], row, phone)
+            if collection.transaction_reference:
+                by_reference[collection.transaction_reference] = collection
+            collections.append(collection)
+
+        existing = {}
+        for reference, collection_id, status, notes in Collection.objects.filter(
+            master=self.master, transaction_reference__in=by_reference
+        ).values_list("transaction_reference", "id", "status", "notes"):
+            if status == "paid" and (notes or "").startswith(IMPORT_NOTES):
+                existing[reference] = collection_id
+            else:
+                by_reference[reference] = None
+        collections = [
+            by_reference.get(collection.transaction_reference, collection)
+            for collection in collections
+        ]
+
+        update_fields = [
+            "agent", "amount", "status", "payment_method", "due_date", "paid_at", "notes", "updated_at",
+        ]
+        if self.manual_import:
+            update_fields.append("manual_import")
+        Collection.objects.bulk_create(
+            list({id(collection): collection for collection in collections if collection}.values()),
+            update_conflicts=True,
+            unique_fields=["master", "transaction_reference"],
+            update_fields=update_fields,
+        )
+        # An updated row keeps its id, not the one generated for the insert
+        for reference, collection_id in existing.items():
+            by_reference[reference].id = collection_id
+        return collections, set(existing.values())
+
+    def _upsert_payment_matches(
+        self,
+        rows: list[ManualPaymentRow],
+        phones: list[str],
+        agents: dict[str, Agent],
+        collections: list[Optional[Collection]],
+    ) -> list[str]:
+        """
+        Upsert the chunk's payment matches on (master, transaction_reference).
+
+        Rows without a collection become unmatched payments; a payment
+        already recorded under their reference is left as it is. Blank
+        references are stored as NULL, so each such row is its own payment.
+
+        Returns:
+            list: Ids of the unmatched payments, for incremental matching
+        """
+        now = timezone.now()
+        matched = {}
+        unmatched = {}
+        for row, phone, collection in zip(rows, phones, collections):
+            payment = PaymentMatch(
+                master=self.master,
+                agent=agents[phone],
+                amount=row.amount,
+                transaction_reference=row.reference or None,
+                payment_method="mobile_money",
+                received_at=row.payment_date,
+                notes=IMPORT_NOTES,
+            )
+            # A reference repeated in the chunk ends up on its last row
+            key = row.reference or payment.id
+            if collection:
+                payment.is_matched = True
+                payment.matched_collection = collection
+                payment.matched_at = now
+                matched[key] = payment
+            else:
+                unmatched[key] = payment
+
+        PaymentMatch.objects.bulk_create(
+            list(matched.values()),
+            update_conflicts=True,
+            unique_fields=["master", "transaction_reference"],
+            update_fields=[
+                "agent", "amount", "payment_method", "received_at", "is_matched",
+                "matched_collection", "matched_at", "notes", "updated_at",
+            ],
         )
-        if agent.name != name:
-            agent.name = name
-            agent.save(update_fields=["name"])
-        return agent
+        if not unmatched:
+            return []
+        PaymentMatch.objects.bulk_create(list(unmatched.values()), ignore_conflicts=True)
+        # Reference-less payments never conflict, so they all were inserted
+        references = [payment.transaction_reference for payment in unmatched.values() if payment.transaction_reference]
+        payment_ids = [payment.id for payment in unmatched.values() if not payment.transaction_reference]
+        payment_ids += PaymentMatch.objects.filter(
+            master=self.master, transaction_reference__in=references, is_matched=False
+        ).values_list("id", flat=True)
+        return [str(payment_id) for payment_id in payment_ids]
 
-    def _create_paid_collection(self, agent: Agent, row: ManualPaymentRow) -> Collection:
+    def _build_paid_collection(self, agent: Agent, row: ManualPaymentRow, phone: str) -> Collection:
         notes = (
-            "Manual Wave import (demo).\n"
+            f"{IMPORT_NOTES}\n"
             f"Customer: {row.customer_name}\n"
-            f"Phone: {self._normalize_phone(row.phone_number)}\n"
+            f"Phone: {phone}\n"
             f"Reference: {row.reference}\n"
             f"Payment Date: {row.payment_date.isoformat()}\n"
         )
-        collection = Collection.objects.create(
+        return Collection(
             master=self.master,
             agent=agent,
             amount=row.amount,
             status="paid",
             payment_method="mobile_money",
-            transaction_reference=row.reference,
+            transaction_reference=row.reference or None,
             due_date=row.payment_date,
             paid_at=row.payment_date,
             notes=notes,
-        )
-        return collection
-
-    def _create_payment_match(self, agent: Agent, collection: Collection, row: ManualPaymentRow) -> None:
-        """
-        Record the received payment in PaymentMatch for auditability.
-        """
-        PaymentMatch.objects.update_or_create(
-            master=self.master,
-            transaction_reference=row.reference,
-            defaults={
-                "agent": agent,
-                "amount": row.amount,
-                "payment_method": "mobile_money",
-                "received_at": row.payment_date,
-                "is_matched": True,
-                "matched_collection": collection,
-                "matched_at": timezone.now(),
-                "notes": "Manual Wave import (demo).",
-            },
+            manual_import=self.manual_import,
         )
 
-    def _trigger_whatsapp(
+    def _get_template(
         self,
-        agent: Agent,
-        collection: Collection,
-        message: Optional[str],
         template_name: Optional[str],
         template_language: str,
-    ) -> Optional[WhatsAppMessage]:
-        if not message and not template_name:
-            return None
+    ) -> tuple[Optional[WhatsAppTemplate], Optional[str]]:
+        """Return the master's template for a name or alias, and the resolved name."""
+        if not template_name:
+            return None, None
 
-        template_obj = None
-        metadata = {}
-        if template_name:
-            # Resolve logical alias (e.g., "pinpay") to approved template name
-            resolved_name, resolved_language = self._resolve_template_alias(
-                template_name, template_language
-            )
-            template_obj = WhatsAppTemplate.objects.filter(
+        # Resolve logical alias (e.g., "pinpay") to approved template name
+        resolved_name, resolved_language = self._resolve_template_alias(
+            template_name, template_language
+        )
+        template_obj = WhatsAppTemplate.objects.filter(
+            master=self.master,
+            whatsapp_template_name=resolved_name,
+            is_active=True,
+        ).first()
+        if not template_obj:
+            template_obj = WhatsAppTemplate.objects.create(
                 master=self.master,
+                name=f"Manual Template: {resolved_name}",
                 whatsapp_template_name=resolved_name,
+                template_type="custom",
+                content=f"Template: {resolved_name}",
+                language_code=resolved_language,
                 is_active=True,
-            ).first()
-            if not template_obj:
-                template_obj = WhatsAppTemplate.objects.create(
-                    master=self.master,
-                    name=f"Manual Template: {resolved_name}",
-                    whatsapp_template_name=resolved_name,
-                    template_type="custom",
-                    content=f"Template: {resolved_name}",
-                    language_code=resolved_language,
-                    is_active=True,
-                )
+            )
+        return template_obj, resolved_name
+
+    def _build_whatsapp_message(
+        self,
+        agent: Agent,
+        collection: Collection,
+        message: Optional[str],
+        template_obj: Optional[WhatsAppTemplate],
+        template_used: Optional[str],
+    ) -> WhatsAppMessage:
+        metadata = {}
+        if template_obj:
             metadata = {
-                "template_used": resolved_name,
+                "template_used": template_used,
                 "template_params": {
                     "agent_name": agent.name,
                     "amount": str(collection.amount),
@@ -191,7 +391,7 @@ class PaymentIngestionService:
             }
 
         content = message or f"Paiement recu: {collection.amount} FCFA. Merci {agent.name}."
-        whatsapp_message = WhatsAppMessage.objects.create(
+        return WhatsAppMessage(
             master=self.master,
             agent=agent,
             collection=collection,
@@ -199,19 +399,11 @@ class PaymentIngestionService:
             direction="outbound",
             status="pending",
             to_number=agent.whatsapp_number,
+            to_e164=agent.whatsapp_e164,
             content=content,
             metadata=metadata,
         )
 
-        success = self.whatsapp_service.send_message(whatsapp_message)
-        if success:
-            whatsapp_message.status = "sent"
-            whatsapp_message.sent_at = timezone.now()
-        else:
-            whatsapp_message.status = "failed"
-        whatsapp_message.save()
-        return whatsapp_message
-
     @staticmethod
     def _resolve_template_alias(
         template_name: str,
@@ -224,12 +416,256 @@ class PaymentIngestionService:
                 return resolved_name, resolved_language
         return template_name, template_language
 
+
+class ManualImportService:
+    """
+    Stages admin UI uploads on disk and imports them in the background.
+
+    The upload (CSV, XLS or XLSX) is written in chunks to a file named after
+    the import id, so neither the request nor the session ever holds the
+    whole file. Previews
+    read the first rows only; the import runs in a default queue job that
+    feeds PaymentIngestionService chunk by chunk and records its progress
+    on the ManualImport.
+
+    Files and rows imported before are recorded in the statement manifest
+    (see apps.collections.fingerprints): a repeat upload completes without
+    parsing, and rows of overlapping exports are skipped before ingestion.
+    """
+
+    PREVIEW_ROWS = 10
+
+    def stage(self, master: Master, upload) -> ManualImport:
+        """
+        Write an uploaded statement to the staging directory.
+
+        Staged files of the master's earlier imports are removed, so only
+        the latest one is kept on disk.
+        Only the header and the preview rows are read here; the import job
+        counts the rows.
+
+        Args:
+            master: Master instance
+            upload: Django UploadedFile
+
+        Returns:
+            ManualImport: The staged import, with its headers
+
+        Raises:
+            ManualImportError: If the file is not a readable statement
+        """
+        for previous in ManualImport.objects.filter(master=master, has_staged_file=True).exclude(status="running"):
+            self.discard(previous)
+
+        manual_import = ManualImport.objects.create(master=master, file_name=upload.name[:255])
+        os.makedirs(settings.MANUAL_IMPORT_STAGING_DIR, exist_ok=True)
+        hasher = FileHasher()
+        with open(self.staged_path(manual_import), "wb") as handle:
+            for chunk in upload.chunks():
+                handle.write(chunk)
+                hasher.update(chunk)
+
+        try:
+            with open_statement(self.staged_path(manual_import)) as (headers, records):
+                list(islice(records, self.PREVIEW_ROWS))
+        except (ManualImportError, UnicodeDecodeError, csv.Error) as exc:
+            self.discard(manual_import)
+            manual_import.delete()
+            raise ManualImportError(f"Failed to parse {upload.name}: {exc}") from exc
+
+        provider = detect_provider(headers)
+        manual_import.headers = headers
+        manual_import.provider = provider.name if provider else ""
+        manual_import.file_hash = hasher.hexdigest()
+        manual_import.save(update_fields=["headers", "provider", "file_hash", "updated_at"])
+        return manual_import
+
+    def check(self, manual_import: ManualImport, mapping: dict, limit: int = PREVIEW_ROWS) -> Optional[str]:
+        """
+        Parse the first rows of a staged file with a mapping.
+
+        Returns:
+            str or None: The error the import would stop on within those rows
+        """
+        parser = StatementParser(
+            mapping=mapping,
+            provider=get_provider(manual_import.provider),
+            workers=1,
+            default_date=timezone.now(),
+            country_code=manual_import.master.default_country_code,
+        )
+        try:
+            list(islice(parser.parse(self.staged_path(manual_import)), limit))
+        except (ManualImportError, UnicodeDecodeError, csv.Error) as exc:
+            return str(exc)
+        return None
+
+    def imported_before(self, manual_import: ManualImport) -> Optional[StatementManifest]:
+        """Return the manifest of an earlier, completed import of the same file."""
+        if not manual_import.file_hash:
+            return None
+        return StatementManifest.objects.filter(
+            master=manual_import.master,
+            file_hash=manual_import.file_hash,
+            completed_at__isnull=False,
+        ).first()
+
+    def preview(self, manual_import: ManualImport, limit: int = PREVIEW_ROWS) -> list[dict]:
+        """Return the first rows of a staged file as dicts keyed by header."""
+        with open_statement(self.staged_path(manual_import)) as (headers, records):
+            return [dict(zip(headers, record)) for record in islice(records, limit)]
+
+    def start(
+        self,
+        manual_import: ManualImport,
+        mapping: dict,
+        message: Optional[str] = None,
+        template_name: Optional[str] = None,
+        template_language: str = "fr",
+    ) -> ManualImport:
+        """
+        Queue the import of a staged file and return immediately.
+
+        Args:
+            manual_import: Staged ManualImport
+            mapping: Payment field -> column name
+            message: Optional custom WhatsApp message
+            template_name: Optional WhatsApp template name or alias
+            template_language: Template language code
+
+        Returns:
+            ManualImport: The import, running or failed if it could not be queued
+        """
+        manual_import.mapping = mapping
+        manual_import.message = message
+        manual_import.template_name = template_name
+        manual_import.template_language = template_language
+        manual_import.status = "running"
+        manual_import.started_at = timezone.now()
+        manual_import.save()
+
+        try:
+            get_queue("default").enqueue(
+                run_manual_import_task,
+                import_id=str(manual_import.id),
+                job_timeout=getattr(settings, "MANUAL_IMPORT_JOB_TIMEOUT", 3600),
+            )
+        except Exception as e:
+            self._fail(manual_import, f"Could not queue import: {e}")
+        return manual_import
+
+    def run(self, manual_import: ManualImport, chunk_size: int = INGEST_CHUNK_SIZE) -> ManualImport:
+        """
+        Import a staged file, committing each chunk with the import's progress.
+
+        Rows up to processed_rows are skipped, so a job retried after a
+        crash continues where the last committed chunk ended. A file
+        imported before completes at once; rows imported from other files
+        are counted in duplicate_rows and not ingested again.
+
+        Args:
+            manual_import: Running ManualImport
+            chunk_size: Rows committed per transaction
+
+        Returns:
+            ManualImport: The completed or failed import
+        """
+        path = self.staged_path(manual_import)
+        statement, _ = StatementManifest.objects.get_or_create(
+            master=manual_import.master,
+            file_hash=manual_import.file_hash or file_hash(path),
+            defaults={"file_name": manual_import.file_name},
+        )
+        if statement.completed_at:
+            manual_import.processed_rows = statement.payments
+            manual_import.duplicate_rows = statement.payments
+            return self._complete(manual_import)
+
+        service = PaymentIngestionService(manual_import.master, manual_import)
+        parser = StatementParser(
+            mapping=manual_import.mapping,
+            provider=get_provider(manual_import.provider),
+            workers=getattr(settings, "STATEMENT_PARSE_WORKERS", 0),
+            # Blank or unreadable dates have always meant "imported now" here
+            default_date=timezone.now(),
+            country_code=manual_import.master.default_country_code,
+        )
+        agent_ids = set()
+        try:
+            if not manual_import.total_rows:
+                with open_statement(path) as (_, records):
+                    manual_import.total_rows = sum(1 for _ in records)
+                manual_import.save(update_fields=["total_rows", "updated_at"])
+            seen = SeenPayments(manual_import.master, expected_rows=manual_import.total_rows)
+            rows = parser.parse(path, skip=manual_import.processed_rows)
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                new_rows, fingerprints = seen.split(chunk)
+
+                # The chunk, its fingerprints and the progress commit
+                # together; WhatsApp sends are queued only once they have.
+                with transaction.atomic():
+                    results = []
+                    if new_rows:
+                        results = service.ingest_many(
+                            rows=new_rows,
+                            message=manual_import.message,
+                            template_name=manual_import.template_name,
+                            template_language=manual_import.template_language,
+                            chunk_size=chunk_size,
+                        )
+                        seen.record(new_rows, fingerprints, statement)
+                    agent_ids.update(result["agent_id"] for result in results)
+                    manual_import.processed_rows += len(chunk)
+                    manual_import.duplicate_rows += len(chunk) - len(new_rows)
+                    manual_import.agents = max(manual_import.agents, len(agent_ids))
+                    manual_import.queued_messages += sum(
+                        1 for result in results if result["whatsapp_status"] == "pending"
+                    )
+                    manual_import.save(update_fields=[
+                        "processed_rows", "duplicate_rows", "agents", "queued_messages", "updated_at",
+                    ])
+        except Exception as e:
+            return self._fail(manual_import, str(e))
+
+        statement.payments = manual_import.processed_rows
+        statement.duplicate_payments = manual_import.duplicate_rows
+        statement.completed_at = timezone.now()
+        statement.save(update_fields=["payments", "duplicate_payments", "completed_at", "updated_at"])
+        return self._complete(manual_import)
+
+    def discard(self, manual_import: ManualImport) -> None:
+        """Remove the staged file of an import, if it is still on disk."""
+        try:
+            os.remove(self.staged_path(manual_import))
+        except FileNotFoundError:
+            pass
+        if manual_import.has_staged_file:
+            manual_import.has_staged_file = False
+            manual_import.save(update_fields=["has_staged_file", "updated_at"])
+
     @staticmethod
-    def _normalize_phone(phone_number: str) -> str:
-        normalized = phone_number.strip()
-        if normalized.startswith("00"):
-            normalized = "+" + normalized[2:]
-        if not normalized.startswith("+"):
-            normalized = "+" + normalized
-        return normalized
+    def staged_path(manual_import: ManualImport) -> str:
+        extension = os.path.splitext(manual_import.file_name)[1].lower()
+        if extension not in (".csv", ".xls", ".xlsx"):
+            extension = ".csv"
+        return os.path.join(settings.MANUAL_IMPORT_STAGING_DIR, f"{manual_import.id}{extension}")
 
+    @staticmethod
+    def _complete(manual_import: ManualImport) -> ManualImport:
+        manual_import.status = "completed"
+        manual_import.completed_at = timezone.now()
+        manual_import.save(update_fields=[
+            "status", "processed_rows", "duplicate_rows", "completed_at", "updated_at",
+        ])
+        return manual_import
+
+    @staticmethod
+    def _fail(manual_import: ManualImport, error_message: str) -> ManualImport:
+        manual_import.status = "failed"
+        manual_import.completed_at = timezone.now()
+        manual_import.error_message = error_message
+        manual_import.save(update_fields=["status", "completed_at", "error_message", "updated_at"])
+        return manual_import
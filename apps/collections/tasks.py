@@ -0,0 +1,31 @@
+"""
+Background tasks for collections.
+"""
+
+from apps.collections.models import ManualImport
+
+
+def run_manual_import_task(import_id):
+    """
+    Task to import a file staged from the admin UI.
+
+    Args:
+        import_id: UUID of the running ManualImport
+    """
+    # Imported here because the service module queues this task
+    from apps.collections.services import ManualImportService
+
+    try:
+        manual_import = ManualImport.objects.select_related('master').get(id=import_id)
+        manual_import = ManualImportService().run(manual_import)
+
+        return {
+            'success': manual_import.status == 'completed',
+            'import_id': str(manual_import.id),
+            'rows': manual_import.processed_rows,
+        }
+
+    except Exception as e:
+        # Log error
+        print(f"Error running manual import: {e}")
+        return {'success': False, 'error': str(e)}
@@ -0,0 +1,129 @@
+"""
+Tests for statement deduplication and the resumable manual payment import.
+"""
+
+import os
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.collections.fingerprints import SeenPayments, row_fingerprint
+from apps.collections.models import ImportCheckpoint, PaymentFingerprint
+from apps.collections.parsing import ManualPaymentRow
+from apps.collections.services import PaymentIngestionService
+from apps.masters.models import Master
+from apps.reconciliation.models import PaymentMatch
+
+
+def make_row(reference, amount='1000', day=1):
+    return ManualPaymentRow(
+        customer_name='Awa',
+        phone_number='+221770000001',
+        amount=Decimal(amount),
+        payment_date=timezone.make_aware(datetime(2026, 10, day, 9, 0)),
+        reference=reference,
+    )
+
+
+class SeenPaymentsTests(TestCase):
+    """SeenPayments.split() drops rows imported before or repeated in the file."""
+
+    def setUp(self):
+        self.master = Master.objects.create(name='Master', email='master@example.com', api_key='sk_test_seen')
+
+    def test_keeps_new_rows_in_file_order(self):
+        rows = [make_row('R1'), make_row('R2'), make_row('R3')]
+        new_rows, fingerprints = SeenPayments(self.master).split(rows)
+        self.assertEqual(new_rows, rows)
+        self.assertEqual(fingerprints, [row_fingerprint(row) for row in rows])
+
+    def test_drops_rows_recorded_by_an_earlier_import(self):
+        earlier = [make_row('R1'), make_row('R2', day=5)]
+        seen = SeenPayments(self.master)
+        seen.record(*seen.split(earlier))
+
+        rows = [make_row('R1'), make_row('R2', day=5), make_row('R3')]
+        new_rows, fingerprints = SeenPayments(self.master).split(rows)
+        self.assertEqual([row.reference for row in new_rows], ['R3'])
+        self.assertEqual(fingerprints, [row_fingerprint(rows[2])])
+
+    def test_same_reference_with_another_amount_is_new(self):
+        seen = SeenPayments(self.master)
+        seen.record(*seen.split([make_row('R1')]))
+        new_rows, _ = SeenPayments(self.master).split([make_row('R1', amount='2000')])
+        self.assertEqual(len(new_rows), 1)
+
+    def test_drops_rows_repeated_in_the_file(self):
+        rows = [make_row('R1'), make_row('R1'), make_row('R2')]
+        new_rows, _ = SeenPayments(self.master).split(rows)
+        self.assertEqual([row.reference for row in new_rows], ['R1', 'R2'])
+
+
+class ImportResumeTests(TestCase):
+    """import_manual_payments --resume continues after the last committed chunk."""
+
+    ROWS = 5
+
+    def setUp(self):
+        self.master = Master.objects.create(name='Master', email='master@example.com', api_key='sk_test_resume')
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, 'wave.csv')
+        with open(self.path, 'w') as handle:
+            handle.write('customer_name,phone_number,amount,payment_date,reference\n')
+            for index in range(self.ROWS):
+                handle.write(f'Customer {index},+22177000000{index},{1000 + index},2026-10-01,REF{index}\n')
+        self.addCleanup(os.remove, self.path)
+
+    def import_file(self, *args):
+        call_command(
+            'import_manual_payments',
+            '--master-email', self.master.email,
+            '--csv', self.path,
+            '--chunk-size', '2',
+            '--workers', '1',
+            *args,
+            stdout=StringIO(),
+        )
+
+    def test_resume_imports_the_remaining_rows_once(self):
+        ingest_many = PaymentIngestionService.ingest_many
+        calls = []
+
+        def fail_second_chunk(service, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise CommandError('Worker stopped')
+            return ingest_many(service, **kwargs)
+
+        with mock.patch.object(PaymentIngestionService, 'ingest_many', autospec=True, side_effect=fail_second_chunk):
+            with self.assertRaisesMessage(CommandError, '--resume'):
+                self.import_file()
+
+        checkpoint = ImportCheckpoint.objects.get(master=self.master)
+        self.assertEqual(checkpoint.rows_committed, 2)
+        self.assertIsNone(checkpoint.completed_at)
+        self.assertEqual(PaymentMatch.objects.filter(master=self.master).count(), 2)
+
+        with self.assertRaisesMessage(CommandError, 'Use --resume'):
+            self.import_file()
+
+        self.import_file('--resume')
+        checkpoint.refresh_from_db()
+        self.assertEqual(checkpoint.rows_committed, self.ROWS)
+        self.assertIsNotNone(checkpoint.completed_at)
+        references = PaymentMatch.objects.filter(master=self.master).values_list('transaction_reference', flat=True)
+        self.assertEqual(sorted(references), [f'REF{index}' for index in range(self.ROWS)])
+        self.assertEqual(PaymentFingerprint.objects.filter(master=self.master).count(), self.ROWS)
+
+    def test_completed_import_is_not_run_again(self):
+        self.import_file()
+        with self.assertRaisesMessage(CommandError, 'already imported'):
+            self.import_file()
+        self.assertEqual(PaymentMatch.objects.filter(master=self.master).count(), self.ROWS)
@@ -82,7 +82,7 @@ class CollectionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        serializer = CollectionMarkPaidSerializer(data=request.data)
+        serializer = CollectionMarkPaidSerializer(data=request.data, context={'collection': collection})
         serializer.is_valid(raise_exception=True)
 
         collection.mark_as_paid(
@@ -0,0 +1,81 @@
+"""
+Pooled HTTP sessions for outbound API calls.
+
+A bare requests.post() opens a new connection, with its TCP and TLS
+handshakes, on every call. A session keeps connections alive in a
+per-host pool instead, so a worker sending a batch of messages pays the
+handshake once.
+
+Sessions are shared process-wide and rebuilt after a fork, so an RQ work
+horse never reuses sockets opened by its parent.
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def pooled_session(pool_size=10, retries=3, backoff_factor=0.5, retry_statuses=(429, 503)):
+    """
+    Build a keep-alive session with transport-level retries.
+
+    Connection errors are retried (the request never reached the server),
+    and so are the statuses in retry_statuses, honouring Retry-After. Read
+    errors are not: a POST that timed out may have been processed.
+
+    Args:
+        pool_size: Connections kept alive per host
+        retries: Retries per request
+        backoff_factor: Exponential backoff between retries, in seconds
+        retry_statuses: Response statuses meaning "not processed, try again"
+
+    Returns:
+        requests.Session: The configured session
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=retry_statuses,
+        allowed_methods=None,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(name, **options):
+    """
+    Return the process-wide session called name, building it on first use.
+
+    Args:
+        name: Session key, one per API
+        **options: pooled_session() arguments, used when the session is built
+
+    Returns:
+        requests.Session: The shared session
+    """
+    key = (os.getpid(), name)
+    session = _sessions.get(key)
+    if session is None:
+        with _lock:
+            session = _sessions.get(key)
+            if session is None:
+                # Drop sessions inherited from a parent process
+                for stale in [stale for stale in _sessions if stale[0] != key[0]]:
+                    del _sessions[stale]
+                session = _sessions[key] = pooled_session(**options)
+    return session
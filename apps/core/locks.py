@@ -0,0 +1,62 @@
+"""
+Distributed locks backed by Redis.
+"""
+
+import logging
+from contextlib import contextmanager
+
+import redis
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class LockNotAcquired(Exception):
+    """Raised when a lock is already held by another process."""
+
+
+def get_redis_connection():
+    """Return a Redis client for REDIS_URL."""
+    redis_url = getattr(settings, 'REDIS_URL', 'redis://localhost:6379/0')
+    return redis.from_url(redis_url)
+
+
+@contextmanager
+def redis_lock(name, timeout, blocking_timeout=0, fail_open=False):
+    """
+    Hold a Redis lock for the duration of the block.
+
+    Args:
+        name: Lock key
+        timeout: Seconds after which the lock expires if never released,
+            so a crashed worker cannot hold it forever
+        blocking_timeout: Seconds to wait for the lock (0 = don't wait)
+        fail_open: If True, run the block unlocked when Redis is unreachable
+            or times out
+
+    Raises:
+        LockNotAcquired: If another process holds the lock
+    """
+    lock = get_redis_connection().lock(name, timeout=timeout, blocking_timeout=blocking_timeout)
+    try:
+        acquired = lock.acquire(blocking=blocking_timeout > 0)
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        if not fail_open:
+            raise
+        logger.warning("Redis unavailable, running without lock %s: %s", name, e)
+        lock = None
+        acquired = True
+
+    if not acquired:
+        raise LockNotAcquired(name)
+
+    try:
+        yield lock
+    finally:
+        if lock is not None:
+            try:
+                lock.release()
+            except redis.exceptions.RedisError:
+                # Lock expired or Redis went away; nothing left to release
+                pass
@@ -0,0 +1,79 @@
+"""
+Phone number normalisation.
+
+Numbers arrive in whatever form a client or statement used
+("+221 77 445 43 30", "00221774454330", "221774454330", "774454330").
+normalize_e164() turns them into one canonical E.164 string so agents
+and messages can be matched with exact, indexed lookups. Numbers written
+without a country code take the master's default one. E.164 numbers
+have at most 15 digits; longer inputs are not phone numbers and
+normalise to "".
+"""
+
+from functools import lru_cache
+
+from django.conf import settings
+
+
+# Distinct (number, country code) pairs kept by the normaliser's cache
+PHONE_CACHE_SIZE = 100000
+
+# Most digits in an E.164 number, country code included
+MAX_E164_DIGITS = 15
+
+# National numbers are at least this long, so "221..." with fewer digits
+# after the country code is a national number starting with 221
+MIN_NATIONAL_DIGITS = 7
+
+# Countries whose national numbers keep their leading 0 (Côte d'Ivoire,
+# Congo-Brazzaville, Italy); elsewhere it is a trunk prefix and dropped
+SIGNIFICANT_LEADING_ZERO = frozenset({"225", "242", "39"})
+
+
+def default_country_code() -> str:
+    return str(getattr(settings, "DEFAULT_PHONE_COUNTRY_CODE", "") or "").lstrip("+")
+
+
+def clean_phone(phone_number) -> str:
+    """
+    Strip spaces and punctuation from a number, keeping a leading "+".
+
+    A leading "00" international prefix becomes "+".
+    """
+    text = str(phone_number or "").strip()
+    digits = "".join(char for char in text if char.isdigit())
+    if text.startswith("+"):
+        return "+" + digits
+    if digits.startswith("00"):
+        return "+" + digits[2:]
+    return digits
+
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def normalize_e164(phone_number, country_code: str = "") -> str:
+    """
+    Return a phone number in E.164 form ("+221774454330").
+
+    Args:
+        phone_number: Number as entered
+        country_code: Calling code for numbers without one, e.g. "221"
+
+    Returns:
+        str: The canonical number, or "" if it has no digits or more than
+        MAX_E164_DIGITS once the country code is added
+    """
+    number = clean_phone(phone_number)
+    country_code = (country_code or "").lstrip("+")
+    if not number.lstrip("+"):
+        return ""
+    if number.startswith("+"):
+        number = number[1:]
+    elif country_code and not (
+        number.startswith(country_code) and len(number) - len(country_code) >= MIN_NATIONAL_DIGITS
+    ):
+        if country_code not in SIGNIFICANT_LEADING_ZERO:
+            number = number[1:] if number.startswith("0") else number
+        number = country_code + number
+    if len(number) > MAX_E164_DIGITS:
+        return ""
+    return "+" + number
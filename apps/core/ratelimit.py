@@ -0,0 +1,155 @@
+"""
+Distributed token-bucket rate limiting backed by Redis.
+
+Every worker reserves its sends from the same buckets in Redis, so the
+combined rate stays under a limit however many workers run. Buckets are
+stored as a theoretical arrival time (the GCRA form of a token bucket):
+one key per bucket, updated by a Lua script that checks and reserves all
+the buckets of a call atomically, using the Redis clock so workers'
+clocks do not need to agree.
+
+A reservation returns how long the caller must wait before its slot, so
+waiting callers are queued fairly instead of polling.
+"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+
+import redis
+
+from apps.core.locks import get_redis_connection
+
+
+logger = logging.getLogger(__name__)
+
+# KEYS: bucket keys. ARGV: max wait (ms, negative = no limit), then an
+# emission interval and a burst tolerance (ms) per key.
+# Returns {reserved (1/0), wait in ms as a string, index of the key waited on}.
+RESERVE_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + tonumber(clock[2]) / 1000
+local max_wait = tonumber(ARGV[1])
+local start = now
+local binding = 1
+local tats = {}
+for i, key in ipairs(KEYS) do
+    local tat = tonumber(redis.call('GET', key) or now)
+    if tat < now then tat = now end
+    tats[i] = tat
+    local allowed_at = tat - tonumber(ARGV[i * 2 + 1])
+    if allowed_at > start then
+        start = allowed_at
+        binding = i
+    end
+end
+local wait = start - now
+if max_wait >= 0 and wait > max_wait then
+    return {0, tostring(wait), binding}
+end
+for i, key in ipairs(KEYS) do
+    local tat = math.max(tats[i], start) + tonumber(ARGV[i * 2])
+    redis.call('SET', key, tostring(tat), 'PX', math.ceil(tat - now) + 1000)
+end
+return {1, tostring(wait), binding}
+"""
+
+
+_limiters = {}
+_lock = threading.Lock()
+
+
+class RateLimitExceeded(Exception):
+    """Raised when the next slot is further away than the caller may wait."""
+
+    def __init__(self, key, wait):
+        super().__init__(f"Rate limit {key}: next slot in {wait:.1f}s")
+        self.key = key
+        self.wait = wait
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """
+    A token bucket.
+
+    Attributes:
+        key: Redis key
+        rate: Tokens added per second
+        burst: Bucket capacity (sends allowed back to back)
+    """
+
+    key: str
+    rate: float
+    burst: int = 1
+
+
+class TokenBucketLimiter:
+    """
+    Reserves tokens from buckets shared through Redis.
+
+    Args:
+        connection: Redis client, defaults to REDIS_URL
+        fail_open: If True, let calls through unlimited when Redis is unreachable
+            or times out
+    """
+
+    def __init__(self, connection=None, fail_open=True):
+        self.redis = connection or get_redis_connection()
+        self.fail_open = fail_open
+        self._reserve = self.redis.register_script(RESERVE_SCRIPT)
+        self._warned = False
+
+    def reserve(self, buckets, max_wait=None):
+        """
+        Take one token from every bucket, at the first time all have one.
+
+        Args:
+            buckets: Buckets to draw from, e.g. a sender's and a recipient's
+            max_wait: Seconds the caller may wait; nothing is reserved past it
+
+        Returns:
+            float: Seconds to wait before using the reservation
+
+        Raises:
+            RateLimitExceeded: If the wait would exceed max_wait
+        """
+        args = [-1 if max_wait is None else max_wait * 1000]
+        for bucket in buckets:
+            interval = 1000 / bucket.rate
+            args.extend([interval, (max(bucket.burst, 1) - 1) * interval])
+
+        try:
+            reserved, wait, binding = self._reserve(keys=[bucket.key for bucket in buckets], args=args)
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+            if not self.fail_open:
+                raise
+            if not self._warned:
+                logger.warning("Redis unavailable, sending without rate limit: %s", e)
+                self._warned = True
+            return 0.0
+
+        wait = max(float(wait), 0.0) / 1000
+        if not int(reserved):
+            raise RateLimitExceeded(buckets[int(binding) - 1].key, wait)
+        return wait
+
+
+def get_limiter():
+    """
+    Return the process-wide limiter on REDIS_URL, rebuilt after a fork.
+
+    Returns:
+        TokenBucketLimiter: The shared limiter
+    """
+    pid = os.getpid()
+    limiter = _limiters.get(pid)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.get(pid)
+            if limiter is None:
+                _limiters.clear()
+                limiter = _limiters[pid] = TokenBucketLimiter()
+    return limiter
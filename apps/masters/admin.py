@@ -15,7 +15,7 @@ class MasterAdmin(admin.ModelAdmin):
     readonly_fields = ('id', 'api_key', 'created_at', 'updated_at')
     fieldsets = (
         ('Basic Information', {
-            'fields': ('id', 'name', 'email', 'is_active')
+            'fields': ('id', 'name', 'email', 'phone_country_code', 'is_active')
         }),
         ('API Configuration', {
             'fields': ('api_key', 'webhook_url', 'webhook_secret')
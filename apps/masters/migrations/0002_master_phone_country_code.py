@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:32
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('masters', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='master',
+            name='phone_country_code',
+            field=models.CharField(blank=True, default='', help_text='Calling code for agent numbers without one, e.g. 221; blank uses DEFAULT_PHONE_COUNTRY_CODE', max_length=4, validators=[django.core.validators.RegexValidator('^\\+?[1-9]\\d{0,2}$', 'Enter a calling code such as 221.')]),
+        ),
+    ]
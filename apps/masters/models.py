@@ -3,10 +3,11 @@ Master model - represents suppliers/lenders who collect payments.
 """
 
 from django.db import models
-from django.core.validators import URLValidator
+from django.core.validators import RegexValidator, URLValidator
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from apps.core.models import BaseModel
+from apps.core.phones import default_country_code
 from apps.core.utils import generate_api_key
 from apps.masters.managers import MasterManager
 
@@ -23,6 +24,13 @@ class Master(BaseModel):
     api_key = models.CharField(max_length=255, unique=True, db_index=True)
     webhook_url = models.URLField(max_length=500, blank=True, null=True, validators=[URLValidator()])
     webhook_secret = models.CharField(max_length=255, blank=True, null=True, help_text='Secret for HMAC webhook signing')
+    phone_country_code = models.CharField(
+        max_length=4,
+        blank=True,
+        default='',
+        validators=[RegexValidator(r'^\+?[1-9]\d{0,2}$', 'Enter a calling code such as 221.')],
+        help_text='Calling code for agent numbers without one, e.g. 221; blank uses DEFAULT_PHONE_COUNTRY_CODE'
+    )
     is_active = models.BooleanField(default=True)
 
     objects = MasterManager()
@@ -38,6 +46,11 @@ class Master(BaseModel):
     def __str__(self):
         return f"{self.name} ({self.email})"
 
+    @property
+    def default_country_code(self):
+        """Calling code used to normalise this master's phone numbers."""
+        return self.phone_country_code.lstrip('+') or default_country_code()
+
     def generate_api_key(self):
         """Generate a new API key for this master."""
         from django.conf import settings
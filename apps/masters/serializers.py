@@ -11,9 +11,10 @@ class MasterCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Master
-        fields = ('name', 'email', 'webhook_url')
+        fields = ('name', 'email', 'webhook_url', 'phone_country_code')
         extra_kwargs = {
             'webhook_url': {'required': False, 'allow_blank': True},
+            'phone_country_code': {'required': False, 'allow_blank': True},
         }
 
 
@@ -22,8 +23,12 @@ class MasterSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Master
-        fields = ('id', 'name', 'email', 'api_key', 'webhook_url', 'is_active', 'created_at', 'updated_at')
+        fields = (
+            'id', 'name', 'email', 'api_key', 'webhook_url', 'phone_country_code', 'is_active',
+            'created_at', 'updated_at'
+        )
         read_only_fields = ('id', 'api_key', 'created_at', 'updated_at')
         extra_kwargs = {
             'webhook_url': {'required': False, 'allow_blank': True},
+            'phone_country_code': {'required': False, 'allow_blank': True},
         }
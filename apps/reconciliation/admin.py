@@ -3,7 +3,13 @@ Admin configuration for Reconciliation models.
 """
 
 from django.contrib import admin
-from apps.reconciliation.models import PaymentMatch, ReconciliationRecord
+from apps.reconciliation.models import (
+    MatchingRule,
+    PaymentMatch,
+    ReconciliationItem,
+    ReconciliationRecord,
+    ReconciliationWatermark,
+)
 
 
 @admin.register(PaymentMatch)
@@ -24,9 +30,25 @@ class ReconciliationRecordAdmin(admin.ModelAdmin):
     date_hierarchy = 'started_at'
 
 
+@admin.register(ReconciliationItem)
+class ReconciliationItemAdmin(admin.ModelAdmin):
+    list_display = ('id', 'record', 'payment', 'collection', 'rule', 'amount_delta', 'created_at')
+    list_filter = ('rule', 'master', 'created_at')
+    search_fields = ('payment__transaction_reference',)
+    raw_id_fields = ('record', 'payment', 'collection')
+    readonly_fields = ('id', 'created_at', 'updated_at')
+    date_hierarchy = 'created_at'
 
 
+@admin.register(ReconciliationWatermark)
+class ReconciliationWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('id', 'master', 'swept_at', 'last_record', 'updated_at')
+    search_fields = ('master__name', 'master__email')
+    readonly_fields = ('id', 'created_at', 'updated_at')
 
 
-
-
+@admin.register(MatchingRule)
+class MatchingRuleAdmin(admin.ModelAdmin):
+    list_display = ('id', 'master', 'amount_tolerance', 'due_date_window_days', 'split_matching', 'updated_at')
+    search_fields = ('master__name', 'master__email')
+    readonly_fields = ('id', 'created_at', 'updated_at')
@@ -0,0 +1,403 @@
+"""
+In-memory matching engine for reconciliation runs.
+
+The engine never touches the database: the service streams pending
+collections and unmatched payments into it, and reads back the matches
+it decided on. Keeping the matching pure makes a run cost the same
+number of queries regardless of how many payments it processes.
+"""
+
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+
+def to_minor_units(amount):
+    """
+    Convert a decimal amount to an integer number of minor units (cents).
+
+    Args:
+        amount: Decimal amount with at most two decimal places
+
+    Returns:
+        int: Amount in minor units
+    """
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def from_minor_units(amount_minor):
+    """Convert an integer number of minor units back to a decimal amount."""
+    return (Decimal(amount_minor) / 100).quantize(Decimal('0.01'))
+
+
+@dataclass
+class PendingCollection:
+    """
+    Lightweight view of a pending Collection row.
+
+    transaction_reference is only set when an unmatched payment of the same
+    agent carries that reference.
+    """
+    id: object
+    agent_id: object
+    amount_minor: int
+    transaction_reference: str = None
+    due_date: datetime = None
+
+
+@dataclass
+class UnmatchedPayment:
+    """Lightweight view of an unmatched PaymentMatch row."""
+    id: object
+    agent_id: object
+    amount: Decimal
+    transaction_reference: str
+    payment_method: str
+    received_at: datetime = None
+
+    @property
+    def amount_minor(self):
+        return to_minor_units(self.amount)
+
+
+@dataclass
+class Match:
+    """
+    A payment the engine paired with a collection, and the rule that paired them.
+
+    Split and aggregate matches come in groups sharing a group id: they are
+    written all together or not at all. The difference between the group's
+    payments and collections is carried by its first match.
+    """
+    payment: UnmatchedPayment
+    collection: PendingCollection
+    rule: str
+    group: int = None
+    delta_minor: int = None
+
+    @property
+    def amount_delta(self):
+        """Payment amount minus collection amount."""
+        if self.delta_minor is not None:
+            return from_minor_units(self.delta_minor)
+        return from_minor_units(self.payment.amount_minor - self.collection.amount_minor)
+
+
+def find_subset(items, low, high, max_parts, deadline):
+    """
+    Find a combination of 2 to max_parts items whose amounts sum within [low, high].
+
+    A depth-first search that prefers earlier items and prunes branches that
+    overshoot high or can no longer reach low. It gives up when the deadline
+    passes, so its cost is bounded whatever the input.
+
+    Args:
+        items: List of (amount_minor, item) tuples, positive amounts, in order of preference
+        low: Lowest acceptable sum, in minor units
+        high: Highest acceptable sum, in minor units
+        max_parts: Largest number of items in a combination
+        deadline: time.monotonic() value after which the search stops
+
+    Returns:
+        list or None: The chosen items, or None if none was found in time
+    """
+    # remaining[i] is the sum of items[i:], to prune branches that cannot reach low
+    remaining = [0] * (len(items) + 1)
+    for index in range(len(items) - 1, -1, -1):
+        remaining[index] = remaining[index + 1] + items[index][0]
+
+    chosen = []
+
+    def search(start, total):
+        if len(chosen) >= 2 and low <= total <= high:
+            return True
+        if len(chosen) == max_parts or time.monotonic() > deadline:
+            return False
+        for index in range(start, len(items)):
+            if total + remaining[index] < low:
+                return False
+            amount, item = items[index]
+            if total + amount > high:
+                continue
+            chosen.append(item)
+            if search(index + 1, total + amount):
+                return True
+            chosen.pop()
+        return False
+
+    return list(chosen) if search(0, 0) else None
+
+
+class ReconciliationEngine:
+    """
+    Matches payments to pending collections in memory.
+
+    Matching runs in two passes per payment:
+
+    1. Reference: collections whose transaction_reference was pre-filled
+       with the reference of one of the agent's payments are indexed by
+       (agent_id, reference) and reserved for that payment.
+    2. Amount: every other collection is indexed by (agent_id, amount in
+       minor units). Each bucket keeps the order the collections were added
+       in, so feeding them sorted by due date settles the oldest first.
+
+    With an amount tolerance, each agent also keeps a sorted array of its
+    pending amounts; the candidates within tolerance are found by binary
+    search and tried closest first, so a payment costs O(log n) however
+    many collections the agent has. With a due-date window, the amount pass
+    only accepts collections due within the window of the payment's
+    received_at; payments must then be matched oldest first, which lets
+    collections that fell behind the window be dropped from their bucket.
+
+    With split matching, payments left unmatched are kept per agent and
+    match_groups() then looks for one payment settling several collections
+    (aggregate) and several payments settling one collection (split) with a
+    bounded subset-sum search. The search only considers the oldest
+    split_max_candidates items and gives up on an agent after
+    split_time_budget seconds, so pathological agents cannot stall a run.
+    """
+
+    RULE_REFERENCE = 'reference'
+    RULE_AMOUNT = 'amount'
+    RULE_TOLERANCE = 'tolerance'
+    RULE_SPLIT = 'split'
+    RULE_AGGREGATE = 'aggregate'
+
+    def __init__(
+        self,
+        amount_tolerance_minor=0,
+        due_date_window=None,
+        split_matching=False,
+        split_max_candidates=20,
+        split_max_parts=4,
+        split_time_budget=0.05,
+    ):
+        """
+        Args:
+            amount_tolerance_minor: Accepted amount difference, in minor units
+            due_date_window: Optional timedelta around the collection due date
+                within which the payment must have been received
+            split_matching: Keep unmatched payments for match_groups()
+            split_max_candidates: Most items considered per subset-sum search
+            split_max_parts: Most payments or collections in one group
+            split_time_budget: Seconds of subset-sum search allowed per agent
+        """
+        self.amount_tolerance_minor = amount_tolerance_minor
+        self.due_date_window = due_date_window
+        self.split_matching = split_matching
+        self.split_max_candidates = split_max_candidates
+        self.split_max_parts = split_max_parts
+        self.split_time_budget = split_time_budget
+        self._leftover_payments = defaultdict(list)
+        self._groups = 0
+        self._by_reference = {}
+        self._buckets = defaultdict(deque)
+        self._amounts = defaultdict(list)
+        self._unsorted_agents = set()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add_collection(self, collection):
+        """Index a pending collection."""
+        reference_key = (collection.agent_id, collection.transaction_reference)
+        if collection.transaction_reference and reference_key not in self._by_reference:
+            self._by_reference[reference_key] = collection
+        else:
+            key = (collection.agent_id, collection.amount_minor)
+            if self.amount_tolerance_minor and key not in self._buckets:
+                # Sorted lazily on the agent's first tolerance lookup
+                self._amounts[collection.agent_id].append(collection.amount_minor)
+                self._unsorted_agents.add(collection.agent_id)
+            self._buckets[key].append(collection)
+        self._size += 1
+
+    def match(self, payment):
+        """
+        Match a payment against the indexed collections.
+
+        The matched collection is removed from the index so it cannot be
+        claimed twice in the same run.
+
+        Args:
+            payment: UnmatchedPayment instance
+
+        Returns:
+            Match or None: The match, by reference, exact agent+amount or
+            agent+amount within tolerance. Without a match, the payment is
+            kept for match_groups() when split matching is enabled.
+        """
+        amount_minor = payment.amount_minor
+
+        reference_key = (payment.agent_id, payment.transaction_reference)
+        collection = self._by_reference.get(reference_key)
+        if collection and collection.amount_minor == amount_minor:
+            del self._by_reference[reference_key]
+            self._size -= 1
+            return Match(payment=payment, collection=collection, rule=self.RULE_REFERENCE)
+
+        for candidate_minor in self._candidate_amounts(payment.agent_id, amount_minor):
+            collection = self._take(payment, candidate_minor)
+            if collection:
+                rule = self.RULE_AMOUNT if candidate_minor == amount_minor else self.RULE_TOLERANCE
+                return Match(payment=payment, collection=collection, rule=rule)
+
+        if self.split_matching:
+            self._leftover_payments[payment.agent_id].append(payment)
+        return None
+
+    def match_groups(self):
+        """
+        Match the payments match() left over in split and aggregate groups.
+
+        Call once every payment went through match(). Collections and
+        payments are preferred oldest first.
+
+        Yields:
+            list: The Match instances of one group
+        """
+        if not self._leftover_payments:
+            return
+
+        collections_by_agent = defaultdict(list)
+        for (agent_id, _), bucket in self._buckets.items():
+            if agent_id in self._leftover_payments:
+                collections_by_agent[agent_id].extend(bucket)
+        for (agent_id, _), collection in self._by_reference.items():
+            if agent_id in self._leftover_payments:
+                collections_by_agent[agent_id].append(collection)
+
+        for agent_id, payments in self._leftover_payments.items():
+            collections = collections_by_agent.get(agent_id)
+            if collections:
+                collections.sort(key=_due_date_key)
+                yield from self._match_agent_groups(payments, collections)
+        self._leftover_payments.clear()
+
+    def _match_agent_groups(self, payments, collections):
+        """Run the aggregate, then the split search for one agent."""
+        deadline = time.monotonic() + self.split_time_budget
+        tolerance = self.amount_tolerance_minor
+
+        for payment in list(payments):
+            if len(collections) < 2 or time.monotonic() > deadline:
+                break
+            amount_minor = payment.amount_minor
+            candidates = [
+                (collection.amount_minor, collection)
+                for collection in collections
+                if collection.amount_minor <= amount_minor + tolerance and self._in_window(payment, collection)
+            ][:self.split_max_candidates]
+            chosen = find_subset(candidates, amount_minor - tolerance, amount_minor + tolerance, self.split_max_parts, deadline)
+            if chosen:
+                payments.remove(payment)
+                for collection in chosen:
+                    collections.remove(collection)
+                    self._remove_collection(collection)
+                yield self._group(self.RULE_AGGREGATE, [payment], chosen)
+
+        for collection in list(collections):
+            if len(payments) < 2 or time.monotonic() > deadline:
+                break
+            amount_minor = collection.amount_minor
+            candidates = [
+                (payment.amount_minor, payment)
+                for payment in payments
+                if payment.amount_minor <= amount_minor + tolerance and self._in_window(payment, collection)
+            ][:self.split_max_candidates]
+            chosen = find_subset(candidates, amount_minor - tolerance, amount_minor + tolerance, self.split_max_parts, deadline)
+            if chosen:
+                for payment in chosen:
+                    payments.remove(payment)
+                collections.remove(collection)
+                self._remove_collection(collection)
+                yield self._group(self.RULE_SPLIT, chosen, [collection])
+
+    def _group(self, rule, payments, collections):
+        """Build the matches of a group; the first carries the group's amount delta."""
+        self._groups += 1
+        delta_minor = sum(p.amount_minor for p in payments) - sum(c.amount_minor for c in collections)
+        matches = [
+            Match(payment=payment, collection=collection, rule=rule, group=self._groups, delta_minor=0)
+            for payment in payments
+            for collection in collections
+        ]
+        matches[0].delta_minor = delta_minor
+        return matches
+
+    def _in_window(self, payment, collection):
+        if self.due_date_window is None or payment.received_at is None or collection.due_date is None:
+            return True
+        return abs(payment.received_at - collection.due_date) <= self.due_date_window
+
+    def _remove_collection(self, collection):
+        """Remove a collection picked by match_groups() from the index."""
+        reference_key = (collection.agent_id, collection.transaction_reference)
+        if self._by_reference.get(reference_key) is collection:
+            del self._by_reference[reference_key]
+        else:
+            key = (collection.agent_id, collection.amount_minor)
+            bucket = self._buckets[key]
+            bucket.remove(collection)
+            if not bucket:
+                self._drop_bucket(key)
+        self._size -= 1
+
+    def _candidate_amounts(self, agent_id, amount_minor):
+        """Pending amounts of the agent a payment may settle, closest first."""
+        if not self.amount_tolerance_minor:
+            return (amount_minor,)
+
+        amounts = self._amounts.get(agent_id)
+        if not amounts:
+            return ()
+        if agent_id in self._unsorted_agents:
+            amounts.sort()
+            self._unsorted_agents.discard(agent_id)
+
+        low = bisect_left(amounts, amount_minor - self.amount_tolerance_minor)
+        high = bisect_right(amounts, amount_minor + self.amount_tolerance_minor)
+        return sorted(amounts[low:high], key=lambda candidate: (abs(candidate - amount_minor), candidate))
+
+    def _take(self, payment, amount_minor):
+        """Remove and return the oldest collection of a bucket the payment may settle."""
+        key = (payment.agent_id, amount_minor)
+        bucket = self._buckets.get(key)
+        if not bucket:
+            return None
+
+        collection = None
+        if self.due_date_window is None or payment.received_at is None:
+            collection = bucket.popleft()
+            self._size -= 1
+        else:
+            earliest_due = payment.received_at - self.due_date_window
+            latest_due = payment.received_at + self.due_date_window
+            # Later payments are received later, so these can never match
+            while bucket and bucket[0].due_date < earliest_due:
+                bucket.popleft()
+                self._size -= 1
+            if bucket and bucket[0].due_date <= latest_due:
+                collection = bucket.popleft()
+                self._size -= 1
+
+        if not bucket:
+            self._drop_bucket(key)
+        return collection
+
+    def _drop_bucket(self, key):
+        del self._buckets[key]
+        agent_id, amount_minor = key
+        amounts = self._amounts.get(agent_id)
+        if amounts and agent_id not in self._unsorted_agents:
+            del amounts[bisect_left(amounts, amount_minor)]
+        elif amounts:
+            amounts.remove(amount_minor)
+
+
+def _due_date_key(collection):
+    return collection.due_date.timestamp() if collection.due_date else float('-inf')
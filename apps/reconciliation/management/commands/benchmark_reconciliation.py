@@ -0,0 +1,127 @@
+"""
+Benchmark reconciliation against a generated dataset.
+
+Times ReconciliationService runs and reports throughput (payments/sec),
+the number of SQL queries issued and peak memory. Point DATABASE_URL at
+SQLite or PostgreSQL to compare backends; --json prints one result per
+line so runs can be stored and diffed to catch regressions.
+
+Usage:
+    python manage.py generate_reconciliation_dataset --payments 100000
+    python manage.py benchmark_reconciliation --master-email master-0@bench.sentreso.test --repeat 3
+"""
+
+import json
+import resource
+import sys
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.collections.models import Collection
+from apps.masters.models import Master
+from apps.reconciliation.engine import ReconciliationEngine
+from apps.reconciliation.models import PaymentMatch, ReconciliationItem, ReconciliationRecord
+from apps.reconciliation.services import CHUNK_SIZE, ReconciliationService
+
+
+class Command(BaseCommand):
+    help = "Benchmark reconciliation runs: throughput, query count and peak memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--master-email", required=True, help="Master email of the dataset to reconcile.")
+        parser.add_argument("--repeat", type=int, default=1, help="Number of runs (the dataset is reset between runs).")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Reconciliation chunk size.")
+        parser.add_argument("--shards", type=int, default=1, help="Run in parallel shards (queries of workers are not counted).")
+        parser.add_argument("--tracemalloc", action="store_true", help="Measure peak Python heap (slows the run down).")
+        parser.add_argument("--no-reset", action="store_true", help="Do not reset matches before the first run.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON lines.")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1 or options["shards"] < 1:
+            raise CommandError("--repeat and --shards must be at least 1.")
+
+        master = self._get_master(options["master_email"])
+        for run in range(options["repeat"]):
+            if run > 0 or not options["no_reset"]:
+                self._reset(master)
+            result = self._run(master, options)
+            result["run"] = run + 1
+            self._report(result, options["json"])
+
+    def _run(self, master, options):
+        service = ReconciliationService(chunk_size=options["chunk_size"])
+        if options["tracemalloc"]:
+            tracemalloc.start()
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            if options["shards"] > 1:
+                record = service.reconcile_parallel(master, options["shards"])
+            else:
+                record = service.reconcile(master)
+            elapsed = time.perf_counter() - started
+
+        heap_peak = None
+        if options["tracemalloc"]:
+            _, heap_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        if record.status != "completed":
+            raise CommandError(f"Reconciliation {record.id} {record.status}: {record.error_message}")
+
+        return {
+            "vendor": connection.vendor,
+            "status": record.status,
+            "payments": record.total_payments,
+            "matched": record.matched_payments,
+            "seconds": round(elapsed, 3),
+            "payments_per_second": round(record.total_payments / elapsed, 1) if elapsed else None,
+            "queries": len(queries),
+            "peak_rss_mb": round(self._peak_rss_mb(), 1),
+            "peak_heap_mb": round(heap_peak / 1024 / 1024, 1) if heap_peak is not None else None,
+        }
+
+    def _reset(self, master):
+        """Undo previous runs so every run reconciles the same rows."""
+        with transaction.atomic():
+            items = ReconciliationItem.objects.filter(master=master)
+            # Amount matches copied the payment reference onto the collection
+            Collection.objects.filter(
+                id__in=items.exclude(rule=ReconciliationEngine.RULE_REFERENCE).values("collection_id")
+            ).update(transaction_reference=None)
+            Collection.objects.filter(id__in=items.values("collection_id")).update(
+                status="pending", paid_at=None, payment_method=None
+            )
+            PaymentMatch.objects.filter(master=master, is_matched=True).update(
+                is_matched=False, matched_collection=None, matched_at=None
+            )
+            items.delete()
+            ReconciliationRecord.objects.filter(master=master).delete()
+
+    def _report(self, result, as_json):
+        if as_json:
+            self.stdout.write(json.dumps(result))
+            return
+
+        heap = f", heap peak {result['peak_heap_mb']} MB" if result["peak_heap_mb"] is not None else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"Run {result['run']} ({result['vendor']}): {result['payments']} payments, {result['matched']} matched "
+            f"in {result['seconds']}s = {result['payments_per_second']} payments/s, "
+            f"{result['queries']} queries, RSS peak {result['peak_rss_mb']} MB{heap}"
+        ))
+
+    @staticmethod
+    def _peak_rss_mb():
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+    def _get_master(self, email: str) -> Master:
+        try:
+            return Master.objects.get(email=email)
+        except Master.DoesNotExist as exc:
+            raise CommandError(f"Master not found: {email}") from exc
@@ -0,0 +1,135 @@
+"""
+Generate a synthetic reconciliation dataset for benchmarking.
+
+Creates masters, agents, pending collections and unmatched payments at a
+configurable scale with bulk inserts. A share of the payments has a
+matching collection (some of them pre-filled with the payment reference),
+the rest are left for manual review, and extra collections stay pending.
+
+Usage:
+    python manage.py generate_reconciliation_dataset --payments 100000
+    python manage.py generate_reconciliation_dataset --payments 1000000 --masters 2 --clear
+"""
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.agents.models import Agent
+from apps.collections.models import Collection
+from apps.masters.models import Master
+from apps.reconciliation.models import PaymentMatch
+
+
+DATASET_EMAIL_DOMAIN = "bench.sentreso.test"
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic masters, agents, collections and payments for reconciliation benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--masters", type=int, default=1, help="Number of masters to create.")
+        parser.add_argument("--payments", type=int, default=10000, help="Unmatched payments per master.")
+        parser.add_argument("--payments-per-agent", type=int, default=50, help="Average payments per agent.")
+        parser.add_argument("--match-rate", type=float, default=0.8, help="Share of payments with a matching collection.")
+        parser.add_argument("--reference-rate", type=float, default=0.3, help="Share of matching collections pre-filled with the payment reference.")
+        parser.add_argument("--extra-collections", type=float, default=0.2, help="Extra unmatched pending collections, as a share of payments.")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per bulk insert.")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+        parser.add_argument("--clear", action="store_true", help="Delete previously generated datasets first.")
+
+    def handle(self, *args, **options):
+        if options["payments"] < 1 or options["masters"] < 1:
+            raise CommandError("--payments and --masters must be at least 1.")
+
+        if options["clear"]:
+            deleted, _ = Master.objects.filter(email__endswith=f"@{DATASET_EMAIL_DOMAIN}").delete()
+            self.stdout.write(self.style.WARNING(f"Deleted {deleted} rows from previous datasets."))
+
+        rng = random.Random(options["seed"])
+        start_index = Master.objects.filter(email__endswith=f"@{DATASET_EMAIL_DOMAIN}").count()
+        for index in range(start_index, start_index + options["masters"]):
+            master = Master.objects.create(
+                name=f"Benchmark Master {index}",
+                email=f"master-{index}@{DATASET_EMAIL_DOMAIN}",
+            )
+            self._generate_master(master, rng, options)
+            self.stdout.write(self.style.SUCCESS(f"Generated {master.email} ({master.id})"))
+
+    def _generate_master(self, master, rng, options):
+        batch_size = options["batch_size"]
+        payments = options["payments"]
+        agent_count = max(1, payments // max(1, options["payments_per_agent"]))
+
+        agent_ids = []
+        for start in range(0, agent_count, batch_size):
+            agents = [
+                Agent(
+                    master=master,
+                    name=f"Agent {idx}",
+                    whatsapp_number=f"+22170{idx:07d}",
+                    phone_number=f"+22170{idx:07d}",
+                )
+                for idx in range(start, min(start + batch_size, agent_count))
+            ]
+            Agent.objects.bulk_create(agents, batch_size=batch_size)
+            agent_ids.extend(agent.id for agent in agents)
+        self.stdout.write(f"  {len(agent_ids)} agents")
+
+        now = timezone.now()
+        collections = []
+        payment_rows = []
+        created_collections = 0
+        created_payments = 0
+        for idx in range(payments):
+            agent_id = rng.choice(agent_ids)
+            amount = Decimal(rng.randrange(1, 200) * 500)
+            reference = f"BENCH-{master.id.hex[:8]}-{idx:09d}"
+            received_at = now - timedelta(minutes=rng.randrange(0, 60 * 24 * 90))
+
+            if rng.random() < options["match_rate"]:
+                collections.append(Collection(
+                    master=master,
+                    agent_id=agent_id,
+                    amount=amount,
+                    status="pending",
+                    transaction_reference=reference if rng.random() < options["reference_rate"] else None,
+                    due_date=received_at + timedelta(days=rng.randrange(-5, 10)),
+                ))
+            payment_rows.append(PaymentMatch(
+                master=master,
+                agent_id=agent_id,
+                amount=amount,
+                transaction_reference=reference,
+                payment_method="mobile_money",
+                received_at=received_at,
+            ))
+
+            if rng.random() < options["extra_collections"]:
+                collections.append(Collection(
+                    master=master,
+                    agent_id=rng.choice(agent_ids),
+                    amount=Decimal(rng.randrange(1, 200) * 500),
+                    status="pending",
+                    due_date=now + timedelta(days=rng.randrange(0, 30)),
+                ))
+
+            if len(payment_rows) >= batch_size:
+                created_collections += self._flush(Collection, collections, batch_size)
+                created_payments += self._flush(PaymentMatch, payment_rows, batch_size)
+
+        created_collections += self._flush(Collection, collections, batch_size)
+        created_payments += self._flush(PaymentMatch, payment_rows, batch_size)
+        self.stdout.write(f"  {created_collections} pending collections, {created_payments} unmatched payments")
+
+    @staticmethod
+    def _flush(model, rows, batch_size):
+        """Bulk insert and empty a buffer of unsaved rows."""
+        count = len(rows)
+        if rows:
+            model.objects.bulk_create(rows, batch_size=batch_size)
+            rows.clear()
+        return count
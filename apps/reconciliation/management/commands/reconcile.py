@@ -0,0 +1,79 @@
+"""
+Run reconciliation for a master from the command line.
+
+Intended for scheduled (nightly) runs. With --shards the master's agents
+are split into parallel shards, run in a local process pool or, with
+--queue, as separate RQ jobs. With --incremental only the payments created
+since the master's last sweep are reconciled, which makes the command
+cheap enough to run every few minutes from cron.
+
+Usage:
+    python manage.py reconcile --master-email ops@example.com --shards 8
+    python manage.py reconcile --all-masters --incremental
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.masters.models import Master
+from apps.reconciliation.services import ReconciliationService
+
+
+class Command(BaseCommand):
+    help = "Reconcile unmatched payments for a master, optionally in parallel shards."
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--master-email", help="Master email to reconcile.")
+        target.add_argument("--all-masters", action="store_true", help="Reconcile every active master.")
+        parser.add_argument("--incremental", action="store_true", help="Only reconcile payments since the last sweep.")
+        parser.add_argument("--shards", type=int, default=1, help="Number of agent shards to run in parallel.")
+        parser.add_argument("--workers", type=int, help="Process pool size (defaults to --shards).")
+        parser.add_argument("--queue", action="store_true", help="Queue the run on RQ instead of running it here.")
+
+    def handle(self, *args, **options):
+        shards = options["shards"]
+        if shards < 1:
+            raise CommandError("--shards must be at least 1.")
+        if options["incremental"] and (shards > 1 or options["queue"]):
+            raise CommandError("--incremental cannot be combined with --shards or --queue.")
+
+        if options["all_masters"]:
+            masters = Master.objects.filter(is_active=True)
+        else:
+            masters = [self._get_master(options["master_email"])]
+
+        failed = 0
+        for master in masters:
+            record = self._reconcile(master, options)
+            if record.status == "failed":
+                failed += 1
+                self.stdout.write(self.style.ERROR(
+                    f"{master.name}: reconciliation {record.id} failed: {record.error_message}"
+                ))
+            elif record.status == "running":
+                self.stdout.write(self.style.SUCCESS(f"{master.name}: queued reconciliation {record.id}."))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{master.name}: reconciliation {record.id} completed: {record.matched_payments} matched, "
+                    f"{record.unmatched_payments} unmatched of {record.total_payments} payments."
+                ))
+
+        if failed:
+            raise CommandError(f"{failed} reconciliation(s) failed.")
+
+    def _reconcile(self, master, options):
+        service = ReconciliationService()
+        shards = options["shards"]
+        if options["incremental"]:
+            return service.sweep(master)
+        if options["queue"]:
+            return service.start(master, shards=shards)
+        if shards > 1:
+            return service.reconcile_parallel(master, shards, max_workers=options.get("workers"))
+        return service.reconcile(master)
+
+    def _get_master(self, email: str) -> Master:
+        try:
+            return Master.objects.get(email=email)
+        except Master.DoesNotExist as exc:
+            raise CommandError(f"Master not found: {email}") from exc
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reconciliationrecord',
+            name='estimated_completion_at',
+            field=models.DateTimeField(blank=True, help_text='Estimated completion time while running', null=True),
+        ),
+        migrations.AddField(
+            model_name='reconciliationrecord',
+            name='processed_payments',
+            field=models.IntegerField(default=0, help_text='Payments processed so far while running'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0002_reconciliationrecord_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reconciliationrecord',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='If set, this record is one shard of a parallel reconciliation', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='reconciliation.reconciliationrecord'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('masters', '0001_initial'),
+        ('reconciliation', '0003_reconciliationrecord_parent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reconciliationrecord',
+            name='payments_since',
+            field=models.DateTimeField(blank=True, help_text='If set, only payments created after this time were reconciled (incremental sweep)', null=True),
+        ),
+        migrations.CreateModel(
+            name='ReconciliationWatermark',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('swept_at', models.DateTimeField(blank=True, help_text='Start time of the last successful sweep', null=True)),
+                ('last_record', models.ForeignKey(blank=True, help_text='Record of the last successful sweep', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='reconciliation.reconciliationrecord')),
+                ('master', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reconciliation_watermark', to='masters.master')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+    ]
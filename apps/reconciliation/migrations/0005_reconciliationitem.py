@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-17 03:54
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0001_initial'),
+        ('masters', '0001_initial'),
+        ('reconciliation', '0004_reconciliationwatermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationItem',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('rule', models.CharField(choices=[('reference', 'Transaction reference'), ('amount', 'Agent and amount')], help_text='Matching rule that paired them', max_length=20)),
+                ('amount_delta', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Payment amount minus collection amount', max_digits=12)),
+                ('collection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reconciliation_items', to='collections.collection')),
+                ('master', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reconciliation_items', to='masters.master')),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reconciliation_items', to='reconciliation.paymentmatch')),
+                ('record', models.ForeignKey(blank=True, help_text='Run that took the decision; empty for incremental matches made as payments arrive', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='reconciliation.reconciliationrecord')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['record', 'rule'], name='reconciliat_record__06497f_idx'), models.Index(fields=['master', 'created_at'], name='reconciliat_master__51d43a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:04
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('masters', '0001_initial'),
+        ('reconciliation', '0005_reconciliationitem'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reconciliationitem',
+            name='rule',
+            field=models.CharField(choices=[('reference', 'Transaction reference'), ('amount', 'Agent and amount'), ('tolerance', 'Agent and amount within tolerance')], help_text='Matching rule that paired them', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='MatchingRule',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('amount_tolerance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Accepted difference between payment and collection amounts (FCFA)', max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))])),
+                ('due_date_window_days', models.PositiveIntegerField(blank=True, help_text='If set, payments only match collections due within this many days of receipt', null=True)),
+                ('master', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='matching_rule', to='masters.master')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+    ]
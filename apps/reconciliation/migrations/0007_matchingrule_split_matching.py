@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0006_matchingrule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchingrule',
+            name='split_matching',
+            field=models.BooleanField(default=False, help_text='Match one payment to several collections and several payments to one collection'),
+        ),
+        migrations.AlterField(
+            model_name='reconciliationitem',
+            name='rule',
+            field=models.CharField(choices=[('reference', 'Transaction reference'), ('amount', 'Agent and amount'), ('tolerance', 'Agent and amount within tolerance'), ('split', 'Several payments for one collection'), ('aggregate', 'One payment for several collections')], help_text='Matching rule that paired them', max_length=20),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:10
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def blank_references_to_null(apps, schema_editor):
+    """Payments without a reference store NULL, which the constraint ignores."""
+    PaymentMatch = apps.get_model('reconciliation', 'PaymentMatch')
+    PaymentMatch.objects.filter(transaction_reference='').update(transaction_reference=None)
+
+
+def dedupe_references(apps, schema_editor):
+    """
+    Payments sharing a reference with another payment of the same master get
+    a -dupN suffix, keeping the reference on the matched (then most recent)
+    one, so the constraint can be created without deleting anything.
+    """
+    PaymentMatch = apps.get_model('reconciliation', 'PaymentMatch')
+    duplicates = (
+        PaymentMatch.objects.filter(transaction_reference__isnull=False)
+        .values('master_id', 'transaction_reference')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        payments = PaymentMatch.objects.filter(
+            master_id=duplicate['master_id'],
+            transaction_reference=duplicate['transaction_reference'],
+        ).order_by('-is_matched', '-updated_at')
+        for index, payment in enumerate(payments[1:], start=1):
+            payment.transaction_reference = f"{payment.transaction_reference}-dup{index}"
+            payment.save(update_fields=['transaction_reference'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0007_matchingrule_split_matching'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='paymentmatch',
+            name='transaction_reference',
+            field=models.CharField(blank=True, db_index=True, help_text='External transaction reference (e.g., MTN20241228123456)', max_length=255, null=True),
+        ),
+        migrations.RunPython(blank_references_to_null, migrations.RunPython.noop),
+        migrations.RunPython(dedupe_references, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='paymentmatch',
+            constraint=models.UniqueConstraint(fields=('master', 'transaction_reference'), name='unique_payment_reference_per_master'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-17 05:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reconciliation', '0008_unique_payment_reference'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reconciliationitem',
+            index=models.Index(fields=['record', 'created_at'], name='reconciliat_record__b12179_idx'),
+        ),
+    ]
@@ -2,7 +2,10 @@
 Reconciliation models for matching payments to collections.
 """
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from apps.core.models import BaseModel
@@ -36,6 +39,8 @@ class PaymentMatch(BaseModel):
     )
     transaction_reference = models.CharField(
         max_length=255,
+        blank=True,
+        null=True,
         db_index=True,
         help_text='External transaction reference (e.g., MTN20241228123456)'
     )
@@ -65,6 +70,13 @@ class PaymentMatch(BaseModel):
             models.Index(fields=['transaction_reference']),
             models.Index(fields=['is_matched', 'received_at']),
         ]
+        constraints = [
+            # NULLs are distinct, so only reference-bearing payments are constrained
+            models.UniqueConstraint(
+                fields=['master', 'transaction_reference'],
+                name='unique_payment_reference_per_master',
+            ),
+        ]
 
     def __str__(self):
         status = "Matched" if self.is_matched else "Unmatched"
@@ -76,6 +88,8 @@ class ReconciliationRecord(BaseModel):
     ReconciliationRecord model - represents a reconciliation run.
 
     Tracks when reconciliation was performed and its results.
+    A parallel run is a parent record whose shards each cover a slice of
+    the master's agents; the parent holds the totals once every shard finishes.
     """
 
     STATUS_CHOICES = [
@@ -93,10 +107,19 @@ class ReconciliationRecord(BaseModel):
         blank=True,
         help_text='If set, reconciliation was for this agent only'
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        related_name='shards',
+        null=True,
+        blank=True,
+        help_text='If set, this record is one shard of a parallel reconciliation'
+    )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
     started_at = models.DateTimeField(help_text='When reconciliation started')
     completed_at = models.DateTimeField(blank=True, null=True, help_text='When reconciliation completed')
     total_payments = models.IntegerField(default=0, help_text='Total payments processed')
+    processed_payments = models.IntegerField(default=0, help_text='Payments processed so far while running')
     matched_payments = models.IntegerField(default=0, help_text='Number of payments matched')
     unmatched_payments = models.IntegerField(default=0, help_text='Number of payments not matched')
     total_amount = models.DecimalField(
@@ -105,6 +128,16 @@ class ReconciliationRecord(BaseModel):
         default=Decimal('0.00'),
         help_text='Total amount processed'
     )
+    payments_since = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text='If set, only payments created after this time were reconciled (incremental sweep)'
+    )
+    estimated_completion_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text='Estimated completion time while running'
+    )
     error_message = models.TextField(blank=True, null=True, help_text='Error message if reconciliation failed')
     notes = models.TextField(blank=True, null=True, help_text='Additional notes')
 
@@ -120,9 +153,124 @@ class ReconciliationRecord(BaseModel):
         return f"Reconciliation {self.id} - {self.get_status_display()}"
 
 
+class ReconciliationItem(BaseModel):
+    """
+    ReconciliationItem model - one matching decision taken by a reconciliation.
+
+    Records which payment settled which collection, the rule that paired
+    them and the amount difference, for audit drill-down.
+    """
+
+    RULE_CHOICES = [
+        ('reference', 'Transaction reference'),
+        ('amount', 'Agent and amount'),
+        ('tolerance', 'Agent and amount within tolerance'),
+        ('split', 'Several payments for one collection'),
+        ('aggregate', 'One payment for several collections'),
+    ]
+
+    record = models.ForeignKey(
+        ReconciliationRecord,
+        on_delete=models.CASCADE,
+        related_name='items',
+        null=True,
+        blank=True,
+        help_text='Run that took the decision; empty for incremental matches made as payments arrive'
+    )
+    master = models.ForeignKey(Master, on_delete=models.CASCADE, related_name='reconciliation_items')
+    payment = models.ForeignKey(PaymentMatch, on_delete=models.CASCADE, related_name='reconciliation_items')
+    collection = models.ForeignKey(Collection, on_delete=models.CASCADE, related_name='reconciliation_items')
+    rule = models.CharField(max_length=20, choices=RULE_CHOICES, help_text='Matching rule that paired them')
+    amount_delta = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text='Payment amount minus collection amount'
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['record', 'rule']),
+            models.Index(fields=['record', 'created_at']),
+            models.Index(fields=['master', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.payment_id} -> {self.collection_id} ({self.rule})"
+
+
+class ReconciliationWatermark(BaseModel):
+    """
+    ReconciliationWatermark model - per-master high-water mark for sweeps.
+
+    Incremental sweeps only look at payments created after the previous
+    successful sweep started, instead of rescanning every unmatched payment.
+    """
+    master = models.OneToOneField(Master, on_delete=models.CASCADE, related_name='reconciliation_watermark')
+    swept_at = models.DateTimeField(blank=True, null=True, help_text='Start time of the last successful sweep')
+    last_record = models.ForeignKey(
+        ReconciliationRecord,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True,
+        help_text='Record of the last successful sweep'
+    )
+
+    def __str__(self):
+        return f"Watermark {self.master.name} - {self.swept_at}"
+
 
+class MatchingRule(BaseModel):
+    """
+    MatchingRule model - per-master settings of the amount matching pass.
 
+    Mobile-money payments often differ from the collection amount by fees
+    or rounding; a tolerance lets them match the closest pending amount.
+    A due-date window keeps payments from settling collections due long
+    before or after they were received. Split matching settles a collection
+    paid in several transfers, or several collections paid in one.
+    """
+    master = models.OneToOneField(Master, on_delete=models.CASCADE, related_name='matching_rule')
+    amount_tolerance = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        validators=[MinValueValidator(Decimal('0.00'))],
+        help_text='Accepted difference between payment and collection amounts (FCFA)'
+    )
+    due_date_window_days = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text='If set, payments only match collections due within this many days of receipt'
+    )
+    split_matching = models.BooleanField(
+        default=False,
+        help_text='Match one payment to several collections and several payments to one collection'
+    )
 
+    def __str__(self):
+        return f"Matching rule {self.master.name} - ±{self.amount_tolerance} FCFA"
 
 
+@receiver(post_save, sender=PaymentMatch)
+def queue_incremental_match(sender, instance, created, **kwargs):
+    """
+    Signal to match a new unmatched payment as soon as it is committed.
+
+    Bulk inserts bypass signals. PaymentIngestionService, which the import
+    command and background imports go through, creates its payments
+    matched to their collection and queues the few it leaves unmatched
+    through ReconciliationService.queue_incremental_match once committed.
+    Other bulk inserts (generate_reconciliation_dataset) are left to sweeps.
+    """
+    if not created or instance.is_matched:
+        return
+    if not getattr(settings, 'RECONCILIATION_INCREMENTAL', True):
+        return
 
+    # Imported here because the service module imports these models
+    from apps.reconciliation.services import ReconciliationService
+    payment_id = instance.id
+    transaction.on_commit(lambda: ReconciliationService.queue_incremental_match([payment_id]))
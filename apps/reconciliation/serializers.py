@@ -2,8 +2,9 @@
 Serializers for Reconciliation models.
 """
 
+from django.conf import settings
 from rest_framework import serializers
-from apps.reconciliation.models import PaymentMatch, ReconciliationRecord
+from apps.reconciliation.models import MatchingRule, PaymentMatch, ReconciliationItem, ReconciliationRecord
 from apps.collections.models import Collection
 from apps.agents.models import Agent
 
@@ -38,6 +39,18 @@ class PaymentMatchSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Agent not found or does not belong to your account.")
         return value
 
+    def validate_transaction_reference(self, value):
+        """Validate that no other payment of the master uses this reference."""
+        if not value:
+            return None
+        master = self.context['request'].master
+        payments = PaymentMatch.objects.filter(master=master, transaction_reference=value)
+        if self.instance:
+            payments = payments.exclude(id=self.instance.id)
+        if payments.exists():
+            raise serializers.ValidationError("A payment with this transaction reference already exists.")
+        return value
+
     def create(self, validated_data):
         """Create payment match and set master and agent automatically."""
         master = self.context['request'].master
@@ -53,26 +66,69 @@ class ReconciliationRecordSerializer(serializers.ModelSerializer):
     master_id = serializers.UUIDField(source='master.id', read_only=True)
     agent_id = serializers.UUIDField(source='agent.id', read_only=True, allow_null=True)
     agent_name = serializers.CharField(source='agent.name', read_only=True, allow_null=True)
+    parent_id = serializers.UUIDField(source='parent.id', read_only=True, allow_null=True)
 
     class Meta:
         model = ReconciliationRecord
         fields = (
             'id', 'master', 'master_id', 'agent', 'agent_id', 'agent_name',
-            'status', 'started_at', 'completed_at', 'total_payments',
-            'matched_payments', 'unmatched_payments', 'total_amount',
+            'parent_id', 'status', 'started_at', 'completed_at', 'total_payments',
+            'processed_payments', 'matched_payments', 'unmatched_payments',
+            'total_amount', 'payments_since', 'estimated_completion_at',
             'error_message', 'notes', 'created_at', 'updated_at'
         )
         read_only_fields = (
-            'id', 'master', 'master_id', 'agent_id', 'agent_name', 'status',
-            'started_at', 'completed_at', 'total_payments', 'matched_payments',
-            'unmatched_payments', 'total_amount', 'error_message',
+            'id', 'master', 'master_id', 'agent_id', 'agent_name', 'parent_id', 'status',
+            'started_at', 'completed_at', 'total_payments', 'processed_payments',
+            'matched_payments', 'unmatched_payments', 'total_amount',
+            'payments_since', 'estimated_completion_at', 'error_message',
+            'created_at', 'updated_at'
+        )
+
+
+class ReconciliationItemSerializer(serializers.ModelSerializer):
+    """Serializer for ReconciliationItem model."""
+    record_id = serializers.UUIDField(source='record.id', read_only=True, allow_null=True)
+    payment_id = serializers.UUIDField(source='payment.id', read_only=True)
+    collection_id = serializers.UUIDField(source='collection.id', read_only=True)
+    transaction_reference = serializers.CharField(source='payment.transaction_reference', read_only=True)
+    payment_amount = serializers.DecimalField(source='payment.amount', max_digits=12, decimal_places=2, read_only=True)
+    collection_amount = serializers.DecimalField(source='collection.amount', max_digits=12, decimal_places=2, read_only=True)
+    agent_name = serializers.CharField(source='payment.agent.name', read_only=True)
+
+    class Meta:
+        model = ReconciliationItem
+        fields = (
+            'id', 'record_id', 'payment_id', 'collection_id', 'agent_name',
+            'transaction_reference', 'payment_amount', 'collection_amount',
+            'rule', 'amount_delta', 'created_at'
+        )
+        read_only_fields = fields
+
+
+class MatchingRuleSerializer(serializers.ModelSerializer):
+    """Serializer for MatchingRule model."""
+    master_id = serializers.UUIDField(source='master.id', read_only=True)
+
+    class Meta:
+        model = MatchingRule
+        fields = (
+            'id', 'master_id', 'amount_tolerance', 'due_date_window_days', 'split_matching',
             'created_at', 'updated_at'
         )
+        read_only_fields = ('id', 'master_id', 'created_at', 'updated_at')
 
 
 class StartReconciliationSerializer(serializers.Serializer):
     """Serializer for starting a reconciliation."""
     agent_id = serializers.UUIDField(required=False, allow_null=True)
+    shards = serializers.IntegerField(
+        required=False,
+        default=1,
+        min_value=1,
+        max_value=getattr(settings, 'RECONCILIATION_MAX_SHARDS', 32),
+        help_text='Number of parallel shards to split the agents into'
+    )
 
     def validate_agent_id(self, value):
         """Validate that the agent belongs to the authenticated master if provided."""
@@ -84,3 +140,8 @@ class StartReconciliationSerializer(serializers.Serializer):
                 raise serializers.ValidationError("Agent not found or does not belong to your account.")
         return value
 
+    def validate(self, attrs):
+        """A single-agent reconciliation cannot be sharded."""
+        if attrs.get('agent_id') and attrs.get('shards', 1) > 1:
+            raise serializers.ValidationError({'shards': "Sharding is only available for master-wide reconciliation."})
+        return attrs
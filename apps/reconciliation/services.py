@@ -2,20 +2,61 @@
 Reconciliation service for matching payments to collections.
 """
 
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
 from django.utils import timezone
 from decimal import Decimal
-from apps.reconciliation.models import PaymentMatch, ReconciliationRecord
+from django_rq import get_queue
+from apps.reconciliation.engine import (
+    PendingCollection,
+    ReconciliationEngine,
+    UnmatchedPayment,
+    from_minor_units,
+    to_minor_units,
+)
+from apps.reconciliation.models import (
+    MatchingRule,
+    PaymentMatch,
+    ReconciliationItem,
+    ReconciliationRecord,
+    ReconciliationWatermark,
+)
+from apps.reconciliation.tasks import (
+    match_payments_task,
+    run_reconciliation_task,
+    send_collection_paid_webhooks_task,
+)
 from apps.collections.models import Collection
-from apps.core.webhooks import send_webhook
+from apps.agents.models import Agent
+from apps.core.locks import LockNotAcquired, redis_lock
+from apps.masters.models import Master
+
+
+logger = logging.getLogger(__name__)
+
+# Number of matches written per transaction, and rows fetched per round-trip
+# when streaming collections and payments.
+CHUNK_SIZE = 1000
 
 
 class ReconciliationService:
     """Service for reconciling payments with collections."""
 
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
     def reconcile(self, master, agent=None):
         """
         Reconcile payments for a master, optionally filtered by agent.
 
+        Runs synchronously in the calling process. Use start() to run the
+        reconciliation in a background worker instead.
+
         Args:
             master: Master instance
             agent: Optional Agent instance to filter by
@@ -23,111 +64,712 @@ class ReconciliationService:
         Returns:
             ReconciliationRecord: The reconciliation record
         """
-        # Create reconciliation record
-        record = ReconciliationRecord.objects.create(
+        record = self.create_record(master, agent=agent)
+        return self.run(record)
+
+    def sweep(self, master):
+        """
+        Reconcile only the payments created since the master's last sweep.
+
+        The watermark advances to the start of this sweep when it completes.
+        The next sweep re-reads a small overlap before the watermark so that
+        payments committed late by long transactions are not skipped.
+
+        Args:
+            master: Master instance
+
+        Returns:
+            ReconciliationRecord: The reconciliation record of the sweep
+        """
+        watermark, _ = ReconciliationWatermark.objects.get_or_create(master=master)
+        since = None
+        if watermark.swept_at:
+            overlap = getattr(settings, 'RECONCILIATION_WATERMARK_OVERLAP', 300)
+            since = watermark.swept_at - timedelta(seconds=overlap)
+
+        record = self.create_record(master, since=since)
+        record = self.run(record)
+        if record.status == 'completed':
+            watermark.swept_at = record.started_at
+            watermark.last_record = record
+            watermark.save(update_fields=['swept_at', 'last_record', 'updated_at'])
+        return record
+
+    def match_payments(self, payment_ids):
+        """
+        Match specific payments right away, without a ReconciliationRecord.
+
+        Used by the incremental path when payments arrive. Only the pending
+        collections of the payments' agents are loaded into the engine.
+
+        Args:
+            payment_ids: Iterable of PaymentMatch ids
+
+        Returns:
+            int: Number of payments matched
+        """
+        payments = PaymentMatch.objects.filter(id__in=list(payment_ids), is_matched=False)
+        matched_count = 0
+        for master in Master.objects.filter(id__in=payments.values('master_id')):
+            master_payments = payments.filter(master=master)
+            collections = Collection.objects.filter(
+                master=master,
+                status='pending',
+                agent_id__in=master_payments.values('agent_id'),
+            )
+
+            engine = self._build_engine(master)
+            for collection in self._stream_pending_collections(collections, master_payments):
+                engine.add_collection(collection)
+
+            pending_matches = []
+            for payment in self._stream_unmatched_payments(master_payments):
+                match = engine.match(payment)
+                if match:
+                    pending_matches.append(match)
+                if len(pending_matches) >= self.chunk_size:
+                    matched_count += self._write_matches(master, pending_matches)
+                    pending_matches = []
+            if engine.split_matching:
+                for group in engine.match_groups():
+                    pending_matches.extend(group)
+                    if len(pending_matches) >= self.chunk_size:
+                        matched_count += self._write_matches(master, pending_matches)
+                        pending_matches = []
+            if pending_matches:
+                matched_count += self._write_matches(master, pending_matches)
+
+        return matched_count
+
+    @staticmethod
+    def queue_incremental_match(payment_ids):
+        """
+        Queue incremental matching of newly created payments.
+
+        Matching is best-effort here: if the job cannot be queued the error
+        is logged and the payments stay unmatched until the next watermark
+        sweep (sweep(), run by ``reconcile --incremental``) picks them up.
+        """
+        payment_ids = [str(payment_id) for payment_id in payment_ids]
+        if not payment_ids:
+            return
+        try:
+            get_queue('high_priority').enqueue(match_payments_task, payment_ids=payment_ids)
+        except Exception:
+            logger.exception("Error queueing incremental reconciliation of payments %s", payment_ids)
+
+    def reconcile_parallel(self, master, shards, max_workers=None):
+        """
+        Reconcile a master's payments across a local process pool.
+
+        The master's agents are split into shards (see plan_shards), and
+        each shard runs in its own worker process. Agents never share
+        collections, so shards cannot contend for the same rows.
+
+        Args:
+            master: Master instance
+            shards: Number of shards to split the agents into
+            max_workers: Pool size, defaults to the number of shards
+
+        Returns:
+            ReconciliationRecord: The parent record holding the totals
+        """
+        parent, plan = self.create_sharded_records(master, shards)
+        if plan:
+            # Workers are forked from this process and must not inherit its
+            # open database connections.
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers or len(plan),
+                mp_context=multiprocessing.get_context('fork'),
+            )
+            with pool:
+                list(pool.map(
+                    run_reconciliation_task,
+                    [str(record.id) for record, _ in plan],
+                    [agent_range for _, agent_range in plan],
+                ))
+            # Every shard has exited; make sure the parent is rolled up even
+            # if a worker died before finalizing it.
+            return self._finalize_parent(parent.pk)
+        return parent
+
+    def start(self, master, agent=None, shards=1):
+        """
+        Queue a reconciliation run and return its record immediately.
+
+        The record is returned in running state; clients poll it for
+        progress while the worker processes the payments. With shards > 1
+        every shard is queued as its own job and the returned parent record
+        is completed by whichever shard finishes last.
+
+        Args:
+            master: Master instance
+            agent: Optional Agent instance to filter by
+            shards: Number of parallel shards (ignored when agent is set)
+
+        Returns:
+            ReconciliationRecord: The reconciliation record
+        """
+        if shards > 1 and agent is None:
+            parent, plan = self.create_sharded_records(master, shards)
+        else:
+            parent = self.create_record(master, agent=agent)
+            plan = [(parent, None)]
+
+        try:
+            queue = get_queue('default')
+            for record, agent_range in plan:
+                queue.enqueue(
+                    run_reconciliation_task,
+                    record_id=str(record.id),
+                    agent_range=agent_range,
+                    job_timeout=getattr(settings, 'RECONCILIATION_JOB_TIMEOUT', 3600),
+                )
+        except Exception as e:
+            error_message = f"Could not queue reconciliation: {e}"
+            for record, _ in plan:
+                if record.pk != parent.pk:
+                    self._fail(record, error_message)
+            self._fail(parent, error_message)
+        return parent
+
+    def plan_shards(self, master, shards):
+        """
+        Split a master's agents into contiguous agent id ranges.
+
+        Only agents with unmatched payments are considered, and the ranges
+        are cut so that each shard gets roughly the same number of payments.
+
+        Args:
+            master: Master instance
+            shards: Maximum number of ranges to return
+
+        Returns:
+            list: (first_agent_id, last_agent_id) string tuples, inclusive
+        """
+        counts = list(
+            self._unmatched_payments(master)
+            .values('agent_id')
+            .annotate(payments=Count('id'))
+            .order_by('agent_id')
+            .values_list('agent_id', 'payments')
+        )
+        if not counts:
+            return []
+
+        remaining = sum(payments for _, payments in counts)
+        ranges = []
+        first_agent_id = None
+        assigned = 0
+        for index, (agent_id, payments) in enumerate(counts):
+            if first_agent_id is None:
+                first_agent_id = agent_id
+            assigned += payments
+            # Re-balance against what is left so the last shard isn't starved
+            target = remaining / (shards - len(ranges))
+            is_last = index == len(counts) - 1
+            if is_last or (assigned >= target and len(ranges) < shards - 1):
+                ranges.append((str(first_agent_id), str(agent_id)))
+                remaining -= assigned
+                first_agent_id = None
+                assigned = 0
+        return ranges
+
+    def create_sharded_records(self, master, shards):
+        """
+        Create a parent record and one running shard record per agent range.
+
+        Returns:
+            tuple: (parent record, list of (shard record, agent range))
+        """
+        parent = self.create_record(master)
+        ranges = self.plan_shards(master, shards)
+        if not ranges:
+            parent.status = 'completed'
+            parent.completed_at = timezone.now()
+            parent.save()
+            return parent, []
+
+        records = ReconciliationRecord.objects.bulk_create([
+            ReconciliationRecord(
+                master=master,
+                parent=parent,
+                status='running',
+                started_at=parent.started_at,
+            )
+            for _ in ranges
+        ])
+        return parent, list(zip(records, ranges))
+
+    def create_record(self, master, agent=None, since=None):
+        """Create the running ReconciliationRecord for a new run."""
+        return ReconciliationRecord.objects.create(
             master=master,
             agent=agent,
+            payments_since=since,
             status='running',
             started_at=timezone.now()
         )
 
+    def run(self, record, agent_range=None):
+        """
+        Execute a reconciliation run for an existing record.
+
+        Pending collections and unmatched payments are each loaded in a
+        single streaming query and matched in memory by the engine. Matches
+        are written back with bulk updates, one transaction per chunk, and
+        the record's progress fields are refreshed after every chunk.
+
+        Args:
+            record: ReconciliationRecord in running state
+            agent_range: Optional inclusive (first, last) agent id range,
+                used by shards of a parallel run
+
+        Returns:
+            ReconciliationRecord: The updated reconciliation record
+        """
         try:
-            # Get unmatched payments
-            payments = PaymentMatch.objects.filter(
-                master=master,
-                is_matched=False
+            if record.parent_id:
+                # Shards cover disjoint agent ranges and rely on row claims
+                record = self._run(record, agent_range)
+            else:
+                with self._master_lock(record.master):
+                    record = self._run(record, agent_range)
+        except LockNotAcquired:
+            record = self._fail(record, "Another reconciliation is already running for this master.")
+        except Exception as e:
+            record = self._fail(record, str(e))
+
+        if record.parent_id:
+            self._finalize_parent(record.parent_id)
+        return record
+
+    def _run(self, record, agent_range):
+        """Match and write the payments of a run; errors propagate to run()."""
+        master = record.master
+        agent = record.agent
+        since = record.payments_since
+        payments = self._unmatched_payments(master, agent, agent_range, since)
+
+        expected_payments = payments.count()
+        ReconciliationRecord.objects.filter(pk=record.pk).update(
+            total_payments=expected_payments,
+            updated_at=timezone.now(),
+        )
+
+        engine = self._build_engine(master)
+        collections = self._pending_collections(master, agent, agent_range, since)
+        for collection in self._stream_pending_collections(collections, payments):
+            engine.add_collection(collection)
+
+        total_payments = 0
+        matched_count = 0
+        total_amount = Decimal('0.00')
+        pending_matches = []
+
+        for payment in self._stream_unmatched_payments(payments):
+            total_payments += 1
+            total_amount += payment.amount
+            match = engine.match(payment)
+            if match:
+                pending_matches.append(match)
+            if len(pending_matches) >= self.chunk_size:
+                matched_count += self._write_matches(master, pending_matches, record)
+                pending_matches = []
+            if total_payments % self.chunk_size == 0:
+                self._report_progress(
+                    record,
+                    processed=total_payments,
+                    matched=matched_count + len(pending_matches),
+                    expected=expected_payments,
+                )
+
+        # Groups are appended whole so a chunk never splits one
+        if engine.split_matching:
+            for group in engine.match_groups():
+                pending_matches.extend(group)
+                if len(pending_matches) >= self.chunk_size:
+                    matched_count += self._write_matches(master, pending_matches, record)
+                    pending_matches = []
+
+        if pending_matches:
+            matched_count += self._write_matches(master, pending_matches, record)
+
+        # Update record
+        record.status = 'completed'
+        record.completed_at = timezone.now()
+        record.total_payments = total_payments
+        record.processed_payments = total_payments
+        record.matched_payments = matched_count
+        record.unmatched_payments = total_payments - matched_count
+        record.total_amount = total_amount
+        record.estimated_completion_at = None
+        record.save()
+
+        return record
+
+    @staticmethod
+    def _build_engine(master):
+        """Create a matching engine configured with the master's matching rule."""
+        rule = MatchingRule.objects.filter(master=master).first() or MatchingRule(master=master)
+
+        window = None
+        if rule.due_date_window_days is not None:
+            window = timedelta(days=rule.due_date_window_days)
+        return ReconciliationEngine(
+            amount_tolerance_minor=to_minor_units(rule.amount_tolerance),
+            due_date_window=window,
+            split_matching=rule.split_matching,
+            split_max_candidates=getattr(settings, 'RECONCILIATION_SPLIT_MAX_CANDIDATES', 20),
+            split_max_parts=getattr(settings, 'RECONCILIATION_SPLIT_MAX_PARTS', 4),
+            split_time_budget=getattr(settings, 'RECONCILIATION_SPLIT_TIME_BUDGET_MS', 50) / 1000,
+        )
+
+    @staticmethod
+    def _master_lock(master):
+        """
+        Per-master run lock shared by every worker through Redis.
+
+        It keeps master-wide runs from overlapping and wasting work. It is
+        not what prevents double matches (row claims in _write_matches do
+        that), so runs proceed unlocked if Redis is unreachable.
+        """
+        return redis_lock(
+            f"reconciliation:master:{master.id}",
+            timeout=getattr(settings, 'RECONCILIATION_JOB_TIMEOUT', 3600),
+            fail_open=True,
+        )
+
+    @staticmethod
+    def _fail(record, error_message):
+        """Mark a record as failed."""
+        record.status = 'failed'
+        record.completed_at = timezone.now()
+        record.estimated_completion_at = None
+        record.error_message = error_message
+        record.save()
+        return record
+
+    @staticmethod
+    def _report_progress(record, processed, matched, expected):
+        """
+        Store live progress on the record without touching its other fields.
+
+        The ETA extrapolates the throughput observed so far over the
+        payments that remain.
+        """
+        now = timezone.now()
+        eta = None
+        if processed and expected > processed:
+            elapsed = now - record.started_at
+            eta = now + elapsed * ((expected - processed) / processed)
+
+        ReconciliationRecord.objects.filter(pk=record.pk).update(
+            processed_payments=processed,
+            matched_payments=matched,
+            estimated_completion_at=eta,
+            updated_at=now,
+        )
+
+    def _finalize_parent(self, parent_id):
+        """
+        Roll shard results up into their parent record.
+
+        Called by every shard when it finishes. The parent row is locked so
+        that concurrently finishing shards update it one at a time; the
+        shard that sees no sibling still running completes the parent.
+        """
+        with transaction.atomic():
+            parent = ReconciliationRecord.objects.select_for_update().get(pk=parent_id)
+            if parent.status != 'running':
+                return parent
+
+            totals = parent.shards.aggregate(
+                shard_count=Count('id'),
+                running=Count('id', filter=Q(status='running')),
+                failed=Count('id', filter=Q(status='failed')),
+                total_payments=Sum('total_payments'),
+                processed_payments=Sum('processed_payments'),
+                matched_payments=Sum('matched_payments'),
+                unmatched_payments=Sum('unmatched_payments'),
+                total_amount=Sum('total_amount'),
             )
-            if agent:
-                payments = payments.filter(agent=agent)
-
-            total_payments = payments.count()
-            matched_count = 0
-            unmatched_count = 0
-            total_amount = Decimal('0.00')
-
-            for payment in payments:
-                total_amount += payment.amount
-                matched = self._match_payment(payment)
-                if matched:
-                    matched_count += 1
+            parent.total_payments = totals['total_payments'] or 0
+            parent.processed_payments = totals['processed_payments'] or 0
+            parent.matched_payments = totals['matched_payments'] or 0
+            parent.unmatched_payments = totals['unmatched_payments'] or 0
+            parent.total_amount = totals['total_amount'] or Decimal('0.00')
+
+            if not totals['running']:
+                parent.completed_at = timezone.now()
+                if totals['failed']:
+                    parent.status = 'failed'
+                    parent.error_message = f"{totals['failed']} of {totals['shard_count']} shards failed"
                 else:
-                    unmatched_count += 1
+                    parent.status = 'completed'
+            parent.save()
+            return parent
 
-            # Update record
-            record.status = 'completed'
-            record.completed_at = timezone.now()
-            record.total_payments = total_payments
-            record.matched_payments = matched_count
-            record.unmatched_payments = unmatched_count
-            record.total_amount = total_amount
-            record.save()
+    @staticmethod
+    def _in_scope(queryset, agent=None, agent_range=None):
+        """Restrict a queryset to a single agent or an inclusive agent id range."""
+        if agent:
+            queryset = queryset.filter(agent=agent)
+        if agent_range:
+            first_agent_id, last_agent_id = agent_range
+            queryset = queryset.filter(agent_id__gte=first_agent_id, agent_id__lte=last_agent_id)
+        return queryset
 
-            return record
+    def _unmatched_payments(self, master, agent=None, agent_range=None, since=None):
+        """Queryset of the unmatched payments in scope for a run."""
+        payments = PaymentMatch.objects.filter(master=master, is_matched=False)
+        if since:
+            payments = payments.filter(created_at__gt=since)
+        return self._in_scope(payments, agent, agent_range)
 
-        except Exception as e:
-            record.status = 'failed'
-            record.completed_at = timezone.now()
-            record.error_message = str(e)
-            record.save()
-            return record
+    def _pending_collections(self, master, agent=None, agent_range=None, since=None):
+        """
+        Queryset of the pending collections in scope for a run.
 
-    def _match_payment(self, payment):
+        Incremental runs only load the collections of agents that have a
+        payment newer than the watermark.
         """
-        Match a payment to a collection.
+        collections = Collection.objects.filter(master=master, status='pending')
+        if since:
+            collections = collections.filter(
+                agent_id__in=self._unmatched_payments(master, agent, agent_range, since).values('agent_id')
+            )
+        return self._in_scope(collections, agent, agent_range)
+
+    def _stream_pending_collections(self, collections, payments):
+        """
+        Stream pending collections, oldest due date first.
+
+        The same query joins each collection to the unmatched payments on
+        (agent, transaction_reference), so the engine's reference pass needs
+        no extra round-trip.
+
+        Args:
+            collections: Queryset of pending collections
+            payments: Queryset of the unmatched payments being reconciled
+
+        Yields:
+            PendingCollection: One per pending collection
+        """
+        referenced = Exists(payments.filter(
+            agent_id=OuterRef('agent_id'),
+            transaction_reference=OuterRef('transaction_reference'),
+        ))
+        rows = (
+            collections
+            .annotate(referenced=referenced)
+            .order_by('due_date', 'created_at')
+            .values_list('id', 'agent_id', 'amount', 'transaction_reference', 'referenced', 'due_date')
+            .iterator(chunk_size=self.chunk_size)
+        )
+        for collection_id, agent_id, amount, reference, is_referenced, due_date in rows:
+            yield PendingCollection(
+                id=collection_id,
+                agent_id=agent_id,
+                amount_minor=to_minor_units(amount),
+                transaction_reference=reference if is_referenced else None,
+                due_date=due_date,
+            )
+
+    def _stream_unmatched_payments(self, payments):
+        """
+        Stream unmatched payments, oldest first.
+
+        Yields:
+            UnmatchedPayment: One per unmatched payment
+        """
+        rows = (
+            payments
+            .order_by('received_at', 'created_at')
+            .values_list('id', 'agent_id', 'amount', 'transaction_reference', 'payment_method', 'received_at')
+            .iterator(chunk_size=self.chunk_size)
+        )
+        for payment_id, agent_id, amount, reference, payment_method, received_at in rows:
+            yield UnmatchedPayment(
+                id=payment_id,
+                agent_id=agent_id,
+                amount=amount,
+                transaction_reference=reference,
+                payment_method=payment_method,
+                received_at=received_at,
+            )
+
+    def _write_matches(self, master, matches, record=None):
+        """
+        Persist a chunk of matches in a single transaction.
+
+        The chunk's payments and collections are claimed first with
+        SELECT ... FOR UPDATE SKIP LOCKED, re-checking that they are still
+        unmatched and pending. A match is written only if both of its rows
+        were claimed, and a split or aggregate group only if all of its
+        matches were; rows locked or already settled by a concurrent worker
+        are left for the next run. Claimed rows are written with one bulk
+        update each, every decision is stored as a ReconciliationItem with
+        one bulk insert, and the collection.paid webhooks for the chunk are
+        queued once the transaction commits.
 
         Args:
-            payment: PaymentMatch instance
+            master: Master instance
+            matches: List of engine Match instances
+            record: ReconciliationRecord the items are filed under, if any
 
         Returns:
-            bool: True if payment was matched, False otherwise
-        """
-        # Find pending collections for this agent
-        collections = Collection.objects.filter(
-            agent=payment.agent,
-            master=payment.master,
-            status='pending'
-        ).order_by('due_date', 'created_at')
-
-        # Try to match by exact amount first
-        for collection in collections:
-            if collection.amount == payment.amount:
-                # Match found!
-                payment.is_matched = True
-                payment.matched_collection = collection
-                payment.matched_at = timezone.now()
-                payment.save()
-
-                # Mark collection as paid
-                collection.mark_as_paid(
-                    transaction_reference=payment.transaction_reference,
-                    payment_method=payment.payment_method,
-                    notes=f"Matched via reconciliation: {payment.id}"
-                )
+            int: Number of payments matched
+        """
+        with transaction.atomic():
+            matches = self._claim(matches)
+            if matches:
+                self._update_matched_rows(master, matches, record)
+        return len({match.payment.id for match in matches})
 
-                # Send webhook
-                send_webhook(
-                    master=payment.master,
-                    event='collection.paid',
-                    data={
-                        'collection_id': str(collection.id),
-                        'agent_name': collection.agent.name,
-                        'amount': str(collection.amount),
-                        'status': collection.status,
-                        'transaction_reference': payment.transaction_reference,
-                        'payment_method': payment.payment_method,
-                        'paid_at': collection.paid_at.isoformat() if collection.paid_at else None,
-                    }
-                )
+    @staticmethod
+    def _claim(matches):
+        """Lock the rows of a chunk and drop matches another worker got to first."""
+        payment_ids = set(
+            PaymentMatch.objects.select_for_update(skip_locked=True)
+            .filter(id__in=[match.payment.id for match in matches], is_matched=False)
+            .values_list('id', flat=True)
+        )
+        collection_ids = set(
+            Collection.objects.select_for_update(skip_locked=True)
+            .filter(id__in=[match.collection.id for match in matches], status='pending')
+            .values_list('id', flat=True)
+        )
+        claimed = [
+            match for match in matches
+            if match.payment.id in payment_ids and match.collection.id in collection_ids
+        ]
+        if len(claimed) == len(matches):
+            return claimed
 
-                return True
+        broken_groups = {
+            match.group for match in matches
+            if match.group is not None
+            and (match.payment.id not in payment_ids or match.collection.id not in collection_ids)
+        }
+        return [match for match in claimed if match.group not in broken_groups]
 
-        # No exact match found
-        return False
+    def _update_matched_rows(self, master, matches, record):
+        """
+        Bulk-update the claimed rows of a chunk and record one
+        ReconciliationItem per match; must run inside the chunk's transaction.
 
+        A payment of an aggregate group points at the group's first
+        collection, and a collection of a split group takes the reference of
+        the group's first payment; the items hold every pair.
 
+        A collection only takes the payment reference if there is one and no
+        collection of the master holds it yet, as references are unique per
+        master.
+        """
+        now = timezone.now()
+        taken_references = set(
+            Collection.objects.filter(
+                master=master,
+                transaction_reference__in={match.payment.transaction_reference for match in matches},
+            ).values_list('transaction_reference', flat=True)
+        )
+        payments = {}
+        collections = {}
+        for match in matches:
+            payment = match.payment
+            payments.setdefault(payment.id, PaymentMatch(
+                id=payment.id,
+                is_matched=True,
+                matched_collection_id=match.collection.id,
+                matched_at=now,
+                updated_at=now,
+            ))
+            if match.collection.id in collections:
+                continue
+            reference = F('transaction_reference')
+            if payment.transaction_reference and payment.transaction_reference not in taken_references:
+                reference = payment.transaction_reference
+                taken_references.add(reference)
+            collections[match.collection.id] = Collection(
+                id=match.collection.id,
+                status='paid',
+                paid_at=now,
+                transaction_reference=reference,
+                payment_method=payment.payment_method,
+                updated_at=now,
+            )
 
+        PaymentMatch.objects.bulk_update(
+            list(payments.values()),
+            ['is_matched', 'matched_collection', 'matched_at', 'updated_at'],
+        )
+        Collection.objects.bulk_update(
+            list(collections.values()),
+            ['status', 'paid_at', 'transaction_reference', 'payment_method', 'updated_at'],
+        )
+        ReconciliationItem.objects.bulk_create([
+            ReconciliationItem(
+                record=record,
+                master=master,
+                payment_id=match.payment.id,
+                collection_id=match.collection.id,
+                rule=match.rule,
+                amount_delta=match.amount_delta,
+                created_at=now,
+                updated_at=now,
+            )
+            for match in matches
+        ])
 
+        if master.webhook_url:
+            payloads = self._build_paid_payloads(matches, now)
+            transaction.on_commit(lambda: self._queue_paid_webhooks(master, payloads))
 
+    @staticmethod
+    def _queue_paid_webhooks(master, payloads):
+        """
+        Queue webhook delivery for a committed chunk.
 
+        Webhooks are best-effort, so a queue outage must not fail a run whose
+        matches are already committed. The error is logged with the
+        collections concerned; the watermark sweep does not send them again,
+        as it only reconciles payments that are still unmatched.
+        """
+        try:
+            get_queue('default').enqueue(
+                send_collection_paid_webhooks_task,
+                master_id=str(master.id),
+                payloads=payloads,
+            )
+        except Exception:
+            logger.exception(
+                "Error queueing reconciliation webhooks for master %s, collections %s",
+                master.id,
+                [payload['collection_id'] for payload in payloads],
+            )
 
+    @staticmethod
+    def _build_paid_payloads(matches, paid_at):
+        """Build the collection.paid webhook payloads for a chunk of matches."""
+        agent_names = dict(
+            Agent.objects.filter(id__in={m.collection.agent_id for m in matches})
+            .values_list('id', 'name')
+        )
+        first_matches = {}
+        for match in matches:
+            first_matches.setdefault(match.collection.id, match)
+        return [
+            {
+                'collection_id': str(match.collection.id),
+                'agent_name': agent_names.get(match.collection.agent_id),
+                'amount': str(from_minor_units(match.collection.amount_minor)),
+                'status': 'paid',
+                'transaction_reference': match.payment.transaction_reference,
+                'payment_method': match.payment.payment_method,
+                'paid_at': paid_at.isoformat(),
+            }
+            for match in first_matches.values()
+        ]
 
@@ -0,0 +1,74 @@
+"""
+Background tasks for reconciliation.
+"""
+
+from apps.masters.models import Master
+from apps.reconciliation.models import ReconciliationRecord
+from apps.core.webhooks import send_webhook
+
+
+def send_collection_paid_webhooks_task(master_id, payloads):
+    """
+    Task to deliver the collection.paid webhooks of a reconciliation chunk.
+
+    Args:
+        master_id: UUID of the master
+        payloads: List of webhook data dicts, one per paid collection
+    """
+    try:
+        master = Master.objects.get(id=master_id)
+        delivered = 0
+        for data in payloads:
+            if send_webhook(master=master, event='collection.paid', data=data):
+                delivered += 1
+
+        return {'success': True, 'delivered': delivered, 'total': len(payloads)}
+
+    except Exception as e:
+        # Log error
+        print(f"Error sending reconciliation webhooks: {e}")
+        return {'success': False, 'error': str(e)}
+
+
+def run_reconciliation_task(record_id, agent_range=None):
+    """
+    Task to execute a queued reconciliation run or one shard of it.
+
+    Args:
+        record_id: UUID of the running ReconciliationRecord
+        agent_range: Optional inclusive (first, last) agent id range of a shard
+    """
+    # Imported here because the service module queues this task
+    from apps.reconciliation.services import ReconciliationService
+
+    try:
+        record = ReconciliationRecord.objects.select_related('master', 'agent').get(id=record_id)
+        record = ReconciliationService().run(record, agent_range=agent_range)
+
+        return {'success': record.status == 'completed', 'record_id': str(record.id)}
+
+    except Exception as e:
+        # Log error
+        print(f"Error running reconciliation: {e}")
+        return {'success': False, 'error': str(e)}
+
+
+def match_payments_task(payment_ids):
+    """
+    Task to match newly created payments incrementally.
+
+    Args:
+        payment_ids: List of PaymentMatch UUIDs
+    """
+    # Imported here because the service module queues this task
+    from apps.reconciliation.services import ReconciliationService
+
+    try:
+        matched = ReconciliationService().match_payments(payment_ids)
+
+        return {'success': True, 'matched': matched, 'total': len(payment_ids)}
+
+    except Exception as e:
+        # Log error
+        print(f"Error matching payments: {e}")
+        return {'success': False, 'error': str(e)}
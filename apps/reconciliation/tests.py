@@ -0,0 +1,101 @@
+"""
+Tests for the in-memory reconciliation engine.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from django.test import SimpleTestCase
+
+from apps.reconciliation.engine import (
+    PendingCollection,
+    ReconciliationEngine,
+    UnmatchedPayment,
+    find_subset,
+    to_minor_units,
+)
+
+
+def far_deadline():
+    return time.monotonic() + 60
+
+
+class FindSubsetTests(SimpleTestCase):
+    """find_subset() picks 2 to max_parts items summing within the bounds."""
+
+    def test_prefers_earlier_items(self):
+        items = [(300, 'a'), (200, 'b'), (100, 'c'), (400, 'd')]
+        self.assertEqual(find_subset(items, 500, 500, 4, far_deadline()), ['a', 'b'])
+
+    def test_accepts_a_sum_within_tolerance(self):
+        items = [(250, 'a'), (240, 'b')]
+        self.assertEqual(find_subset(items, 480, 500, 2, far_deadline()), ['a', 'b'])
+
+    def test_needs_at_least_two_items(self):
+        items = [(500, 'a'), (100, 'b')]
+        self.assertIsNone(find_subset(items, 500, 500, 4, far_deadline()))
+
+    def test_respects_max_parts(self):
+        items = [(100, 'a'), (100, 'b'), (100, 'c'), (100, 'd')]
+        self.assertIsNone(find_subset(items, 400, 400, 3, far_deadline()))
+        self.assertEqual(find_subset(items, 400, 400, 4, far_deadline()), ['a', 'b', 'c', 'd'])
+
+    def test_returns_none_without_a_combination(self):
+        items = [(300, 'a'), (300, 'b'), (300, 'c')]
+        self.assertIsNone(find_subset(items, 500, 500, 3, far_deadline()))
+
+    def test_gives_up_after_the_deadline(self):
+        items = [(100, 'a'), (100, 'b')]
+        self.assertIsNone(find_subset(items, 200, 200, 2, time.monotonic() - 1))
+
+
+class DueDateWindowTests(SimpleTestCase):
+    """_take() only hands out collections due within the window of the payment."""
+
+    def setUp(self):
+        self.now = datetime(2026, 10, 1, 12, 0)
+        self.engine = ReconciliationEngine(due_date_window=timedelta(days=3))
+
+    def add(self, collection_id, days):
+        collection = PendingCollection(
+            id=collection_id,
+            agent_id='agent',
+            amount_minor=to_minor_units(1000),
+            due_date=self.now + timedelta(days=days),
+        )
+        self.engine.add_collection(collection)
+        return collection
+
+    def payment(self, days=0):
+        return UnmatchedPayment(
+            id='payment',
+            agent_id='agent',
+            amount=1000,
+            transaction_reference=None,
+            payment_method='mobile_money',
+            received_at=self.now + timedelta(days=days),
+        )
+
+    def test_takes_the_oldest_collection_in_the_window(self):
+        self.add('early', -2)
+        self.add('late', 2)
+        self.assertEqual(self.engine._take(self.payment(), to_minor_units(1000)).id, 'early')
+        self.assertEqual(len(self.engine), 1)
+
+    def test_drops_collections_due_before_the_window(self):
+        self.add('stale', -10)
+        self.add('current', 1)
+        self.assertEqual(self.engine._take(self.payment(), to_minor_units(1000)).id, 'current')
+        self.assertEqual(len(self.engine), 0)
+
+    def test_keeps_collections_due_after_the_window(self):
+        self.add('future', 10)
+        self.assertIsNone(self.engine._take(self.payment(), to_minor_units(1000)))
+        self.assertEqual(len(self.engine), 1)
+        self.assertEqual(self.engine._take(self.payment(days=8), to_minor_units(1000)).id, 'future')
+
+    def test_ignores_the_window_without_a_payment_date(self):
+        self.add('stale', -10)
+        payment = self.payment()
+        payment.received_at = None
+        self.assertEqual(self.engine._take(payment, to_minor_units(1000)).id, 'stale')
@@ -4,7 +4,7 @@ URL configuration for reconciliation app.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from apps.reconciliation.views import PaymentMatchViewSet, ReconciliationRecordViewSet
+from apps.reconciliation.views import MatchingRuleView, PaymentMatchViewSet, ReconciliationRecordViewSet
 
 router = DefaultRouter()
 router.register(r'payments', PaymentMatchViewSet, basename='payment-match')
@@ -13,6 +13,7 @@ router.register(r'records', ReconciliationRecordViewSet, basename='reconciliatio
 app_name = 'reconciliation'
 
 urlpatterns = [
+    path('rules/', MatchingRuleView.as_view(), name='matching-rule'),
     path('', include(router.urls)),
 ]
 
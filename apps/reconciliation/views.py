@@ -2,14 +2,16 @@
 API views for Reconciliation models.
 """
 
-from rest_framework import viewsets, status, filters
+from rest_framework import generics, viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from apps.api.permissions import IsAuthenticatedWithAPIKey
 from django.utils import timezone
-from apps.reconciliation.models import PaymentMatch, ReconciliationRecord
+from apps.reconciliation.models import MatchingRule, PaymentMatch, ReconciliationItem, ReconciliationRecord
 from apps.reconciliation.serializers import (
+    MatchingRuleSerializer,
     PaymentMatchSerializer,
+    ReconciliationItemSerializer,
     ReconciliationRecordSerializer,
     StartReconciliationSerializer
 )
@@ -68,12 +70,22 @@ class ReconciliationRecordViewSet(viewsets.ReadOnlyModelViewSet):
         if agent_id:
             queryset = queryset.filter(agent_id=agent_id)
 
+        # Shards are listed under their parent only
+        parent_id = self.request.query_params.get('parent_id', None)
+        if parent_id:
+            queryset = queryset.filter(parent_id=parent_id)
+        elif self.action == 'list':
+            queryset = queryset.filter(parent__isnull=True)
+
         return queryset
 
     @action(detail=False, methods=['post'])
     def start(self, request):
         """
-        Start a reconciliation process.
+        Start a reconciliation process in the background.
+
+        Returns the record immediately in running state; poll
+        GET /api/v1/reconciliation/records/{id}/ for progress.
 
         POST /api/v1/reconciliation/records/start/
         """
@@ -87,14 +99,55 @@ class ReconciliationRecordViewSet(viewsets.ReadOnlyModelViewSet):
         if agent_id:
             agent = Agent.objects.get(id=agent_id, master=master)
 
-        # Run reconciliation
+        # Queue reconciliation
         service = ReconciliationService()
-        record = service.reconcile(master, agent=agent)
+        record = service.start(master, agent=agent, shards=serializer.validated_data['shards'])
 
         response_serializer = ReconciliationRecordSerializer(record)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
-
+        return Response(response_serializer.data, status=status.HTTP_202_ACCEPTED)
 
+    @action(detail=True, methods=['get'])
+    def items(self, request, pk=None):
+        """
+        List the matching decisions of a reconciliation run.
 
+        Items of a parallel run's shards are included under the parent.
 
+        GET /api/v1/reconciliation/records/{id}/items/
+        """
+        record = self.get_object()
+        # An IN list on record_id keeps the (record, created_at) index usable
+        record_ids = [record.id, *record.shards.values_list('id', flat=True)]
+        queryset = ReconciliationItem.objects.filter(
+            record_id__in=record_ids
+        ).select_related('payment__agent', 'collection').order_by('created_at', 'id')
+
+        # Filter by rule
+        rule = request.query_params.get('rule', None)
+        if rule:
+            queryset = queryset.filter(rule=rule)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = ReconciliationItemSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = ReconciliationItemSerializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+class MatchingRuleView(generics.RetrieveUpdateAPIView):
+    """
+    View and update the authenticated master's matching rule.
+
+    GET /api/v1/reconciliation/rules/
+    PATCH /api/v1/reconciliation/rules/
+    """
+    serializer_class = MatchingRuleSerializer
+    permission_classes = [IsAuthenticatedWithAPIKey]
 
+    def get_object(self):
+        """Return the master's matching rule, creating the default (exact matching) one."""
+        master = getattr(self.request, 'master', self.request.auth)
+        rule, _ = MatchingRule.objects.get_or_create(master=master)
+        return rule
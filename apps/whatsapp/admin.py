@@ -3,7 +3,8 @@ Admin configuration for WhatsApp models.
 """
 
 from django.contrib import admin
-from apps.whatsapp.models import WhatsAppTemplate, WhatsAppMessage
+from apps.whatsapp.models import Campaign, WhatsAppTemplate, WhatsAppMessage
+from apps.whatsapp.retries import requeue
 
 
 @admin.register(WhatsAppTemplate)
@@ -16,16 +17,23 @@ class WhatsAppTemplateAdmin(admin.ModelAdmin):
 
 @admin.register(WhatsAppMessage)
 class WhatsAppMessageAdmin(admin.ModelAdmin):
-    list_display = ('id', 'master', 'agent', 'direction', 'status', 'to_number', 'sent_at', 'created_at')
+    list_display = ('id', 'master', 'agent', 'direction', 'status', 'attempts', 'to_number', 'sent_at', 'created_at')
     list_filter = ('direction', 'status', 'master', 'created_at')
     search_fields = ('to_number', 'from_number', 'content', 'message_id')
     readonly_fields = ('id', 'created_at', 'updated_at')
     date_hierarchy = 'created_at'
+    actions = ['requeue_messages']
 
+    @admin.action(description='Requeue failed, dead-lettered or retrying messages')
+    def requeue_messages(self, request, queryset):
+        requeued = requeue(queryset)
+        self.message_user(request, f"{requeued} messages queued for sending.")
 
 
-
-
-
-
-
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ('label', 'master', 'status', 'total_messages', 'sent_messages', 'failed_messages', 'created_at')
+    list_filter = ('status', 'master', 'created_at')
+    search_fields = ('label',)
+    readonly_fields = ('id', 'created_at', 'updated_at')
+    raw_id_fields = ('manual_import',)
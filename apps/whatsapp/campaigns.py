@@ -0,0 +1,309 @@
+"""
+WhatsApp campaigns sent in the background.
+
+Starting a campaign only records it and queues a fan-out job, so the
+admin request returns at once. Recipients are a query (see
+Campaign.recipients), never a list of ids. The fan-out job walks them a
+chunk at a time in primary-key order: it creates the chunk's messages
+(one query loads the collections with their agents) and queues a job on
+low_priority to send them. Chunk jobs send through BulkWhatsAppSender and add their results
+to the campaign counters with UPDATE ... SET sent = sent + n, so chunks
+finishing together never lose each other's counts.
+
+Pause and cancel only change the campaign status; jobs check it before
+every batch and stop. Resuming bumps the campaign generation, so jobs
+still queued from before the pause exit, and runs the fan-out again: it
+creates the messages it had not reached and queues the ones still
+pending.
+
+Messages whose send is retried later (see apps.whatsapp.retries) count
+as neither sent nor failed until their retry settles, so a campaign
+completes only once its retries have.
+"""
+
+import logging
+from itertools import count
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django_rq import get_queue
+
+from apps.core.locks import LockNotAcquired, redis_lock
+from apps.whatsapp.bulk import BulkWhatsAppSender
+from apps.whatsapp.models import Campaign, WhatsAppMessage
+from apps.whatsapp.tasks import fan_out_campaign_task, send_campaign_chunk_task
+
+
+logger = logging.getLogger(__name__)
+
+
+# A chunk lock outlives its job (low_priority timeout); a job queued by a
+# resume waits this long for the previous one to finish its batch
+CHUNK_LOCK_TIMEOUT = 720
+CHUNK_LOCK_WAIT = 300
+
+
+class CampaignError(Exception):
+    """Raised when a campaign cannot be started or changed."""
+
+
+class CampaignService:
+    """
+    Starts, sends and controls WhatsApp campaigns.
+
+    Args:
+        chunk_size: Recipients per send job, defaults to WHATSAPP_CAMPAIGN_CHUNK_SIZE
+    """
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = max(1, chunk_size or getattr(settings, 'WHATSAPP_CAMPAIGN_CHUNK_SIZE', 500))
+
+    def start(self, master, label, template, manual_import=None, paid_on=None):
+        """
+        Record a campaign and queue its fan-out job.
+
+        Recipients are the collections of manual_import if given, else the
+        collections paid on paid_on.
+
+        Args:
+            master: Master instance
+            label: Recipients description shown in the admin UI
+            template: WhatsAppTemplate to send
+            manual_import: ManualImport whose collections receive the message
+            paid_on: Date whose payers receive the message
+
+        Returns:
+            Campaign: The running campaign, or failed if it could not be queued
+
+        Raises:
+            CampaignError: If there are no recipients
+        """
+        campaign = Campaign(
+            master=master,
+            template=template,
+            label=label,
+            status='running',
+            manual_import=manual_import,
+            paid_on=paid_on,
+            started_at=timezone.now(),
+        )
+        campaign.total_messages = campaign.recipients().count()
+        if not campaign.total_messages:
+            raise CampaignError(f"No collections found for {label}.")
+
+        campaign.save()
+        return self._queue_fan_out(campaign)
+
+    def fan_out(self, campaign, generation):
+        """
+        Create the campaign's messages and queue them in chunks.
+
+        Collections that already have a message in the campaign are
+        skipped, so running the fan-out again (after a resume or a crash)
+        only creates the missing messages. Every chunk's pending messages
+        are queued.
+
+        Args:
+            campaign: Campaign instance
+            generation: Campaign generation the job was queued for
+
+        Returns:
+            Campaign: The campaign
+        """
+        queue = get_queue('low_priority')
+        recipients = campaign.recipients().select_related('agent').order_by('id')
+        last_id = None
+        for index in count():
+            if not self._is_current(campaign, generation):
+                return campaign
+
+            chunk = recipients if last_id is None else recipients.filter(id__gt=last_id)
+            chunk = list(chunk[:self.chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            self._create_messages(campaign, chunk)
+            message_ids = [
+                str(message_id)
+                for message_id in campaign.messages.filter(
+                    collection_id__in=[collection.id for collection in chunk], status='pending'
+                ).values_list('id', flat=True)
+            ]
+            if message_ids:
+                queue.enqueue(
+                    send_campaign_chunk_task,
+                    campaign_id=str(campaign.id),
+                    chunk=index,
+                    message_ids=message_ids,
+                    generation=generation,
+                )
+
+        # Collections deleted since the start have no message
+        Campaign.objects.filter(id=campaign.id).update(
+            total_messages=campaign.messages.count(), updated_at=timezone.now()
+        )
+        self._complete_if_done(campaign)
+        return campaign
+
+    def send_chunk(self, campaign, chunk, message_ids, generation):
+        """
+        Send a chunk of a campaign's messages, a batch at a time.
+
+        Chunks are locked in Redis, so a job queued by a resume waits for
+        a job of the previous generation to finish its batch instead of
+        loading the same pending messages.
+
+        Args:
+            campaign: Campaign instance
+            chunk: Index of the chunk in the campaign
+            message_ids: WhatsAppMessage UUIDs of the chunk
+            generation: Campaign generation the job was queued for
+
+        Returns:
+            dict: Number of messages sent and failed by this job
+        """
+        sender = BulkWhatsAppSender()
+        sent = failed = 0
+        try:
+            with redis_lock(
+                f'whatsapp:campaign:{campaign.id}:chunk:{chunk}',
+                timeout=CHUNK_LOCK_TIMEOUT,
+                blocking_timeout=CHUNK_LOCK_WAIT,
+                fail_open=True,
+            ):
+                for start in range(0, len(message_ids), sender.batch_size):
+                    if not self._is_current(campaign, generation):
+                        break
+                    result = sender.send(message_ids[start:start + sender.batch_size])
+                    self.record_results(campaign, result['sent'], result['failed'], complete=False)
+                    sent += result['sent']
+                    failed += result['failed']
+        except LockNotAcquired:
+            logger.info("Campaign %s chunk %s is still being sent by another job", campaign.id, chunk)
+
+        self._complete_if_done(campaign)
+        return {'sent': sent, 'failed': failed}
+
+    def record_results(self, campaign, sent, failed, complete=True):
+        """
+        Add sent and failed messages to a campaign's counters.
+
+        Args:
+            campaign: Campaign instance
+            sent: Messages sent
+            failed: Messages failed for good
+            complete: Whether to complete the campaign if nothing is left
+        """
+        Campaign.objects.filter(id=campaign.id).update(
+            sent_messages=F('sent_messages') + sent,
+            failed_messages=F('failed_messages') + failed,
+            updated_at=timezone.now(),
+        )
+        if complete:
+            self._complete_if_done(campaign)
+
+    def pause(self, campaign):
+        """Stop sending after the batches in flight; pending messages stay pending."""
+        self._transition(campaign, ['running'], 'paused')
+        return campaign
+
+    def resume(self, campaign):
+        """Queue the pending messages of a paused campaign again."""
+        self._transition(campaign, ['paused'], 'running', generation=F('generation') + 1)
+        # Retries skipped while paused are sent with the pending messages
+        campaign.messages.filter(status='retrying').update(
+            status='pending', next_retry_at=None, updated_at=timezone.now()
+        )
+        return self._queue_fan_out(campaign)
+
+    def cancel(self, campaign):
+        """
+        Stop a campaign for good.
+
+        Its pending and retrying messages are marked failed, but not
+        counted in failed_messages: they show as remaining, never sent.
+        """
+        self._transition(campaign, ['running', 'paused'], 'cancelled', completed_at=timezone.now())
+        campaign.messages.filter(status__in=['pending', 'retrying']).update(
+            status='failed', error_message='Campaign cancelled.', next_retry_at=None, updated_at=timezone.now()
+        )
+        return campaign
+
+    def _create_messages(self, campaign, collections):
+        existing = set(
+            campaign.messages.filter(collection_id__in=[collection.id for collection in collections])
+            .values_list('collection_id', flat=True)
+        )
+        messages = [
+            self._build_message(campaign, collection)
+            for collection in collections
+            if collection.id not in existing
+        ]
+        WhatsAppMessage.objects.bulk_create(messages)
+
+    @staticmethod
+    def _build_message(campaign, collection):
+        agent = collection.agent
+        template = campaign.template
+        amount = str(collection.amount)
+        currency = "XOF"
+        reference = collection.transaction_reference or "-"
+        timestamp = (
+            collection.paid_at.strftime("%Y-%m-%d %H:%M:%S")
+            if collection.paid_at
+            else collection.created_at.strftime("%Y-%m-%d %H:%M:%S")
+        )
+        return WhatsAppMessage(
+            master=campaign.master,
+            agent=agent,
+            collection=collection,
+            template=template,
+            campaign=campaign,
+            direction="outbound",
+            status="pending",
+            to_number=agent.whatsapp_number,
+            to_e164=agent.whatsapp_e164,
+            content=f"Template: {template.whatsapp_template_name}" if template else "",
+            metadata={
+                "template_params": [amount, currency, reference, timestamp],
+            },
+        )
+
+    def _queue_fan_out(self, campaign):
+        try:
+            get_queue('low_priority').enqueue(
+                fan_out_campaign_task,
+                campaign_id=str(campaign.id),
+                generation=campaign.generation,
+            )
+        except Exception as e:
+            campaign.status = 'failed'
+            campaign.completed_at = timezone.now()
+            campaign.error_message = f"Could not queue campaign: {e}"
+            campaign.save(update_fields=['status', 'completed_at', 'error_message', 'updated_at'])
+        return campaign
+
+    @staticmethod
+    def _is_current(campaign, generation):
+        campaign.refresh_from_db(fields=['status', 'generation'])
+        return campaign.status == 'running' and campaign.generation == generation
+
+    @staticmethod
+    def _complete_if_done(campaign):
+        # Only the job whose update flips the status completes the campaign
+        Campaign.objects.filter(
+            id=campaign.id,
+            status='running',
+            total_messages__lte=F('sent_messages') + F('failed_messages'),
+        ).update(status='completed', completed_at=timezone.now(), updated_at=timezone.now())
+        campaign.refresh_from_db()
+
+    @staticmethod
+    def _transition(campaign, from_statuses, status, **fields):
+        updated = Campaign.objects.filter(id=campaign.id, status__in=from_statuses).update(
+            status=status, updated_at=timezone.now(), **fields
+        )
+        campaign.refresh_from_db()
+        if not updated:
+            raise CampaignError(f"Campaign is {campaign.get_status_display().lower()}.")
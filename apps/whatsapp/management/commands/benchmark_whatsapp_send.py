@@ -0,0 +1,135 @@
+"""
+Benchmark WhatsApp bulk sending against a mock Graph API.
+
+Creates pending messages for a throwaway master, sends them with
+BulkWhatsAppSender at each --concurrency, and rolls everything back at
+the end. Messages go to a local MockGraphAPI answering after
+--latency-ms, unless --api-url points at another mock. --api-rate-limit
+makes the mock answer 429 above that many requests per second, and
+--rate-limit sets the sender's own limit, to check the limiter keeps
+sends under the API's. --json prints one result per line so runs can be
+stored and compared.
+
+Usage:
+    python manage.py benchmark_whatsapp_send --messages 2000 --latency-ms 300 --concurrency 1 --concurrency 20
+"""
+
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.agents.models import Agent
+from apps.masters.models import Master
+from apps.whatsapp.bulk import BulkWhatsAppSender
+from apps.whatsapp.mock_api import MockGraphAPI
+from apps.whatsapp.models import WhatsAppMessage
+from apps.whatsapp.services import WhatsAppService
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent WhatsApp sending against a mock Graph API."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=1000, help="Messages sent per run.")
+        parser.add_argument("--latency-ms", type=int, default=300, help="Mock API response time.")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            action="append",
+            help="Sends in flight (repeatable; default: 1 and WHATSAPP_SEND_CONCURRENCY).",
+        )
+        parser.add_argument("--batch-size", type=int, default=None, help="Messages per batch (default: WHATSAPP_SEND_BATCH_SIZE).")
+        parser.add_argument("--api-url", help="Send to this mock API instead of starting one.")
+        parser.add_argument(
+            "--rate-limit",
+            type=float,
+            default=None,
+            help="Sender rate limit in messages/s (default: WHATSAPP_RATE_LIMIT_PER_SECOND, 0 disables).",
+        )
+        parser.add_argument("--api-rate-limit", type=int, default=None, help="Mock API requests/s before it answers 429.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON lines.")
+
+    def handle(self, *args, **options):
+        if options["messages"] < 1 or options["latency_ms"] < 0:
+            raise CommandError("--messages must be at least 1 and --latency-ms cannot be negative.")
+        concurrencies = options["concurrency"] or [1, getattr(settings, "WHATSAPP_SEND_CONCURRENCY", 10)]
+        if min(concurrencies) < 1:
+            raise CommandError("--concurrency must be at least 1.")
+
+        api = None
+        api_url = options["api_url"]
+        if not api_url:
+            api = MockGraphAPI(latency=options["latency_ms"] / 1000, rate_limit=options["api_rate_limit"]).start()
+            api_url = api.url
+
+        try:
+            with transaction.atomic():
+                message_ids = self._create_messages(options["messages"])
+                service = WhatsAppService(
+                    api_url=api_url,
+                    api_token="benchmark",
+                    phone_number_id="benchmark",
+                    pool_size=max(concurrencies),
+                    rate_limit=options["rate_limit"],
+                )
+                for concurrency in concurrencies:
+                    throttled = api.throttled if api else 0
+                    WhatsAppMessage.objects.filter(id__in=message_ids).update(
+                        status="pending", message_id=None, sent_at=None, error_message=None, attempts=0, next_retry_at=None
+                    )
+                    result = self._run(service, message_ids, concurrency, options)
+                    result["throttled"] = api.throttled - throttled if api else None
+                    self._report(result, options["json"])
+                transaction.set_rollback(True)
+        finally:
+            if api:
+                api.stop()
+
+    def _run(self, service, message_ids, concurrency, options):
+        sender = BulkWhatsAppSender(service=service, concurrency=concurrency, batch_size=options["batch_size"])
+        started = time.perf_counter()
+        result = sender.send(message_ids)
+        elapsed = time.perf_counter() - started
+        return {
+            "concurrency": concurrency,
+            "batch_size": sender.batch_size,
+            "latency_ms": options["latency_ms"] if not options["api_url"] else None,
+            "messages": result["total"],
+            "sent": result["sent"],
+            "failed": result["failed"],
+            "seconds": round(elapsed, 3),
+            "messages_per_second": round(result["total"] / elapsed, 1) if elapsed else None,
+        }
+
+    def _create_messages(self, count):
+        master = Master.objects.create(name="WhatsApp benchmark", email="whatsapp-benchmark@bench.sentreso.test")
+        agent = Agent.objects.create(master=master, name="Benchmark agent", whatsapp_number="+221770000000")
+        # One recipient per message, so per-recipient pacing does not apply
+        messages = [
+            WhatsAppMessage(
+                master=master,
+                agent=agent,
+                direction="outbound",
+                status="pending",
+                to_number=f"+22178{index:07d}",
+                to_e164=f"+22178{index:07d}",
+                content=f"Benchmark message {index}",
+            )
+            for index in range(count)
+        ]
+        WhatsAppMessage.objects.bulk_create(messages, batch_size=1000)
+        return [message.id for message in messages]
+
+    def _report(self, result, as_json):
+        if as_json:
+            self.stdout.write(json.dumps(result))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"concurrency {result['concurrency']}: {result['sent']}/{result['messages']} sent "
+            f"in {result['seconds']}s = {result['messages_per_second']} messages/s"
+            + (f", {result['throttled']} answered 429" if result["throttled"] else "")
+        ))
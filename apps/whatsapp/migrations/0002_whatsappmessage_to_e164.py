@@ -0,0 +1,43 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:32
+
+from django.db import migrations, models
+
+from apps.core.phones import default_country_code, normalize_e164
+
+
+def fill_to_e164(apps, schema_editor):
+    """Normalise existing recipient numbers with each master's country code."""
+    Master = apps.get_model('masters', 'Master')
+    WhatsAppMessage = apps.get_model('whatsapp', 'WhatsAppMessage')
+    for master in Master.objects.only('id', 'phone_country_code'):
+        country_code = master.phone_country_code.lstrip('+') or default_country_code()
+        batch = []
+        messages = WhatsAppMessage.objects.filter(master=master).only('id', 'to_number')
+        for message in messages.iterator(chunk_size=1000):
+            message.to_e164 = normalize_e164(message.to_number, country_code)
+            batch.append(message)
+            if len(batch) == 1000:
+                WhatsAppMessage.objects.bulk_update(batch, ['to_e164'])
+                batch = []
+        WhatsAppMessage.objects.bulk_update(batch, ['to_e164'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp', '0001_initial'),
+        ('masters', '0002_master_phone_country_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='whatsappmessage',
+            name='to_e164',
+            field=models.CharField(blank=True, default='', help_text='Recipient number in E.164 form', max_length=16),
+        ),
+        migrations.RunPython(fill_to_e164, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='whatsappmessage',
+            index=models.Index(fields=['master', 'to_e164'], name='whatsapp_wh_master__c149c3_idx'),
+        ),
+    ]
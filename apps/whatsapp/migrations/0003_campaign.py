@@ -0,0 +1,60 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('masters', '0002_master_phone_country_code'),
+        ('whatsapp', '0002_whatsappmessage_to_e164'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Campaign',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('label', models.CharField(help_text='Recipients description, e.g. "last import"', max_length=255)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('paused', 'Paused'), ('cancelled', 'Cancelled'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('collection_ids', models.JSONField(default=list, help_text='Collections whose agents receive the message')),
+                ('total_messages', models.PositiveIntegerField(default=0, help_text='Messages to send')),
+                ('sent_messages', models.PositiveIntegerField(default=0, help_text='Messages sent so far')),
+                ('failed_messages', models.PositiveIntegerField(default=0, help_text='Messages that failed so far')),
+                ('generation', models.PositiveIntegerField(default=0, help_text='Bumped on resume; queued jobs of an earlier generation exit')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True, help_text='Error message if the campaign failed', null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='master',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='whatsapp_campaigns', to='masters.master'),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campaigns', to='whatsapp.whatsapptemplate'),
+        ),
+        migrations.AddField(
+            model_name='whatsappmessage',
+            name='campaign',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='messages', to='whatsapp.campaign'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['master', 'status'], name='whatsapp_ca_master__afd169_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='whatsappmessage',
+            index=models.Index(fields=['campaign', 'status'], name='whatsapp_wh_campaig_c566cd_idx'),
+        ),
+    ]
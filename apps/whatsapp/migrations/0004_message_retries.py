@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp', '0003_campaign'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='whatsappmessage',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, help_text='Send attempts so far'),
+        ),
+        migrations.AddField(
+            model_name='whatsappmessage',
+            name='next_retry_at',
+            field=models.DateTimeField(blank=True, help_text='When a retrying message is sent again', null=True),
+        ),
+        migrations.AlterField(
+            model_name='whatsappmessage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('read', 'Read'), ('failed', 'Failed'), ('retrying', 'Retrying'), ('dead', 'Dead letter'), ('received', 'Received')], db_index=True, default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-17 05:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collections', '0009_collection_manual_import'),
+        ('whatsapp', '0004_message_retries'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='campaign',
+            name='collection_ids',
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='manual_import',
+            field=models.ForeignKey(blank=True, help_text='Import whose collections receive the message', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campaigns', to='collections.manualimport'),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='paid_on',
+            field=models.DateField(blank=True, help_text='Without an import, the collections paid on this day receive the message', null=True),
+        ),
+    ]
@@ -0,0 +1,128 @@
+"""
+Local stand-in for the WhatsApp Cloud API messages endpoint.
+
+Answers POST /<version>/<phone_number_id>/messages like the Graph API,
+after an optional delay, so senders can be exercised and benchmarked
+without Meta credentials:
+
+    with MockGraphAPI(latency=0.3) as api:
+        service = WhatsAppService(api_url=api.url, api_token="test", phone_number_id="1")
+"""
+
+import collections
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockGraphAPI:
+    """
+    Threaded HTTP server mimicking the Graph API messages endpoint.
+
+    Args:
+        latency: Seconds each request waits before answering
+        failure_rate: Share of requests answered with an error
+        failure_status: Status of those errors (400, or e.g. 503 for a
+            retryable outage)
+        rate_limit: Requests accepted per second, like the Graph API's
+            throughput limit; the rest get a 429 (None = unlimited)
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free one)
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0, failure_status=400, rate_limit=None, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.connections = 0
+        self.throttled = 0
+        self._accepted = collections.deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v19.0"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, attribute):
+        with self._lock:
+            value = getattr(self, attribute) + 1
+            setattr(self, attribute, value)
+        return value
+
+    def _over_rate_limit(self):
+        if not self.rate_limit:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            while self._accepted and self._accepted[0] <= now - 1:
+                self._accepted.popleft()
+            if len(self._accepted) >= self.rate_limit:
+                self.throttled += 1
+                return True
+            self._accepted.append(now)
+        return False
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                api._count('connections')
+                super().setup()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                number = api._count('requests')
+                if api.latency:
+                    time.sleep(api.latency)
+
+                if not self.path.endswith('/messages'):
+                    self._reply(404, {'error': {'message': 'Unknown path', 'code': 100}})
+                elif api._over_rate_limit():
+                    self._reply(429, {'error': {'message': 'Rate limit hit', 'code': 130429}})
+                elif api.failure_rate and random.random() < api.failure_rate:
+                    self._reply(api.failure_status, {'error': {'message': 'Mock failure', 'code': 131000}})
+                else:
+                    self._reply(200, {
+                        'messaging_product': 'whatsapp',
+                        'messages': [{'id': f'wamid.mock.{number}'}],
+                    })
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
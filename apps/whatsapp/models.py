@@ -3,10 +3,13 @@ WhatsApp models for message templates and message tracking.
 """
 
 from django.db import models
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
 from apps.core.models import BaseModel
+from apps.core.phones import normalize_e164
 from apps.masters.models import Master
 from apps.agents.models import Agent
-from apps.collections.models import Collection
+from apps.collections.models import Collection, ManualImport
 
 
 class WhatsAppTemplate(BaseModel):
@@ -76,9 +79,98 @@ class WhatsAppTemplate(BaseModel):
         return content
 
 
+class Campaign(BaseModel):
+    """
+    Campaign model - a template message sent to the agents of a set of collections.
+
+    The collections are selected by a query, not stored: those of an admin
+    import, or those paid on a given day. A fan-out job creates the
+    messages and queues them in chunks on
+    low_priority; chunk jobs add what they send to the counters below.
+    Pausing or cancelling stops the chunk jobs before their next batch.
+    """
+
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('paused', 'Paused'),
+        ('cancelled', 'Cancelled'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    master = models.ForeignKey(Master, on_delete=models.CASCADE, related_name='whatsapp_campaigns')
+    template = models.ForeignKey(
+        WhatsAppTemplate,
+        on_delete=models.SET_NULL,
+        related_name='campaigns',
+        null=True,
+        blank=True
+    )
+    label = models.CharField(max_length=255, help_text='Recipients description, e.g. "last import"')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    manual_import = models.ForeignKey(
+        ManualImport,
+        on_delete=models.SET_NULL,
+        related_name='campaigns',
+        null=True,
+        blank=True,
+        help_text='Import whose collections receive the message'
+    )
+    paid_on = models.DateField(
+        blank=True,
+        null=True,
+        help_text='Without an import, the collections paid on this day receive the message'
+    )
+    total_messages = models.PositiveIntegerField(default=0, help_text='Messages to send')
+    sent_messages = models.PositiveIntegerField(default=0, help_text='Messages sent so far')
+    failed_messages = models.PositiveIntegerField(default=0, help_text='Messages that failed so far')
+    generation = models.PositiveIntegerField(
+        default=0,
+        help_text='Bumped on resume; queued jobs of an earlier generation exit'
+    )
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    error_message = models.TextField(blank=True, null=True, help_text='Error message if the campaign failed')
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['master', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.label} - {self.get_status_display()}"
+
+    def recipients(self):
+        """Return the collections whose agents receive the message."""
+        collections = Collection.objects.filter(master_id=self.master_id)
+        if self.manual_import_id:
+            return collections.filter(manual_import_id=self.manual_import_id)
+        if self.paid_on:
+            # Payments recorded after the start are not part of the campaign
+            return collections.filter(status='paid', paid_at__date=self.paid_on, created_at__lte=self.started_at)
+        return collections.none()
+
+    @property
+    def remaining_messages(self):
+        return max(self.total_messages - self.sent_messages - self.failed_messages, 0)
+
+    @property
+    def progress_percent(self):
+        if self.status == 'completed':
+            return 100
+        if not self.total_messages:
+            return 0
+        return min(100, (self.sent_messages + self.failed_messages) * 100 // self.total_messages)
+
+
 class WhatsAppMessage(BaseModel):
     """
     WhatsApp message model for tracking all messages sent and received.
+
+    Sends that fail for a transient reason are retried with backoff (see
+    apps.whatsapp.retries): the message is 'retrying' until it is sent,
+    and 'dead' once WHATSAPP_MAX_ATTEMPTS attempts have failed.
     """
 
     DIRECTION_CHOICES = [
@@ -92,6 +184,8 @@ class WhatsAppMessage(BaseModel):
         ('delivered', 'Delivered'),
         ('read', 'Read'),
         ('failed', 'Failed'),
+        ('retrying', 'Retrying'),
+        ('dead', 'Dead letter'),
         ('received', 'Received'),
     ]
 
@@ -111,9 +205,17 @@ class WhatsAppMessage(BaseModel):
         null=True,
         blank=True
     )
+    campaign = models.ForeignKey(
+        Campaign,
+        on_delete=models.SET_NULL,
+        related_name='messages',
+        null=True,
+        blank=True
+    )
     direction = models.CharField(max_length=20, choices=DIRECTION_CHOICES, default='outbound')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
     to_number = models.CharField(max_length=20, help_text='Recipient phone number')
+    to_e164 = models.CharField(max_length=16, blank=True, default='', help_text='Recipient number in E.164 form')
     from_number = models.CharField(max_length=20, blank=True, null=True, help_text='Sender phone number')
     message_id = models.CharField(
         max_length=255,
@@ -128,6 +230,8 @@ class WhatsAppMessage(BaseModel):
     read_at = models.DateTimeField(blank=True, null=True)
     received_at = models.DateTimeField(blank=True, null=True)
     error_message = models.TextField(blank=True, null=True, help_text='Error message if sending failed')
+    attempts = models.PositiveIntegerField(default=0, help_text='Send attempts so far')
+    next_retry_at = models.DateTimeField(blank=True, null=True, help_text='When a retrying message is sent again')
     metadata = models.JSONField(default=dict, blank=True, help_text='Additional metadata')
 
     class Meta:
@@ -138,15 +242,19 @@ class WhatsAppMessage(BaseModel):
             models.Index(fields=['collection', 'status']),
             models.Index(fields=['message_id']),
             models.Index(fields=['to_number', 'status']),
+            models.Index(fields=['master', 'to_e164']),
+            models.Index(fields=['campaign', 'status']),
         ]
 
     def __str__(self):
         return f"{self.direction} - {self.to_number} - {self.get_status_display()}"
 
 
+@receiver(pre_save, sender=WhatsAppMessage)
+def normalize_to_number(sender, instance, **kwargs):
+    """
+    Signal to keep the canonical recipient number in step with to_number.
 
-
-
-
-
-
+    bulk_create() skips signals; callers set to_e164 themselves.
+    """
+    instance.to_e164 = normalize_e164(instance.to_number, instance.master.default_country_code)
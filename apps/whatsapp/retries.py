@@ -0,0 +1,220 @@
+"""
+Retries of WhatsApp sends that failed for a transient reason.
+
+Every send attempt goes through record_attempt(), which counts it and
+sets the message status from the outcome:
+
+- sent: the Graph API accepted the message
+- retrying: a retryable failure (see WhatsAppService.send_message) with
+  attempts left; the message is sent again after a backoff
+- dead: a retryable failure on the last of WHATSAPP_MAX_ATTEMPTS attempts
+- failed: an error that sending again will not fix (bad number, template
+  rejected, API not configured)
+
+Retries are scheduled with RQ's enqueue_at, so workers must run with
+--with-scheduler. The backoff doubles with every attempt, from
+WHATSAPP_RETRY_BASE_DELAY up to WHATSAPP_RETRY_MAX_DELAY, and is
+jittered so that messages failed by the same outage do not all come
+back at the same second.
+"""
+
+import logging
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from django_rq import get_queue
+
+from apps.whatsapp.models import Campaign, WhatsAppMessage
+
+
+logger = logging.getLogger(__name__)
+
+SENT_STATUSES = ('sent', 'delivered', 'read')
+FAILED_STATUSES = ('failed', 'dead')
+REQUEUE_STATUSES = FAILED_STATUSES + ('retrying',)
+
+
+def retry_delay(attempt):
+    """
+    Return the seconds to wait before sending again after a failed attempt.
+
+    Args:
+        attempt: Number of the attempt that failed (1 for the first send)
+
+    Returns:
+        float: A random delay between half and all of the capped backoff
+    """
+    base = getattr(settings, 'WHATSAPP_RETRY_BASE_DELAY', 30)
+    cap = getattr(settings, 'WHATSAPP_RETRY_MAX_DELAY', 3600)
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return random.uniform(delay / 2, delay)
+
+
+def record_attempt(message, success):
+    """
+    Count a send attempt and set the message status from its outcome.
+
+    The message is not saved.
+
+    Args:
+        message: WhatsAppMessage that send_message() was called with
+        success: What send_message() returned
+    """
+    now = timezone.now()
+    message.attempts += 1
+    message.next_retry_at = None
+    message.updated_at = now
+    if success:
+        message.status = 'sent'
+        message.sent_at = message.sent_at or now
+        return
+
+    if not message.error_message:
+        message.error_message = 'WhatsApp send failed.'
+    if not getattr(message, 'retryable', False):
+        message.status = 'failed'
+    elif message.attempts >= getattr(settings, 'WHATSAPP_MAX_ATTEMPTS', 5):
+        message.status = 'dead'
+    else:
+        message.status = 'retrying'
+        message.next_retry_at = now + timedelta(seconds=retry_delay(message.attempts))
+
+
+def schedule_retries(messages):
+    """
+    Queue the retrying messages among messages at their next_retry_at.
+
+    Messages due in the same second share a job. If the queue is
+    unreachable the messages stay retrying and can be requeued.
+
+    Args:
+        messages: Saved WhatsAppMessage instances
+
+    Returns:
+        int: Number of messages scheduled
+    """
+    due = defaultdict(list)
+    for message in messages:
+        if message.status == 'retrying' and message.next_retry_at:
+            due[message.next_retry_at.replace(microsecond=0)].append(str(message.id))
+
+    # Imported here because the tasks module imports the bulk sender, which imports this module
+    from apps.whatsapp.tasks import retry_messages_task
+
+    scheduled = 0
+    try:
+        queue = get_queue('low_priority')
+        for retry_at, message_ids in due.items():
+            queue.enqueue_at(retry_at, retry_messages_task, message_ids=message_ids)
+            scheduled += len(message_ids)
+    except Exception:
+        unscheduled = [message_id for message_ids in due.values() for message_id in message_ids][scheduled:]
+        logger.exception("Error scheduling WhatsApp retries of messages %s", unscheduled)
+    return scheduled
+
+
+def send_retries(message_ids):
+    """
+    Send the retrying messages among message_ids again.
+
+    Messages that are no longer retrying (requeued, or their campaign was
+    cancelled) are skipped, and so are those of paused campaigns: resuming
+    the campaign sends them. The messages are claimed by moving them back
+    to pending under row locks, skipping rows another job has locked, so
+    two jobs given the same messages (a scheduled retry and a requeue)
+    never both send one. The results of campaign messages are added to
+    their campaign's counters.
+
+    Args:
+        message_ids: Iterable of WhatsAppMessage UUIDs
+
+    Returns:
+        dict: Number of messages sent, failed, retrying again and attempted
+    """
+    # Imported here because the campaigns module imports the bulk sender,
+    # which imports this module
+    from apps.whatsapp.bulk import BulkWhatsAppSender
+    from apps.whatsapp.campaigns import CampaignService
+
+    with transaction.atomic():
+        claimed = list(
+            WhatsAppMessage.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(id__in=list(message_ids), status='retrying')
+            .exclude(campaign__status='paused')
+            .values_list('id', flat=True)
+        )
+        WhatsAppMessage.objects.filter(id__in=claimed).update(status='pending', updated_at=timezone.now())
+    result = BulkWhatsAppSender().send(claimed)
+
+    outcomes = defaultdict(lambda: {'sent': 0, 'failed': 0})
+    for row in (
+        WhatsAppMessage.objects.filter(id__in=claimed, campaign__isnull=False)
+        .exclude(status__in=['pending', 'retrying'])
+        .values('campaign_id', 'status')
+        .annotate(count=Count('id'))
+    ):
+        outcome = 'sent' if row['status'] in SENT_STATUSES else 'failed'
+        outcomes[row['campaign_id']][outcome] += row['count']
+    service = CampaignService()
+    for campaign in Campaign.objects.filter(id__in=list(outcomes)):
+        service.record_results(campaign, **outcomes[campaign.id])
+
+    return result
+
+
+def requeue(messages, batch_size=500):
+    """
+    Send failed, dead-lettered or retrying messages now, with a fresh attempt count.
+
+    Messages of cancelled campaigns are left alone. Failed campaign
+    messages are taken back out of their campaign's failed count, and a
+    completed campaign runs again until they are sent. A retrying
+    message whose scheduled job was lost is sent by the new job; if the
+    old job still runs, it finds the message no longer retrying.
+
+    Args:
+        messages: WhatsAppMessage queryset to requeue from
+        batch_size: Messages per send job
+
+    Returns:
+        int: Number of messages requeued
+    """
+    # Imported here because the tasks module imports the bulk sender, which imports this module
+    from apps.whatsapp.tasks import retry_messages_task
+
+    message_ids = [
+        str(message_id)
+        for message_id in messages.filter(direction='outbound', status__in=REQUEUE_STATUSES)
+        .exclude(campaign__status='cancelled')
+        .values_list('id', flat=True)
+    ]
+
+    queue = get_queue('low_priority')
+    for start in range(0, len(message_ids), batch_size):
+        batch_ids = message_ids[start:start + batch_size]
+        counted = (
+            WhatsAppMessage.objects.filter(id__in=batch_ids, status__in=FAILED_STATUSES, campaign__isnull=False)
+            .values('campaign_id')
+            .annotate(count=Count('id'))
+        )
+        for row in counted:
+            Campaign.objects.filter(id=row['campaign_id']).update(
+                failed_messages=F('failed_messages') - row['count'], updated_at=timezone.now()
+            )
+            Campaign.objects.filter(id=row['campaign_id'], status='completed').update(
+                status='running', completed_at=None, updated_at=timezone.now()
+            )
+        WhatsAppMessage.objects.filter(id__in=batch_ids).update(
+            status='retrying',
+            attempts=0,
+            next_retry_at=timezone.now(),
+            error_message=None,
+            updated_at=timezone.now(),
+        )
+        queue.enqueue(retry_messages_task, message_ids=batch_ids)
+    return len(message_ids)
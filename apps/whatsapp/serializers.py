@@ -47,13 +47,14 @@ class WhatsAppMessageSerializer(serializers.ModelSerializer):
             'template', 'template_id', 'template_name', 'direction', 'status',
             'to_number', 'from_number', 'message_id', 'content', 'sent_at',
             'delivered_at', 'read_at', 'received_at', 'error_message',
-            'metadata', 'created_at', 'updated_at'
+            'attempts', 'next_retry_at', 'metadata', 'created_at', 'updated_at'
         )
         read_only_fields = (
             'id', 'master', 'master_id', 'master_name', 'agent_id',
             'agent_name', 'agent_whatsapp', 'collection_id', 'template_id',
             'template_name', 'status', 'message_id', 'sent_at', 'delivered_at',
-            'read_at', 'received_at', 'error_message', 'created_at', 'updated_at'
+            'read_at', 'received_at', 'error_message', 'attempts', 'next_retry_at',
+            'created_at', 'updated_at'
         )
 
 
@@ -86,9 +87,13 @@ class SendMessageSerializer(serializers.Serializer):
         return value
 
 
+class RequeueMessagesSerializer(serializers.Serializer):
+    """Serializer for requeueing failed, dead-lettered or retrying messages."""
+    message_ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    status = serializers.ChoiceField(choices=['failed', 'dead', 'retrying'], required=False)
 
-
-
-
-
-
+    def validate(self, attrs):
+        """Require the messages to be picked by id, by status, or both."""
+        if not attrs.get('message_ids') and not attrs.get('status'):
+            raise serializers.ValidationError("Provide message_ids, status, or both.")
+        return attrs
@@ -2,19 +2,80 @@
 WhatsApp service for sending messages via WhatsApp Business API.
 """
 
+import logging
+import time
+
 import requests
 from django.conf import settings
 from django.utils import timezone
+from django_rq import get_queue
+from apps.core.http import get_session
+from apps.core.ratelimit import Bucket, RateLimitExceeded, get_limiter
 from apps.whatsapp.models import WhatsAppMessage
 
 
+logger = logging.getLogger(__name__)
+
+
+# Graph API statuses worth sending again later (throttling, server errors)
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+def get_whatsapp_session(pool_size=None):
+    """
+    Return the process-wide keep-alive session for the Graph API.
+
+    Concurrent sends each hold a connection, and a pool smaller than the
+    concurrency would discard the extra ones after every request, so the
+    pool is at least WHATSAPP_SEND_CONCURRENCY (or pool_size) connections.
+    """
+    pool_size = max(
+        pool_size or 0,
+        getattr(settings, 'WHATSAPP_HTTP_POOL_SIZE', 10),
+        getattr(settings, 'WHATSAPP_SEND_CONCURRENCY', 10),
+    )
+    return get_session(
+        f'whatsapp:{pool_size}',
+        pool_size=pool_size,
+        retries=getattr(settings, 'WHATSAPP_HTTP_RETRIES', 3),
+        backoff_factor=getattr(settings, 'WHATSAPP_HTTP_BACKOFF', 0.5),
+    )
+
+
 class WhatsAppService:
-    """Service for interacting with WhatsApp Business API."""
+    """
+    Service for interacting with WhatsApp Business API.
+
+    Every instance sends through the same pooled session, so creating one
+    per task or request is cheap and connections stay open between sends.
 
-    def __init__(self):
-        self.api_url = getattr(settings, 'WHATSAPP_API_URL', None)
-        self.api_token = getattr(settings, 'WHATSAPP_API_TOKEN', None)
-        self.phone_number_id = getattr(settings, 'WHATSAPP_PHONE_NUMBER_ID', None)
+    Sends are paced by token buckets in Redis shared by all workers: one
+    per phone number ID (WHATSAPP_RATE_LIMIT_PER_SECOND) and one per
+    recipient (WHATSAPP_RECIPIENT_INTERVAL), so bursts from concurrent
+    workers are spread out instead of being answered with 429s.
+
+    Args:
+        api_url: Graph API base URL, defaults to WHATSAPP_API_URL (point it
+            at a mock API in tests and benchmarks)
+        api_token: Defaults to WHATSAPP_API_TOKEN
+        phone_number_id: Defaults to WHATSAPP_PHONE_NUMBER_ID
+        pool_size: Minimum connections to keep alive, for concurrent senders
+        rate_limit: Sends per second for the phone number ID, defaults to
+            WHATSAPP_RATE_LIMIT_PER_SECOND (0 disables rate limiting)
+    """
+
+    def __init__(self, api_url=None, api_token=None, phone_number_id=None, pool_size=None, rate_limit=None):
+        self.api_url = api_url or getattr(settings, 'WHATSAPP_API_URL', None)
+        self.api_token = api_token or getattr(settings, 'WHATSAPP_API_TOKEN', None)
+        self.phone_number_id = phone_number_id or getattr(settings, 'WHATSAPP_PHONE_NUMBER_ID', None)
+        self.timeout = (
+            getattr(settings, 'WHATSAPP_HTTP_CONNECT_TIMEOUT', 3.05),
+            getattr(settings, 'WHATSAPP_HTTP_READ_TIMEOUT', 10),
+        )
+        self.session = get_whatsapp_session(pool_size)
+        if rate_limit is None:
+            rate_limit = getattr(settings, 'WHATSAPP_RATE_LIMIT_PER_SECOND', 80)
+        self.rate_limit = rate_limit
 
     def send_message(self, message):
         """
@@ -23,9 +84,14 @@ class WhatsAppService:
         Args:
             message: WhatsAppMessage instance
 
+        On failure, message.retryable tells whether sending again later
+        may succeed: timeouts, connection errors, throttling and 5xx
+        responses are retryable, other errors are not.
+
         Returns:
             bool: True if message was sent successfully, False otherwise
         """
+        message.retryable = False
         if not self.api_url or not self.api_token or not self.phone_number_id:
             # WhatsApp API not configured
             message.error_message = (
@@ -34,6 +100,13 @@ class WhatsAppService:
             )
             return False
 
+        try:
+            self._throttle(message)
+        except RateLimitExceeded as e:
+            message.error_message = f"Rate limited: {e}"
+            message.retryable = True
+            return False
+
         try:
             # Determine if we should use template or text message
             if message.template and message.template.whatsapp_template_name:
@@ -50,9 +123,10 @@ class WhatsAppService:
 
             base_url = self.api_url.rstrip('/')
             url = f"{base_url}/{self.phone_number_id}/messages"
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
+            response = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
             if response.status_code >= 400:
                 message.error_message = f"{response.status_code} {response.text}"
+                message.retryable = response.status_code in RETRYABLE_STATUSES
                 return False
 
             result = response.json()
@@ -60,6 +134,10 @@ class WhatsAppService:
             message.sent_at = timezone.now()
             return True
 
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            message.error_message = str(e)
+            message.retryable = True
+            return False
         except requests.exceptions.RequestException as e:
             message.error_message = str(e)
             return False
@@ -67,6 +145,62 @@ class WhatsAppService:
             message.error_message = str(e)
             return False
 
+    def _throttle(self, message):
+        """
+        Wait for a send slot under the phone number and recipient rate limits.
+
+        Args:
+            message: WhatsAppMessage instance about to be sent
+
+        Raises:
+            RateLimitExceeded: If no slot frees up within WHATSAPP_RATE_LIMIT_MAX_WAIT
+        """
+        if not self.rate_limit:
+            return
+
+        key = f"whatsapp:ratelimit:{self.phone_number_id}"
+        buckets = [Bucket(key, self.rate_limit, getattr(settings, 'WHATSAPP_RATE_LIMIT_BURST', 20))]
+        recipient = message.to_e164 or message.to_number
+        interval = getattr(settings, 'WHATSAPP_RECIPIENT_INTERVAL', 6)
+        if recipient and interval:
+            buckets.append(Bucket(
+                f"{key}:to:{recipient}", 1 / interval, getattr(settings, 'WHATSAPP_RECIPIENT_BURST', 5)
+            ))
+
+        wait = get_limiter().reserve(buckets, max_wait=getattr(settings, 'WHATSAPP_RATE_LIMIT_MAX_WAIT', 30))
+        if wait:
+            time.sleep(wait)
+
+    @staticmethod
+    def queue_messages(message_ids):
+        """
+        Queue pending messages for sending on the low_priority queue.
+
+        Messages are sent in batches of WHATSAPP_SEND_BATCH_SIZE per job. If
+        the queue is unreachable the messages stay pending.
+
+        Args:
+            message_ids: Iterable of WhatsAppMessage UUIDs
+
+        Returns:
+            int: Number of messages queued
+        """
+        # Imported here because the tasks module imports this service
+        from apps.whatsapp.tasks import send_pending_messages_task
+
+        message_ids = [str(message_id) for message_id in message_ids]
+        batch_size = getattr(settings, 'WHATSAPP_SEND_BATCH_SIZE', 50)
+        queued = 0
+        try:
+            queue = get_queue('low_priority')
+            for start in range(0, len(message_ids), batch_size):
+                batch = message_ids[start:start + batch_size]
+                queue.enqueue(send_pending_messages_task, message_ids=batch)
+                queued += len(batch)
+        except Exception:
+            logger.exception("Error queueing WhatsApp messages %s", message_ids[queued:])
+        return queued
+
     def _build_template_payload(self, message):
         """Build payload for template message."""
         template = message.template
@@ -92,7 +226,7 @@ class WhatsAppService:
 
         payload = {
             'messaging_product': 'whatsapp',
-            'to': message.to_number,
+            'to': message.to_e164 or message.to_number,
             'type': 'template',
             'template': {
                 'name': template.whatsapp_template_name,
@@ -109,7 +243,7 @@ class WhatsAppService:
         """Build payload for text message."""
         return {
             'messaging_product': 'whatsapp',
-            'to': message.to_number,
+            'to': message.to_e164 or message.to_number,
             'type': 'text',
             'text': {
                 'body': message.content
@@ -2,15 +2,22 @@
 Background tasks for WhatsApp message sending.
 """
 
+import logging
+
 from django.utils import timezone
 from django.conf import settings
-from apps.whatsapp.models import WhatsAppMessage, WhatsAppTemplate
+from apps.whatsapp.models import Campaign, WhatsAppMessage, WhatsAppTemplate
 from apps.collections.models import Collection
 from apps.agents.models import Agent
 from apps.masters.models import Master
+from apps.whatsapp.bulk import BulkWhatsAppSender
+from apps.whatsapp.retries import record_attempt, schedule_retries, send_retries
 from apps.whatsapp.services import WhatsAppService
 
 
+logger = logging.getLogger(__name__)
+
+
 def send_collection_reminder_task(collection_id):
     """
     Task to send a collection reminder via WhatsApp.
@@ -66,30 +73,22 @@ def send_collection_reminder_task(collection_id):
             }
         )
 
-        # Send via WhatsApp service
+        # Send via WhatsApp service; transient failures are retried later
         service = WhatsAppService()
         success = service.send_message(message)
+        record_attempt(message, success)
 
         if success:
-            message.status = 'sent'
-            message.sent_at = timezone.now()
             collection.last_reminder_sent = timezone.now()
             collection.save()
-        else:
-            message.status = 'failed'
-            if not message.error_message:
-                message.error_message = (
-                    "WhatsApp API not configured. "
-                    "Set WHATSAPP_API_URL, WHATSAPP_API_TOKEN, and WHATSAPP_PHONE_NUMBER_ID."
-                )
 
         message.save()
+        schedule_retries([message])
 
-        return {'success': success, 'message_id': str(message.id)}
+        return {'success': success, 'message_id': str(message.id), 'status': message.status}
 
     except Exception as e:
-        # Log error
-        print(f"Error sending collection reminder: {e}")
+        logger.exception("Error sending collection reminder for collection %s", collection_id)
         return {'success': False, 'error': str(e)}
 
 
@@ -116,32 +115,106 @@ def send_whatsapp_message_task(master_id, agent_id, content):
             content=content,
         )
 
-        # Send via WhatsApp service
+        # Send via WhatsApp service; transient failures are retried later
         service = WhatsAppService()
         success = service.send_message(message)
-
-        if success:
-            message.status = 'sent'
-            message.sent_at = timezone.now()
-        else:
-            message.status = 'failed'
-            if not message.error_message:
-                message.error_message = (
-                    "WhatsApp API not configured. "
-                    "Set WHATSAPP_API_URL, WHATSAPP_API_TOKEN, and WHATSAPP_PHONE_NUMBER_ID."
-                )
+        record_attempt(message, success)
 
         message.save()
+        schedule_retries([message])
+
+        return {'success': success, 'message_id': str(message.id), 'status': message.status}
+
+    except Exception as e:
+        logger.exception("Error sending WhatsApp message to agent %s", agent_id)
+        return {'success': False, 'error': str(e)}
+
 
-        return {'success': success, 'message_id': str(message.id)}
+def send_pending_messages_task(message_ids):
+    """
+    Task to send a batch of pending WhatsApp messages.
+
+    The batch is sent concurrently (WHATSAPP_SEND_CONCURRENCY requests in
+    flight). Messages that are no longer pending (sent by an earlier
+    attempt of the job) are skipped.
+
+    Args:
+        message_ids: List of WhatsAppMessage UUIDs
+    """
+    try:
+        result = BulkWhatsAppSender(batch_size=len(message_ids)).send(message_ids)
+        return {'success': True, 'sent': result['sent'], 'total': result['total']}
 
     except Exception as e:
-        # Log error
-        print(f"Error sending WhatsApp message: {e}")
+        logger.exception("Error sending pending WhatsApp messages %s", message_ids)
         return {'success': False, 'error': str(e)}
 
 
+def retry_messages_task(message_ids):
+    """
+    Task to send retrying WhatsApp messages again, once their backoff is over.
 
+    Messages that fail again are rescheduled, or dead-lettered once they
+    have used WHATSAPP_MAX_ATTEMPTS attempts.
 
+    Args:
+        message_ids: List of WhatsAppMessage UUIDs
+    """
+    try:
+        result = send_retries(message_ids)
+        return {
+            'success': True,
+            'sent': result['sent'],
+            'retrying': result['retrying'],
+            'total': result['total'],
+        }
 
+    except Exception as e:
+        logger.exception("Error retrying WhatsApp messages %s", message_ids)
+        return {'success': False, 'error': str(e)}
 
+
+def fan_out_campaign_task(campaign_id, generation):
+    """
+    Task to create a campaign's messages and queue them in chunks.
+
+    Args:
+        campaign_id: UUID of the campaign
+        generation: Campaign generation the job was queued for
+    """
+    # Imported here because the campaigns module queues this task
+    from apps.whatsapp.campaigns import CampaignService
+
+    try:
+        campaign = Campaign.objects.select_related('master', 'template').get(id=campaign_id)
+        campaign = CampaignService().fan_out(campaign, generation)
+
+        return {'success': True, 'campaign_id': str(campaign.id), 'status': campaign.status}
+
+    except Exception as e:
+        logger.exception("Error fanning out WhatsApp campaign %s", campaign_id)
+        return {'success': False, 'error': str(e)}
+
+
+def send_campaign_chunk_task(campaign_id, chunk, message_ids, generation):
+    """
+    Task to send one chunk of a campaign's messages.
+
+    Args:
+        campaign_id: UUID of the campaign
+        chunk: Index of the chunk in the campaign
+        message_ids: List of WhatsAppMessage UUIDs
+        generation: Campaign generation the job was queued for
+    """
+    # Imported here because the campaigns module queues this task
+    from apps.whatsapp.campaigns import CampaignService
+
+    try:
+        campaign = Campaign.objects.get(id=campaign_id)
+        result = CampaignService().send_chunk(campaign, chunk, message_ids, generation)
+
+        return {'success': True, 'sent': result['sent'], 'failed': result['failed']}
+
+    except Exception as e:
+        logger.exception("Error sending chunk %s of WhatsApp campaign %s: messages %s", chunk, campaign_id, message_ids)
+        return {'success': False, 'error': str(e)}
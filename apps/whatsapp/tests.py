@@ -0,0 +1,108 @@
+"""
+Tests for the status transitions of retried WhatsApp sends.
+"""
+
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.masters.models import Master
+from apps.whatsapp.models import Campaign, WhatsAppMessage
+from apps.whatsapp.retries import send_retries
+from apps.whatsapp.services import WhatsAppService
+
+
+def send_result(success, retryable=False):
+    """Return a send_message() stand-in with a fixed outcome."""
+    def send_message(service, message):
+        message.retryable = retryable
+        if not success:
+            message.error_message = 'Graph API error'
+        return success
+    return send_message
+
+
+@override_settings(WHATSAPP_MAX_ATTEMPTS=3, WHATSAPP_SEND_CONCURRENCY=1)
+class SendRetriesTests(TestCase):
+    """send_retries() sends retrying messages and moves them to their next status."""
+
+    def setUp(self):
+        self.master = Master.objects.create(name='Master', email='master@example.com', api_key='sk_test_retries')
+        queue = mock.patch('apps.whatsapp.retries.get_queue')
+        self.queue = queue.start().return_value
+        self.addCleanup(queue.stop)
+
+    def create_message(self, status='retrying', attempts=1, campaign=None):
+        return WhatsAppMessage.objects.create(
+            master=self.master,
+            campaign=campaign,
+            to_number='+221770000001',
+            content='Merci pour votre paiement',
+            status=status,
+            attempts=attempts,
+            next_retry_at=timezone.now(),
+        )
+
+    def send(self, messages, success, retryable=False):
+        with mock.patch.object(WhatsAppService, 'send_message', autospec=True, side_effect=send_result(success, retryable)):
+            result = send_retries([message.id for message in messages])
+        for message in messages:
+            message.refresh_from_db()
+        return result
+
+    def test_success_marks_the_message_sent(self):
+        message = self.create_message()
+        result = self.send([message], success=True)
+        self.assertEqual(message.status, 'sent')
+        self.assertEqual(message.attempts, 2)
+        self.assertIsNotNone(message.sent_at)
+        self.assertIsNone(message.next_retry_at)
+        self.assertEqual(result['sent'], 1)
+
+    def test_retryable_failure_schedules_another_attempt(self):
+        message = self.create_message()
+        result = self.send([message], success=False, retryable=True)
+        self.assertEqual(message.status, 'retrying')
+        self.assertEqual(message.attempts, 2)
+        self.assertGreater(message.next_retry_at, timezone.now())
+        self.assertEqual(result['retrying'], 1)
+        self.queue.enqueue_at.assert_called_once()
+
+    def test_retryable_failure_on_the_last_attempt_is_dead(self):
+        message = self.create_message(attempts=2)
+        result = self.send([message], success=False, retryable=True)
+        self.assertEqual(message.status, 'dead')
+        self.assertEqual(message.attempts, 3)
+        self.assertIsNone(message.next_retry_at)
+        self.assertEqual(result['failed'], 1)
+        self.queue.enqueue_at.assert_not_called()
+
+    def test_permanent_failure_is_not_retried(self):
+        message = self.create_message()
+        self.send([message], success=False)
+        self.assertEqual(message.status, 'failed')
+        self.assertEqual(message.error_message, 'Graph API error')
+        self.queue.enqueue_at.assert_not_called()
+
+    def test_skips_messages_no_longer_retrying(self):
+        message = self.create_message(status='sent')
+        result = self.send([message], success=True)
+        self.assertEqual(message.status, 'sent')
+        self.assertEqual(message.attempts, 1)
+        self.assertEqual(result['total'], 0)
+
+    def test_skips_messages_of_paused_campaigns(self):
+        campaign = Campaign.objects.create(master=self.master, label='last import', status='paused')
+        message = self.create_message(campaign=campaign)
+        result = self.send([message], success=True)
+        self.assertEqual(message.status, 'retrying')
+        self.assertEqual(result['total'], 0)
+
+    def test_adds_campaign_results_to_its_counters(self):
+        campaign = Campaign.objects.create(master=self.master, label='last import', total_messages=1)
+        message = self.create_message(campaign=campaign)
+        self.send([message], success=True)
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.sent_messages, 1)
+        self.assertEqual(campaign.status, 'completed')
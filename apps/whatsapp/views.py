@@ -12,10 +12,13 @@ from apps.whatsapp.serializers import (
     WhatsAppTemplateSerializer,
     WhatsAppMessageSerializer,
     SendReminderSerializer,
-    SendMessageSerializer
+    SendMessageSerializer,
+    RequeueMessagesSerializer
 )
 from apps.collections.models import Collection
 from apps.agents.models import Agent
+from apps.core.phones import normalize_e164
+from apps.whatsapp.retries import requeue
 from apps.whatsapp.tasks import send_collection_reminder_task, send_whatsapp_message_task
 
 
@@ -81,6 +84,11 @@ class WhatsAppMessageViewSet(viewsets.ReadOnlyModelViewSet):
         if direction:
             queryset = queryset.filter(direction=direction)
 
+        # Filter by recipient, in any number format
+        to_number = self.request.query_params.get('to_number', None)
+        if to_number:
+            queryset = queryset.filter(to_e164=normalize_e164(to_number, master.default_country_code))
+
         return queryset
 
     @action(detail=False, methods=['post'])
@@ -133,7 +141,34 @@ class WhatsAppMessageViewSet(viewsets.ReadOnlyModelViewSet):
             status=status.HTTP_200_OK
         )
 
+    @action(detail=False, methods=['post'])
+    def requeue(self, request):
+        """
+        Send failed, dead-lettered or retrying outbound messages again.
 
+        Picks messages by message_ids, by status, or both; their attempt
+        counts start over.
 
+        POST /api/v1/whatsapp/messages/requeue/
+        """
+        serializer = RequeueMessagesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
+        messages = WhatsAppMessage.objects.filter(master=request.master)
+        if serializer.validated_data.get('message_ids'):
+            messages = messages.filter(id__in=serializer.validated_data['message_ids'])
+        if serializer.validated_data.get('status'):
+            messages = messages.filter(status=serializer.validated_data['status'])
 
+        try:
+            requeued = requeue(messages)
+        except Exception as e:
+            return Response(
+                {'error': f'Could not queue messages: {e}'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        return Response(
+            {'message': f'{requeued} messages queued for sending', 'requeued': requeued},
+            status=status.HTTP_200_OK
+        )
@@ -1,4 +1,4 @@
 #!/bin/bash
 # Start RQ worker script
 
-python manage.py rqworker default
+python manage.py rqworker high_priority default low_priority --with-scheduler
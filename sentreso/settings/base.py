@@ -159,6 +159,17 @@ RQ_QUEUES = {
     },
 }
 
+# Reconciliation runs in an RQ worker; large masters need more than the queue default
+RECONCILIATION_JOB_TIMEOUT = config('RECONCILIATION_JOB_TIMEOUT', default=3600, cast=int)
+RECONCILIATION_MAX_SHARDS = config('RECONCILIATION_MAX_SHARDS', default=32, cast=int)
+# Match new payments as they arrive; sweeps re-read this many seconds before their watermark
+RECONCILIATION_INCREMENTAL = config('RECONCILIATION_INCREMENTAL', default=True, cast=bool)
+RECONCILIATION_WATERMARK_OVERLAP = config('RECONCILIATION_WATERMARK_OVERLAP', default=300, cast=int)
+# Bounds of the split/aggregate subset-sum search, per agent
+RECONCILIATION_SPLIT_MAX_CANDIDATES = config('RECONCILIATION_SPLIT_MAX_CANDIDATES', default=20, cast=int)
+RECONCILIATION_SPLIT_MAX_PARTS = config('RECONCILIATION_SPLIT_MAX_PARTS', default=4, cast=int)
+RECONCILIATION_SPLIT_TIME_BUDGET_MS = config('RECONCILIATION_SPLIT_TIME_BUDGET_MS', default=50, cast=int)
+
 # API Key Configuration
 API_KEY_PREFIX_LIVE = config('API_KEY_PREFIX_LIVE', default='sk_live_')
 API_KEY_PREFIX_TEST = config('API_KEY_PREFIX_TEST', default='sk_test_')
@@ -167,6 +178,41 @@ API_KEY_PREFIX_TEST = config('API_KEY_PREFIX_TEST', default='sk_test_')
 WHATSAPP_API_URL = config('WHATSAPP_API_URL', default=None)
 WHATSAPP_API_TOKEN = config('WHATSAPP_API_TOKEN', default=None)
 WHATSAPP_PHONE_NUMBER_ID = config('WHATSAPP_PHONE_NUMBER_ID', default=None)
+# Messages sent per low_priority job; keep batch / concurrency * request timeout under the queue timeout
+WHATSAPP_SEND_BATCH_SIZE = config('WHATSAPP_SEND_BATCH_SIZE', default=50, cast=int)
+# Graph API requests in flight while a batch is sent
+WHATSAPP_SEND_CONCURRENCY = config('WHATSAPP_SEND_CONCURRENCY', default=10, cast=int)
+# Keep-alive connections to the Graph API, shared by every send in a process
+WHATSAPP_HTTP_POOL_SIZE = config('WHATSAPP_HTTP_POOL_SIZE', default=10, cast=int)
+WHATSAPP_HTTP_CONNECT_TIMEOUT = config('WHATSAPP_HTTP_CONNECT_TIMEOUT', default=3.05, cast=float)
+WHATSAPP_HTTP_READ_TIMEOUT = config('WHATSAPP_HTTP_READ_TIMEOUT', default=10, cast=float)
+# Retries of connection errors and 429/503 responses, with exponential backoff (seconds)
+WHATSAPP_HTTP_RETRIES = config('WHATSAPP_HTTP_RETRIES', default=3, cast=int)
+WHATSAPP_HTTP_BACKOFF = config('WHATSAPP_HTTP_BACKOFF', default=0.5, cast=float)
+# Send attempts before a message that keeps failing transiently is dead-lettered
+WHATSAPP_MAX_ATTEMPTS = config('WHATSAPP_MAX_ATTEMPTS', default=5, cast=int)
+# Backoff between attempts (seconds): doubles from the base up to the max, with jitter
+WHATSAPP_RETRY_BASE_DELAY = config('WHATSAPP_RETRY_BASE_DELAY', default=30, cast=float)
+WHATSAPP_RETRY_MAX_DELAY = config('WHATSAPP_RETRY_MAX_DELAY', default=3600, cast=float)
+# Campaign recipients per low_priority send job
+WHATSAPP_CAMPAIGN_CHUNK_SIZE = config('WHATSAPP_CAMPAIGN_CHUNK_SIZE', default=500, cast=int)
+# Sends per second per phone number ID, shared by all workers through Redis (0 disables)
+WHATSAPP_RATE_LIMIT_PER_SECOND = config('WHATSAPP_RATE_LIMIT_PER_SECOND', default=80, cast=float)
+WHATSAPP_RATE_LIMIT_BURST = config('WHATSAPP_RATE_LIMIT_BURST', default=20, cast=int)
+# Seconds between messages to one recipient once WHATSAPP_RECIPIENT_BURST are sent back to back (0 disables)
+WHATSAPP_RECIPIENT_INTERVAL = config('WHATSAPP_RECIPIENT_INTERVAL', default=6, cast=float)
+WHATSAPP_RECIPIENT_BURST = config('WHATSAPP_RECIPIENT_BURST', default=5, cast=int)
+# Seconds a send may wait for its slot before failing as rate limited
+WHATSAPP_RATE_LIMIT_MAX_WAIT = config('WHATSAPP_RATE_LIMIT_MAX_WAIT', default=30, cast=float)
+
+# Admin UI uploads are staged here until a worker imports them; web and workers must share it
+MANUAL_IMPORT_STAGING_DIR = config('MANUAL_IMPORT_STAGING_DIR', default=str(BASE_DIR / 'var' / 'manual_imports'))
+MANUAL_IMPORT_JOB_TIMEOUT = config('MANUAL_IMPORT_JOB_TIMEOUT', default=3600, cast=int)
+# Processes parsing a payment statement in parallel; 0 uses every CPU, 1 parses in-process
+STATEMENT_PARSE_WORKERS = config('STATEMENT_PARSE_WORKERS', default=0, cast=int)
+
+# Calling code for phone numbers written without one; masters can override it
+DEFAULT_PHONE_COUNTRY_CODE = config('DEFAULT_PHONE_COUNTRY_CODE', default='221')
 
 # Demo template aliases (approved template names in Meta)
 PINPAY_TEMPLATE_NAME = config('PINPAY_TEMPLATE_NAME', default=None)